@@ -0,0 +1,55 @@
+from pathlib import Path
+from typing import List
+import pytest
+from tf2.components.criteria_manager import CriteriaManager
+from tf2.components.resume_manager import ResumeManager
+from tf2.db.criteria_repository import CriteriaRepository
+
+def make_pdf(pages: List[str]) -> bytes:
+    """生成每页一行文字的最小 PDF"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b""]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+        content_id = len(objects) + 1
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(len(objects) + 1)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >> >>"
+            % content_id
+        )
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+@pytest.fixture
+def resume_folder(tmp_path) -> Path:
+    folder = tmp_path / "resumes"
+    folder.mkdir()
+    for name in ("a", "b", "c"):
+        (folder / f"{name}.pdf").write_bytes(make_pdf([f"{name} Python SQL", f"{name} page two"]))
+    return folder
+
+@pytest.fixture
+def resume_manager(resume_folder) -> ResumeManager:
+    return ResumeManager(str(resume_folder))
+
+@pytest.fixture
+def criteria_manager(tmp_path) -> CriteriaManager:
+    return CriteriaManager(
+        criteria_folder=str(tmp_path / "criteria"),
+        repository=CriteriaRepository.from_url(f"sqlite:///{tmp_path / 'criteria.sqlite'}")
+    )
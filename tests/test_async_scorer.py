@@ -0,0 +1,27 @@
+import asyncio
+import numpy as np
+from tf2.components.async_scorer import AsyncResumeScorer, FakeModelEvaluator
+from tf2.components.compiled_criterion import CompiledCriterion
+from tf2.components.page import Page
+from tf2.db.schemas import Criterion
+
+def test_fake_scores_follow_text_not_resume_id():
+    scorer = AsyncResumeScorer(FakeModelEvaluator(latency=0.0, per_leaf_latency=0.0, jitter=0.0))
+    compiled = CompiledCriterion(Criterion(
+        name="root",
+        content="root",
+        children=[
+            (1.0, Criterion(name="python", content="Python")),
+            (1.0, Criterion(name="sql", content="SQL")),
+        ]
+    ))
+    batch = asyncio.run(scorer.score_resume_matrix(compiled, {
+        "a.pdf": [Page("Python and SQL", {"page": 0})],
+        "b.pdf": [Page("Python and SQL", {"page": 0})],
+        "c.pdf": [Page("team lead", {"page": 0})],
+    }))
+    rows = {resume_id: row for row, resume_id in enumerate(batch.resume_ids)}
+    leaves = batch.leaf_scores
+    # 与叶子缓存键一致：文本相同的简历分数相同，文本不同时分数不同
+    assert np.array_equal(leaves[rows["a.pdf"]], leaves[rows["b.pdf"]])
+    assert not np.array_equal(leaves[rows["a.pdf"]], leaves[rows["c.pdf"]])
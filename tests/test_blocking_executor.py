@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from tf2.components.blocking_executor import EndpointLimiter, get_limiter, stream_blocking
+
+def test_cancelled_waiter_returns_handed_over_slot():
+    async def scenario():
+        limiter = EndpointLimiter("test.cancel", max_concurrent=1, max_queue=1, queue_timeout=5.0)
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        # 名额转交给排队的请求，但它在恢复执行前被取消
+        limiter.release()
+        waiting.cancel()
+        try:
+            await waiting
+        except asyncio.CancelledError:
+            pass
+        else:
+            # 部分 Python 版本的 wait_for 在结果已就绪时忽略取消，此时名额归调用方
+            limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["waiting"] == 0
+
+def test_timed_out_waiter_is_rejected():
+    async def scenario():
+        limiter = EndpointLimiter("test.timeout", max_concurrent=1, max_queue=1, queue_timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(Exception) as excinfo:
+            await limiter.acquire()
+        limiter.release()
+        return excinfo.value, limiter.stats()
+
+    error, stats = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert stats["active"] == 0
+
+def _stream_app(name: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        return await stream_blocking(name, iter([b"a", b"b"]), media_type="text/plain")
+
+    return app
+
+async def _call(app: FastAPI, send):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/stream", "raw_path": b"/stream", "root_path": "",
+        "query_string": b"", "headers": [], "client": ("test", 1), "server": ("test", 80)
+    }
+
+    async def receive():
+        await asyncio.sleep(3600)
+
+    await app(scope, receive, send)
+
+def test_stream_slot_released_when_response_start_fails():
+    name = "test.stream.start"
+    app = _stream_app(name)
+
+    async def failing_send(message):
+        if message["type"] == "http.response.start":
+            raise OSError("client went away")
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(OSError):
+                await _call(app, failing_send)
+
+    asyncio.run(scenario())
+    assert get_limiter(name).stats()["active"] == 0
+
+def test_stream_slot_released_after_body():
+    name = "test.stream.ok"
+    app = _stream_app(name)
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(_call(app, send))
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    assert body == b"ab"
+    assert get_limiter(name).stats()["active"] == 0
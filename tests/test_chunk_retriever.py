@@ -0,0 +1,46 @@
+import asyncio
+import threading
+from tf2.components.async_scorer import AsyncResumeScorer, FakeModelEvaluator
+from tf2.components.chunk_retriever import ChunkRetriever, chunk_documents
+from tf2.components.compiled_criterion import CompiledCriterion
+from tf2.components.page import Page
+from tf2.db.schemas import Criterion
+
+def test_chunks_keep_document_order():
+    # 第二个段落超长、需要按行切分，其中有一行本身也超长
+    text = "intro\n\n" + "short line\n" + "x" * 25 + "\ntail line"
+    chunks = chunk_documents([Page(text, {"page": 0})], max_chars=20)
+
+    contents = [chunk.page_content for chunk in chunks]
+    assert contents == ["intro\nshort line", "x" * 20, "x" * 5 + "\ntail line"]
+    assert "".join(contents).replace("\n", "") == text.replace("\n", "")
+    assert [chunk.metadata["chunk"] for chunk in chunks] == list(range(len(chunks)))
+    assert all(len(content) <= 20 for content in contents)
+
+def test_retrieval_runs_in_blocking_pool(monkeypatch):
+    retriever = ChunkRetriever(top_k=1, chunk_chars=40)
+    threads = []
+    contexts = retriever.contexts
+
+    def record_thread(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return contexts(*args, **kwargs)
+
+    monkeypatch.setattr(retriever, "contexts", record_thread)
+    scorer = AsyncResumeScorer(
+        FakeModelEvaluator(latency=0.0, per_leaf_latency=0.0, jitter=0.0),
+        retriever=retriever
+    )
+    compiled = CompiledCriterion(Criterion(
+        name="root",
+        content="root",
+        children=[
+            (1.0, Criterion(name="python", content="Python")),
+            (1.0, Criterion(name="sql", content="SQL")),
+        ]
+    ))
+    documents = [Page("Python projects\n\nSQL reporting\n\nteam lead", {"page": 0})]
+
+    scores = asyncio.run(scorer.score_resume(compiled, "a.pdf", documents))
+    assert len(scores) == len(compiled)
+    assert threads and all(name.startswith("blocking") for name in threads)
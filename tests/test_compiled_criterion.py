@@ -0,0 +1,72 @@
+import random
+import numpy as np
+import pytest
+from tf2.components.compiled_criterion import BatchScores, CompiledCriterion
+from tf2.db.schemas import Criterion
+
+def _random_tree(rng: random.Random, depth: int = 0, prefix: str = "n") -> Criterion:
+    """随机树：部分权重为 0，部分中间节点有直接分数，部分叶子分数缺失"""
+    children = []
+    if depth < 3 and (depth == 0 or rng.random() < 0.6):
+        for i in range(rng.randint(1, 4)):
+            weight = rng.choice([0.0, 0.5, 1.0, rng.uniform(0.1, 3.0)])
+            children.append((weight, _random_tree(rng, depth + 1, f"{prefix}.{i}")))
+    if children:
+        score = rng.uniform(0.0, 1.0) if rng.random() < 0.2 else None
+    else:
+        score = None if rng.random() < 0.03 else rng.uniform(0.0, 1.0)
+    return Criterion(name=prefix, content=prefix, score=score, children=children)
+
+def _preorder(criterion: Criterion):
+    yield criterion
+    for _, child in criterion.children:
+        yield from _preorder(child)
+
+@pytest.mark.parametrize("seed", range(50))
+def test_aggregate_matches_calculate_overall_score(seed):
+    tree = _random_tree(random.Random(seed))
+    compiled = CompiledCriterion(tree)
+    aggregated = compiled.aggregate(compiled.node_scores_of(tree))
+
+    # 每个节点的聚合分数都与递归计算的结果一致，缺失时为 NaN
+    for value, node in zip(aggregated, _preorder(tree)):
+        expected = node.calculate_overall_score()
+        if expected is None:
+            assert np.isnan(value)
+        else:
+            assert value == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    overall = compiled.overall_score(compiled.node_scores_of(tree))
+    expected = tree.calculate_overall_score()
+    if expected is None:
+        assert overall is None
+    else:
+        assert overall == pytest.approx(expected, rel=1e-12, abs=1e-12)
+
+def test_build_criterion_round_trips_scores():
+    tree = _random_tree(random.Random(7))
+    compiled = CompiledCriterion(tree)
+    scores = compiled.node_scores_of(tree)
+    assert np.array_equal(
+        compiled.node_scores_of(compiled.build_criterion(scores)), scores, equal_nan=True
+    )
+
+def test_batch_matrix_matches_per_resume_trees():
+    rng = np.random.default_rng(3)
+    compiled = CompiledCriterion(_random_tree(random.Random(11)))
+    leaf_scores = rng.uniform(0.0, 1.0, size=(64, len(compiled.leaf_index)))
+    leaf_scores[rng.uniform(size=leaf_scores.shape) < 0.02] = np.nan
+    resume_ids = [f"resume-{i}.pdf" for i in range(len(leaf_scores))]
+    batch = BatchScores.from_leaf_scores(compiled, resume_ids, leaf_scores)
+
+    assert batch.scores.shape == (len(resume_ids), len(compiled))
+    assert np.array_equal(batch.leaf_scores, leaf_scores, equal_nan=True)
+    missing = 0
+    for resume_id, overall in batch.items():
+        expected = batch.to_criterion(resume_id).calculate_overall_score()
+        if expected is None:
+            missing += 1
+            assert overall is None
+        else:
+            assert overall == pytest.approx(expected, rel=1e-12, abs=1e-12)
+    # 同时覆盖了有缺失和无缺失的简历
+    assert 0 < missing < len(resume_ids)
@@ -0,0 +1,117 @@
+import asyncio
+import json
+from pathlib import Path
+import pytest
+from fastapi import HTTPException
+from tf2.components.criteria_manager import CriteriaManager
+from tf2.db.criteria_repository import CriteriaRepository
+from tf2.db.schemas import Criterion
+
+STANDARD = Path(__file__).resolve().parents[1] / "tf2" / "assets" / "criteria" / "standard.json"
+
+class _BrokenRepository(CriteriaRepository):
+    def delete_tree(self, name: str) -> None:
+        raise RuntimeError("database is locked")
+
+def test_delete_failure_is_reported_as_http_error(tmp_path):
+    manager = CriteriaManager(
+        criteria_folder=str(tmp_path / "criteria"),
+        repository=_BrokenRepository.from_url(f"sqlite:///{tmp_path / 'criteria.sqlite'}")
+    )
+    asyncio.run(manager.create_criteria(Criterion(name="a", content="a")))
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(manager.delete_criteria("a"))
+    assert excinfo.value.status_code == 500
+    # 数据库删除失败时内存中的标准保留
+    assert asyncio.run(manager.get_criteria("a")).name == "a"
+
+def test_variants_sharing_sub_criteria_are_persisted(tmp_path, criteria_manager):
+    standard = Criterion.from_json(json.loads(STANDARD.read_text(encoding="utf-8")))
+    variant = standard.model_copy(update={"name": f"{standard.name} (variant)"})
+    asyncio.run(criteria_manager.create_criteria(standard))
+    asyncio.run(criteria_manager.create_criteria(variant))
+
+    reloaded = CriteriaManager(
+        criteria_folder=str(tmp_path / "criteria"),
+        repository=criteria_manager.repository
+    )
+    assert asyncio.run(reloaded.get_criteria(standard.name)) == standard
+    assert asyncio.run(reloaded.get_criteria(variant.name)) == variant
+
+def test_rename_onto_existing_criteria_is_rejected(criteria_manager):
+    asyncio.run(criteria_manager.create_criteria(Criterion(name="a", content="a")))
+    asyncio.run(criteria_manager.create_criteria(Criterion(name="b", content="b")))
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(criteria_manager.update_criteria("a", Criterion(name="b", content="a v2")))
+    assert excinfo.value.status_code == 400
+    assert criteria_manager.repository.load_trees().keys() == {"a", "b"}
+
+def test_nested_search_sees_every_node_with_a_duplicate_name(tmp_path):
+    # 同一棵树中两个名称相同、元数据不同的节点（JSON 文件中的标准允许这样写，数据库不允许）
+    manager = CriteriaManager(criteria_folder=str(tmp_path / "criteria"))
+    tree = Criterion(
+        name="root",
+        content="root",
+        children=[
+            (0.5, Criterion(name="經驗", content="工作經驗", metadata={"area": "backend"})),
+            (0.5, Criterion(
+                name="專案",
+                content="專案",
+                children=[(1.0, Criterion(name="經驗", content="專案經驗", metadata={"area": "data"}))]
+            )),
+        ]
+    )
+    asyncio.run(manager.create_criteria(tree))
+
+    for area in ("backend", "data"):
+        found = asyncio.run(manager.search_criteria_by_metadata({"area": area}, nested=True))
+        assert [c.name for c in found] == ["root"]
+
+    asyncio.run(manager.delete_criteria("root"))
+    assert asyncio.run(manager.search_criteria_by_metadata({"area": "data"}, nested=True)) == []
+
+def _names(page):
+    return [criterion.name for criterion in page]
+
+def _walk(manager, limit):
+    names, cursor = [], None
+    while True:
+        page, cursor = asyncio.run(manager.list_criteria_page(limit=limit, cursor=cursor))
+        names += _names(page)
+        if cursor is None:
+            return names
+
+def test_cursor_pages_cover_every_name_once(criteria_manager):
+    existing = _walk(criteria_manager, limit=100)
+    for name in ("c", "a", "e", "b", "d"):
+        asyncio.run(criteria_manager.create_criteria(Criterion(name=name, content=name)))
+    expected = sorted(existing + ["a", "b", "c", "d", "e"])
+    for limit in (1, 2, 5, 100):
+        assert _walk(criteria_manager, limit) == expected
+
+def test_cursor_survives_changes_between_pages(criteria_manager):
+    for name in ("a", "b", "c", "d", "e"):
+        asyncio.run(criteria_manager.create_criteria(Criterion(name=name, content=name)))
+    page, cursor = asyncio.run(criteria_manager.list_criteria_page(limit=2))
+    assert _names(page)[-1] == "b"
+
+    # 游标指向的名称被删除、前面插入新名称：既不重复也不遗漏后面的名称
+    asyncio.run(criteria_manager.delete_criteria("b"))
+    asyncio.run(criteria_manager.create_criteria(Criterion(name="aa", content="aa")))
+    asyncio.run(criteria_manager.create_criteria(Criterion(name="cc", content="cc")))
+    page, cursor = asyncio.run(criteria_manager.list_criteria_page(limit=2, cursor=cursor))
+    assert _names(page) == ["c", "cc"]
+    page, cursor = asyncio.run(criteria_manager.list_criteria_page(limit=2, cursor=cursor))
+    assert _names(page)[:2] == ["d", "e"]
+
+def test_stale_cursor_past_the_end_returns_empty_page(criteria_manager):
+    asyncio.run(criteria_manager.create_criteria(Criterion(name="a", content="a")))
+    cursor = CriteriaManager._encode_cursor("￿")
+    page, next_cursor = asyncio.run(criteria_manager.list_criteria_page(cursor=cursor))
+    assert page == [] and next_cursor is None
+
+def test_malformed_cursor_is_rejected(criteria_manager):
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(criteria_manager.list_criteria_page(cursor="not a cursor!"))
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,110 @@
+import warnings
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from tf2.db.criteria_repository import CriteriaRepository
+from tf2.db.schemas import Criterion, CriterionORM
+
+def _tree(root: str, shared_content: str) -> Criterion:
+    return Criterion(
+        name=root,
+        content=f"{root} root",
+        children=[
+            (0.6, Criterion(
+                name="技術能力",
+                content=shared_content,
+                children=[(1.0, Criterion(name="Python基礎", content="Python"))]
+            )),
+            (0.4, Criterion(name=f"{root}-other", content="other")),
+        ]
+    )
+
+@pytest.fixture
+def url(tmp_path):
+    return f"sqlite:///{tmp_path / 'criteria.sqlite'}"
+
+@pytest.fixture
+def repository(url):
+    return CriteriaRepository.from_url(url)
+
+def test_round_trip(repository):
+    tree = _tree("a", "shared")
+    repository.save_tree(tree)
+    assert repository.load_tree("a") == tree
+    assert repository.list_root_names() == ["a"]
+
+def test_trees_can_share_node_names(repository):
+    first, second = _tree("a", "from a"), _tree("b", "from b")
+    repository.save_tree(first)
+    repository.save_tree(second)
+    assert repository.load_trees() == {"a": first, "b": second}
+
+    # 替换或删除一棵树不影响另一棵树的同名节点
+    repository.save_tree(_tree("a", "a v2"))
+    repository.delete_tree("b")
+    assert repository.load_trees() == {"a": _tree("a", "a v2")}
+    assert repository.list_root_names() == ["a"]
+
+def test_shared_child_within_a_tree(repository):
+    shared = Criterion(name="SQL基礎", content="SQL")
+    tree = Criterion(
+        name="root",
+        content="root",
+        children=[
+            (1.0, Criterion(name="x", content="x", children=[(1.0, shared)])),
+            (1.0, Criterion(name="y", content="y", children=[(2.0, shared)])),
+        ]
+    )
+    repository.save_tree(tree)
+    assert repository.load_tree("root") == tree
+
+def test_rename_is_atomic(repository):
+    repository.save_tree(_tree("a", "v1"))
+    repository.save_tree(_tree("renamed", "v2"), replace="a")
+    assert repository.list_root_names() == ["renamed"]
+
+    # 写入失败（元数据无法序列化为 JSON）时旧树保留
+    broken = Criterion(name="broken", content="x", metadata={"value": object()})
+    with pytest.raises(Exception):
+        repository.save_tree(broken, replace="renamed")
+    assert repository.load_trees() == {"renamed": _tree("renamed", "v2")}
+
+def test_orm_relationship_and_to_pydantic(url, repository):
+    repository.save_tree(_tree("a", "from a"))
+    repository.save_tree(_tree("b", "from b"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with Session(repository.engine) as session:
+            node = session.get(CriterionORM, ("b", "技術能力"))
+            assert [child.name for child in node.children] == ["Python基礎"]
+            assert node.to_pydantic() == _tree("b", "from b").children[0][1]
+
+def test_migrates_tables_with_global_names(url):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE criteria (name VARCHAR PRIMARY KEY, content VARCHAR NOT NULL, "
+            "scale VARCHAR NOT NULL, score FLOAT, metadata JSON NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE criteria_association (parent_id VARCHAR, child_id VARCHAR, "
+            "weight FLOAT NOT NULL, position INTEGER NOT NULL, PRIMARY KEY (parent_id, child_id))"
+        ))
+        conn.execute(text(
+            "INSERT INTO criteria VALUES ('a', 'a root', '0.0 to 1.0', NULL, '{\"k\": 1}'), "
+            "('c1', 'one', '0.0 to 1.0', NULL, '{}'), ('c2', 'two', '0.0 to 1.0', NULL, '{}')"
+        ))
+        conn.execute(text(
+            "INSERT INTO criteria_association VALUES ('a', 'c2', 0.3, 1), ('a', 'c1', 0.7, 0)"
+        ))
+
+    repository = CriteriaRepository(engine)
+    assert repository.load_trees() == {"a": Criterion(
+        name="a",
+        content="a root",
+        metadata={"k": 1},
+        children=[
+            (0.7, Criterion(name="c1", content="one")),
+            (0.3, Criterion(name="c2", content="two")),
+        ]
+    )}
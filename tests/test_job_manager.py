@@ -0,0 +1,97 @@
+import threading
+import time
+import pytest
+from tf2.components.job_manager import CANCELLED, COMPLETED, RUNNING, JobManager
+from tf2.components.resume_scorer import ResumeScorer
+from tf2.db.schemas import Criterion
+
+CRITERION = Criterion(
+    name="總評",
+    content="總體評估",
+    children=[
+        (0.5, Criterion(name="Python", content="熟悉 Python")),
+        (0.5, Criterion(name="SQL", content="熟悉 SQL")),
+    ]
+)
+
+class BlockingScorer(ResumeScorer):
+    """第一份简历评分时阻塞，直到测试放行"""
+
+    def __init__(self):
+        super().__init__(seed=42)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def score_resume_matrix(self, compiled, documents_batch):
+        self.started.set()
+        assert self.release.wait(10)
+        return super().score_resume_matrix(compiled, documents_batch)
+
+def _wait_for(manager, job_id, statuses, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get_job(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    pytest.fail(f"job {job_id} did not reach {statuses}")
+
+def test_results_follow_file_name_order(tmp_path, resume_folder, resume_manager):
+    jobs = JobManager(resume_manager, ResumeScorer(seed=42), db_path=str(tmp_path / "jobs.sqlite"))
+    try:
+        job = jobs.submit(CRITERION, resume_folder)
+        _wait_for(jobs, job["job_id"], {COMPLETED})
+        results = jobs.get_results(job["job_id"])
+        assert list(results["results"]) == ["a.pdf", "b.pdf", "c.pdf"]
+        assert results["completed"] == results["total"] == 3
+    finally:
+        jobs.shutdown()
+
+def test_running_job_is_not_claimed_twice(tmp_path, resume_folder, resume_manager):
+    db_path = str(tmp_path / "jobs.sqlite")
+    scorer = BlockingScorer()
+    first = JobManager(resume_manager, scorer, db_path=db_path)
+    try:
+        job = first.submit(CRITERION, resume_folder)
+        assert scorer.started.wait(10)
+
+        # 另一个进程启动时不会重新调度正在执行的任务，也不能认领它
+        second = JobManager(resume_manager, ResumeScorer(seed=42), db_path=db_path)
+        try:
+            assert job["job_id"] not in second._cancel_events
+            assert not second._claim(job["job_id"])
+            assert second.get_job(job["job_id"])["status"] == RUNNING
+        finally:
+            second.shutdown()
+
+        scorer.release.set()
+        _wait_for(first, job["job_id"], {COMPLETED})
+    finally:
+        scorer.release.set()
+        first.shutdown()
+
+def test_cancel_from_another_manager_stops_job(tmp_path, resume_folder, resume_manager):
+    db_path = str(tmp_path / "jobs.sqlite")
+    scorer = BlockingScorer()
+    first = JobManager(resume_manager, scorer, db_path=db_path)
+    try:
+        job = first.submit(CRITERION, resume_folder)
+        assert scorer.started.wait(10)
+
+        second = JobManager(resume_manager, ResumeScorer(seed=42), db_path=db_path)
+        try:
+            assert second.cancel(job["job_id"])["status"] == CANCELLED
+        finally:
+            second.shutdown()
+
+        scorer.release.set()
+        deadline = time.monotonic() + 10
+        while job["job_id"] in first._cancel_events and time.monotonic() < deadline:
+            time.sleep(0.02)
+        results = first.get_results(job["job_id"])
+        assert results["status"] == CANCELLED
+        # 正在评分的那一份会写入，之后的简历不再评分
+        assert list(results["results"]) == ["a.pdf"]
+    finally:
+        scorer.release.set()
+        first.shutdown()
@@ -0,0 +1,70 @@
+import asyncio
+import numpy as np
+import pytest
+from tf2.components.result_store import ResultStore, StoredResult
+from tf2.db.schemas import Criterion
+
+def _criterion(name: str, python_weight: float) -> Criterion:
+    return Criterion(
+        name=name,
+        content="技術能力",
+        children=[
+            (python_weight, Criterion(name=f"{name}-Python", content="熟悉 Python")),
+            (1.0, Criterion(name=f"{name}-SQL", content="熟悉 SQL")),
+        ]
+    )
+
+def _put(store: ResultStore, criterion: Criterion, resume_hash: str) -> None:
+    store.put(
+        criterion.name,
+        criterion.content_hash(),
+        "scorer",
+        StoredResult(resume_hash, f"{resume_hash}.pdf", 0.5, np.array([np.nan, 0.4, 0.6]))
+    )
+
+def _hashes(store: ResultStore, criterion: Criterion):
+    return [result.resume_hash for result in store.results_for(criterion.content_hash())]
+
+@pytest.fixture
+def store(tmp_path, criteria_manager) -> ResultStore:
+    store = ResultStore(str(tmp_path / "results.sqlite"))
+    criteria_manager.add_listener(store.on_criteria_changed)
+    return store
+
+def test_updating_criteria_drops_results_of_old_version(store, criteria_manager):
+    old = _criterion("後端", 1.0)
+    other = _criterion("前端", 1.0)
+    asyncio.run(criteria_manager.create_criteria(old))
+    asyncio.run(criteria_manager.create_criteria(other))
+    _put(store, old, "a")
+    _put(store, other, "a")
+
+    new = _criterion("後端", 2.0)
+    # 新版本已有的结果会保留，例如改回之前的权重
+    _put(store, new, "b")
+    asyncio.run(criteria_manager.update_criteria("後端", new))
+
+    assert _hashes(store, old) == []
+    assert _hashes(store, new) == ["b"]
+    assert _hashes(store, other) == ["a"]
+
+def test_unchanged_criteria_keeps_results(store, criteria_manager):
+    criterion = _criterion("後端", 1.0)
+    asyncio.run(criteria_manager.create_criteria(criterion))
+    _put(store, criterion, "a")
+    asyncio.run(criteria_manager.update_criteria("後端", _criterion("後端", 1.0)))
+    assert _hashes(store, criterion) == ["a"]
+
+def test_deleting_criteria_drops_all_results(store, criteria_manager):
+    criterion = _criterion("後端", 1.0)
+    asyncio.run(criteria_manager.create_criteria(criterion))
+    _put(store, criterion, "a")
+    asyncio.run(criteria_manager.delete_criteria("後端"))
+    assert _hashes(store, criterion) == []
+
+def test_renaming_criteria_drops_results_under_old_name(store, criteria_manager):
+    criterion = _criterion("後端", 1.0)
+    asyncio.run(criteria_manager.create_criteria(criterion))
+    _put(store, criterion, "a")
+    asyncio.run(criteria_manager.update_criteria("後端", _criterion("後端服務", 1.0)))
+    assert _hashes(store, criterion) == []
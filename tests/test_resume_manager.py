@@ -0,0 +1,32 @@
+from tf2.components.resume_manager import ResumeManager
+
+def test_parallel_read_matches_serial(resume_folder):
+    manager = ResumeManager(str(resume_folder))
+    paths = sorted(resume_folder.glob("*.pdf"))
+
+    serial = manager.read_resumes(paths, max_workers=1)
+    parallel = manager.read_resumes(paths, max_workers=2, timeout=60)
+
+    assert parallel == serial
+    assert serial["b.pdf"][0].page_content == "b Python SQL"
+
+def test_page_limits(resume_folder):
+    manager = ResumeManager(str(resume_folder), max_pages=1)
+    pages = manager.read_resume(str(resume_folder / "a.pdf"))
+    assert [page.page_content for page in pages] == ["a Python SQL"]
+    pages = manager.read_resume(str(resume_folder / "a.pdf"), max_pages=5, max_chars=4)
+    assert "".join(page.page_content for page in pages) == "a Py"
+
+def test_shared_manager_reads_whole_resumes_unless_limited(tmp_path, monkeypatch):
+    from tf2.components import resume_manager as module
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("TF2_RESUME_MAX_PAGES", raising=False)
+    monkeypatch.delenv("TF2_RESUME_MAX_CHARS", raising=False)
+    monkeypatch.setattr(module, "_default_manager", None)
+    manager = module.get_default_resume_manager()
+    assert manager.max_pages is None and manager.max_chars is None
+
+    monkeypatch.setenv("TF2_RESUME_MAX_PAGES", "5")
+    monkeypatch.setattr(module, "_default_manager", None)
+    assert module.get_default_resume_manager().max_pages == 5
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from tf2.components.compiled_criterion import CompiledCriterion
+from tf2.components.leaf_cache import LeafScoreCache
+from tf2.components.page import Page
+from tf2.components.resume_scorer import ResumeScorer
+from tf2.db.schemas import Criterion
+
+CRITERION = Criterion(
+    name="總評",
+    content="總體評估",
+    children=[
+        (0.6, Criterion(
+            name="技術能力",
+            content="技術相關能力評估",
+            children=[
+                (0.5, Criterion(name="Python", content="熟悉 Python")),
+                (0.5, Criterion(name="SQL", content="熟悉 SQL")),
+            ]
+        )),
+        (0.4, Criterion(name="軟技能", content="溝通與團隊協作")),
+    ]
+)
+
+@pytest.fixture
+def documents_batch():
+    # 200 份简历，其中部分文本相同，共享叶子缓存条目
+    return {
+        f"resume-{i:03d}.pdf": [Page(f"resume text {i % 150}", {"page": 0})]
+        for i in range(200)
+    }
+
+def _matrix(scorer, compiled, documents_batch, resume_ids):
+    batch = scorer.score_resume_matrix(
+        compiled, {resume_id: documents_batch[resume_id] for resume_id in resume_ids}
+    )
+    rows = {resume_id: row for row, resume_id in enumerate(batch.resume_ids)}
+    return np.stack([batch.scores[rows[resume_id]] for resume_id in sorted(resume_ids)])
+
+def test_scores_do_not_depend_on_order_or_cache(tmp_path, documents_batch):
+    compiled = CompiledCriterion(CRITERION)
+    resume_ids = list(documents_batch)
+    expected = _matrix(ResumeScorer(seed=42), compiled, documents_batch, resume_ids)
+
+    forward = ResumeScorer(seed=42, cache=LeafScoreCache(str(tmp_path / "forward.sqlite")))
+    backward = ResumeScorer(seed=42, cache=LeafScoreCache(str(tmp_path / "backward.sqlite")))
+    assert np.array_equal(_matrix(forward, compiled, documents_batch, resume_ids), expected)
+    assert np.array_equal(
+        _matrix(backward, compiled, documents_batch, resume_ids[::-1]), expected
+    )
+    # 一份一份评分，缓存已经填满
+    one_by_one = np.stack([
+        _matrix(forward, compiled, documents_batch, [resume_id])[0]
+        for resume_id in sorted(resume_ids)
+    ])
+    assert np.array_equal(one_by_one, expected)
+
+def test_parallel_batch_is_bit_identical_to_serial(tmp_path, documents_batch):
+    serial = ResumeScorer(seed=42).score_resume_batch(CRITERION, documents_batch)
+    cached = ResumeScorer(seed=42, cache=LeafScoreCache(str(tmp_path / "leaf.sqlite")))
+    parallel = cached.score_resume_batch(CRITERION, documents_batch, max_workers=8)
+
+    assert list(parallel) == list(serial)
+    for filename, scored in serial.items():
+        assert parallel[filename] == scored
+        assert parallel[filename].calculate_overall_score() == scored.calculate_overall_score()
+
+def test_same_text_scores_the_same_leaves():
+    scorer = ResumeScorer(seed=7)
+    compiled = CompiledCriterion(CRITERION)
+    text = [Page("same text")]
+    batch = scorer.score_resume_matrix(compiled, {"a.pdf": text, "b.pdf": text})
+    leaves = list(compiled.leaf_index)
+    assert np.array_equal(batch.scores[0, leaves], batch.scores[1, leaves])
+
+def test_resume_id_defaults_to_text_and_does_not_change_scores():
+    scorer = ResumeScorer(seed=1)
+    documents = [Page("same text")]
+    assert scorer.score_resume(CRITERION, documents) == scorer.score_resume(
+        CRITERION, documents, resume_id="resume1.pdf"
+    )
+
+class CountingScorer(ResumeScorer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evaluated = []
+
+    def _node_score(self, node, resume_text):
+        self.evaluated.append(node)
+        return super()._node_score(node, resume_text)
+
+def test_cached_leaves_are_not_evaluated(tmp_path, documents_batch):
+    compiled = CompiledCriterion(CRITERION)
+    cache = LeafScoreCache(str(tmp_path / "leaf.sqlite"))
+    cold = CountingScorer(seed=42, cache=cache)
+    expected = _matrix(cold, compiled, documents_batch, list(documents_batch))
+
+    warm = CountingScorer(seed=42, cache=cache)
+    assert np.array_equal(_matrix(warm, compiled, documents_batch, list(documents_batch)), expected)
+    # 只有中间节点需要计算，叶子全部来自缓存
+    inner = len(compiled) - len(compiled.leaf_index)
+    assert len(warm.evaluated) == inner * len(documents_batch)
@@ -0,0 +1,47 @@
+import os
+from conftest import make_pdf
+from tf2.components.resume_manager import ResumeManager
+from tf2.components.resume_upload import ResumeUpload
+
+BOUNDARY = "tf2-test-boundary"
+
+def _body(files):
+    parts = []
+    for filename, content in files:
+        parts.append(
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="files"; filename="{filename}"\r\n'
+            f"Content-Type: application/pdf\r\n\r\n".encode("utf-8")
+            + content + b"\r\n"
+        )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode("utf-8")
+
+def _upload(manager, files, chunk_size=1024):
+    upload = ResumeUpload(manager, f"multipart/form-data; boundary={BOUNDARY}")
+    body = _body(files)
+    for start in range(0, len(body), chunk_size):
+        upload.feed(body[start:start + chunk_size])
+    return upload.finish()
+
+def test_name_collision_keeps_existing_file(resume_folder):
+    manager = ResumeManager(str(resume_folder))
+    original = (resume_folder / "a.pdf").read_bytes()
+    new = make_pdf(["another a"])
+
+    results = _upload(manager, [("a.pdf", new), ("x.pdf", original)])
+
+    assert [r["status"] for r in results] == ["stored", "duplicate"]
+    assert results[0]["stored_as"] == "a-1.pdf"
+    assert results[1]["stored_as"] == "a.pdf"
+    assert (resume_folder / "a.pdf").read_bytes() == original
+    assert (resume_folder / "a-1.pdf").read_bytes() == new
+    # 临时文件都已删除，文件夹中也没有空文件
+    names = sorted(os.listdir(resume_folder))
+    assert names == ["a-1.pdf", "a.pdf", "b.pdf", "c.pdf"]
+    assert all((resume_folder / name).stat().st_size > 0 for name in names)
+
+def test_rejected_parts_leave_no_files(resume_folder):
+    manager = ResumeManager(str(resume_folder))
+    results = _upload(manager, [("notes.pdf", b"plain text, not a pdf")])
+    assert results[0]["status"] == "rejected"
+    assert sorted(os.listdir(resume_folder)) == ["a.pdf", "b.pdf", "c.pdf"]
@@ -0,0 +1,76 @@
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from tf2.api import resumes
+from tf2.components.extraction_cache import ExtractionCache
+from tf2.components.resume_manager import ResumeManager
+from tf2.components.resume_watcher import ResumeWatcher
+
+@pytest.fixture
+def manager():
+    return ResumeManager()
+
+@pytest.fixture
+def client(manager):
+    app = FastAPI()
+    app.include_router(resumes.router)
+    app.dependency_overrides[resumes.get_resume_manager] = lambda: manager
+    app.dependency_overrides[resumes.get_resume_watcher] = lambda: ResumeWatcher(manager)
+    return TestClient(app)
+
+def _record_threads(monkeypatch, obj, name):
+    threads = []
+    original = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(obj, name, wrapper)
+    return threads
+
+def test_folder_and_listing_run_in_blocking_pool(client, manager, resume_folder, monkeypatch):
+    folder_threads = _record_threads(monkeypatch, manager, "set_base_folder")
+    list_threads = _record_threads(monkeypatch, manager, "list_resume_paths")
+
+    response = client.post("/resumes/folder", params={"folder_path": str(resume_folder)})
+    assert response.status_code == 200
+    assert manager.base_folder == resume_folder
+
+    response = client.get("/resumes/", params={"max_pages": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(body) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert body["a.pdf"]["content"] == ["a Python SQL"]
+
+    threads = folder_threads + list_threads
+    assert len(threads) == 2 and all(name.startswith("blocking") for name in threads)
+
+def test_errors_keep_status_codes(client, tmp_path):
+    assert client.get("/resumes/").status_code == 400
+    response = client.post("/resumes/folder", params={"folder_path": str(tmp_path / "missing")})
+    assert response.status_code == 400
+    # 没有提取缓存时无法启动监视器
+    assert client.post("/resumes/watcher/start").status_code == 400
+    assert client.post("/resumes/watcher/stop").json()["running"] is False
+
+def test_changing_folder_moves_running_watcher(tmp_path, resume_folder):
+    manager = ResumeManager(str(resume_folder), cache=ExtractionCache(str(tmp_path / "extraction")))
+    watcher = ResumeWatcher(manager, max_workers=1, poll_interval=0.05, use_inotify=False)
+    app = FastAPI()
+    app.include_router(resumes.router)
+    app.dependency_overrides[resumes.get_resume_manager] = lambda: manager
+    app.dependency_overrides[resumes.get_resume_watcher] = lambda: watcher
+    client = TestClient(app)
+
+    other = tmp_path / "other"
+    other.mkdir()
+    watcher.start()
+    try:
+        response = client.post("/resumes/folder", params={"folder_path": str(other)})
+        assert response.status_code == 200
+        assert watcher.running
+        assert watcher.folder == other
+    finally:
+        watcher.stop()
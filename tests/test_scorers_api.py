@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from tf2.api import scorers
+from tf2.components.resume_scorer import ResumeScorer
+from tf2.components.result_store import ResultStore
+from tf2.db.schemas import Criterion
+
+CRITERION = Criterion(
+    name="技術評估",
+    content="技術能力",
+    children=[
+        (0.7, Criterion(name="Python", content="熟悉 Python")),
+        (0.3, Criterion(name="SQL", content="熟悉 SQL")),
+    ]
+)
+
+@pytest.fixture
+def client(tmp_path, resume_manager, criteria_manager):
+    asyncio.run(criteria_manager.create_criteria(CRITERION))
+    store = ResultStore(str(tmp_path / "results.sqlite"))
+    app = FastAPI()
+    app.include_router(scorers.router)
+    app.dependency_overrides[scorers.get_scorer] = lambda: ResumeScorer(seed=42)
+    app.dependency_overrides[scorers.get_resume_manager] = lambda: resume_manager
+    app.dependency_overrides[scorers.get_criteria_manager] = lambda: criteria_manager
+    app.dependency_overrides[scorers.get_result_store] = lambda: store
+    return TestClient(app)
+
+def test_scoring_details_keeps_http_status(client):
+    response = client.get("/scorers/results/missing/a.pdf")
+    assert response.status_code == 404
+
+def test_stream_lists_resumes_off_the_event_loop(client, resume_manager, monkeypatch):
+    threads = []
+    list_resume_paths = resume_manager.list_resume_paths
+
+    def record_thread():
+        threads.append(threading.current_thread().name)
+        return list_resume_paths()
+
+    monkeypatch.setattr(resume_manager, "list_resume_paths", record_thread)
+    response = client.post("/scorers/batch/技術評估/stream", params={"include_tree": False})
+    assert response.status_code == 200
+    lines = [orjson.loads(line) for line in response.content.splitlines()]
+    assert sorted(line["resume"] for line in lines[:-1]) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert lines[-1]["count"] == 3
+    assert threads and all(name.startswith("blocking") for name in threads)
+
+def test_stream_without_folder_fails_before_streaming(client, resume_manager):
+    resume_manager.base_folder = None
+    response = client.post("/scorers/batch/技術評估/stream")
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("source", ["live", "stored"])
+def test_rank_reports_one_overall_score(client, source):
+    # stored 只使用已保存的结果，先用 live 评分一次
+    assert client.post("/scorers/rank/技術評估", params={"include_tree": False}).status_code == 200
+    response = client.post(
+        "/scorers/rank/技術評估", params={"k": 3, "source": source, "include_tree": False}
+    )
+    assert response.status_code == 200
+    results = orjson.loads(response.content)["results"]
+    assert [entry["rank"] for entry in results] == [1, 2, 3]
+    for entry in results:
+        assert entry["score"] == entry["overall_score"]
+
+def test_reweight_reranks_stored_results_without_rescoring(client, resume_manager, monkeypatch):
+    batch = orjson.loads(client.post("/scorers/batch/技術評估").content)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("reweight must not read resumes")
+
+    monkeypatch.setattr(resume_manager, "read_resume", fail)
+    response = client.post(
+        "/scorers/reweight/技術評估",
+        params={"include_nodes": True},
+        json={"Python": 0.0, "SQL": 1.0}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3
+    ranking = body["ranking"]
+    assert [entry["rank"] for entry in ranking] == [1, 2, 3]
+    overall = [entry["overall_score"] for entry in ranking]
+    assert overall == sorted(overall, reverse=True)
+    for entry in ranking:
+        # Python 权重为 0 时总分就是 SQL 的分数
+        assert entry["overall_score"] == pytest.approx(entry["node_scores"]["SQL"])
+        assert entry["previous_overall_score"] == pytest.approx(
+            batch[entry["resume"]]["overall_score"]
+        )
+
+@pytest.mark.parametrize("weights", [{"Rust": 1.0}, {"技術評估": 1.0}, {"SQL": -1.0}])
+def test_reweight_rejects_invalid_weights(client, weights):
+    response = client.post("/scorers/reweight/技術評估", json=weights)
+    assert response.status_code == 400
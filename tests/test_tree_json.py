@@ -0,0 +1,95 @@
+import json
+import numpy as np
+import orjson
+import pytest
+from fastapi import HTTPException
+from tf2.components.compiled_criterion import CompiledCriterion
+from tf2.components.page import Page
+from tf2.components.resume_scorer import ResumeScorer
+from tf2.components.tree_json import TREE_FIELDS, dumps, get_tree_template, parse_fields
+from tf2.db.schemas import Criterion
+
+CRITERION = Criterion(
+    name="總評",
+    content="總體評估 \"quoted\" \\ 換行\n",
+    children=[
+        (0.0, Criterion(name="零權重", content="weight 0", metadata={"tags": ["a", "b"]})),
+        (1.5, Criterion(
+            name="技術能力",
+            content="技術",
+            scale="1 to 5",
+            children=[
+                (1, Criterion(name="Python", content="Python", metadata={"level": 3})),
+                (0.0, Criterion(name="SQL", content="SQL", metadata={"nested": {"x": None}})),
+            ]
+        )),
+    ],
+    metadata={"version": 2}
+)
+
+def _model_json(criterion: Criterion, fields=TREE_FIELDS):
+    """model_dump 经标准库 json 往返（元组变为列表），只保留 fields 中的字段"""
+    data = json.loads(json.dumps(criterion.model_dump()))
+
+    def project(node):
+        return {
+            field: [[weight, project(child)] for weight, child in node["children"]]
+            if field == "children" else node[field]
+            for field in fields
+        }
+
+    return project(data)
+
+@pytest.fixture
+def compiled():
+    return CompiledCriterion(CRITERION)
+
+def _score_rows(compiled):
+    batch = ResumeScorer(seed=3).score_resume_matrix(
+        compiled, {"a.pdf": [Page("a")], "b.pdf": [Page("b")]}
+    )
+    rows = [batch.scores[0], batch.scores[1]]
+    missing = batch.scores[1].copy()
+    missing[[0, 2]] = np.nan
+    rows.append(missing)
+    rows.append(np.full(len(compiled), np.nan))
+    rows.append(np.array([0.1 + 0.2, 1e-7, 0.0, 1.0, 2 / 3])[:len(compiled)])
+    return rows
+
+@pytest.mark.parametrize("fields", [None, "name,score", "score", "metadata,scale,content"])
+def test_render_matches_model_dump(compiled, fields):
+    projected = parse_fields(fields)
+    template = get_tree_template(compiled, projected)
+    for scores in _score_rows(compiled):
+        rendered = template.render(scores)
+        expected = _model_json(compiled.build_criterion(scores), projected)
+        assert orjson.loads(rendered) == expected
+        # 键顺序也与 model_dump 相同
+        assert json.dumps(orjson.loads(rendered)) == json.dumps(expected)
+
+def test_fragment_embeds_in_response(compiled):
+    scores = _score_rows(compiled)[0]
+    template = get_tree_template(compiled)
+    payload = orjson.loads(dumps({"a.pdf": {"scored_criterion": template.fragment(scores)}}))
+    assert payload["a.pdf"]["scored_criterion"] == _model_json(compiled.build_criterion(scores))
+
+def test_non_finite_scores_render_as_null(compiled):
+    scores = np.array([np.inf, -np.inf, np.nan, 0.5, 1.0])[:len(compiled)]
+    rendered = get_tree_template(compiled).render(scores)
+    # 与 orjson 相同：非有限值写为 null，输出始终是合法 JSON
+    expected = orjson.loads(orjson.dumps(compiled.build_criterion(scores).model_dump()))
+    assert orjson.loads(rendered) == json.loads(json.dumps(expected))
+    assert orjson.loads(rendered)["score"] is None
+    assert orjson.loads(rendered)["children"][0][1]["score"] is None
+
+def test_zero_weights_are_kept(compiled):
+    tree = orjson.loads(get_tree_template(compiled, parse_fields("name")).render(
+        np.zeros(len(compiled))
+    ))
+    assert [weight for weight, _ in tree["children"]] == [0.0, 1.5]
+    assert [weight for weight, _ in tree["children"][1][1]["children"]] == [1.0, 0.0]
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(HTTPException) as excinfo:
+        parse_fields("name,weight")
+    assert excinfo.value.status_code == 400
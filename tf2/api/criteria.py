@@ -1,16 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Any, Dict
-from tf2.db.schemas import Criterion
-from tf2.components.criteria_manager import CriteriaManager
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Any, Dict, Optional, Union
+from tf2.db.schemas import Criterion, CriterionSummary
+from tf2.components.criteria_manager import CriteriaManager, get_default_criteria_manager
 
 router = APIRouter(
     prefix="/criteria",
     tags=["criteria"]
 )
 
-# 依赖注入函数
+# 依赖注入函数：整个进程共享同一个标准管理器
 async def get_criteria_manager():
-    return CriteriaManager()
+    return get_default_criteria_manager()
 
 @router.post("/", response_model=Criterion)
 async def create_criteria(
@@ -28,14 +28,32 @@ async def get_criteria(
     """获取单个评估标准"""
     return await manager.get_criteria(name)
 
-@router.get("/", response_model=List[Criterion])
+@router.get("/", response_model=Union[List[Criterion], List[CriterionSummary]])
 async def list_criteria(
+    response: Response,
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    summary: bool = False,
     manager: CriteriaManager = Depends(get_criteria_manager)
 ):
-    """列出所有评估标准"""
-    return await manager.list_criteria(skip=skip, limit=limit)
+    """
+    按名称顺序列出评估标准
+    下一页的游标通过 X-Next-Cursor 响应头返回；传入 cursor 时忽略 skip。
+    summary=true 时只返回名称和元数据。
+    """
+    if cursor is None and skip:
+        criteria = await manager.list_criteria(skip=skip, limit=limit)
+        if summary:
+            return [CriterionSummary.from_criterion(c) for c in criteria]
+        return criteria
+
+    page, next_cursor = await manager.list_criteria_page(
+        limit=limit, cursor=cursor, summary=summary
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return page
 
 @router.put("/{name}", response_model=Criterion)
 async def update_criteria(
@@ -65,10 +83,11 @@ async def get_criteria_tree(
 @router.post("/search", response_model=List[Criterion])
 async def search_criteria(
     metadata_query: dict[str, Any],
+    nested: bool = False,
     manager: CriteriaManager = Depends(get_criteria_manager)
 ):
-    """通过元数据搜索评估标准"""
-    return await manager.search_criteria_by_metadata(metadata_query)
+    """通过元数据搜索评估标准，nested=true 时同时匹配子标准的元数据"""
+    return await manager.search_criteria_by_metadata(metadata_query, nested=nested)
 
 @router.post("/json", response_model=Criterion)
 async def create_criteria_from_json(
@@ -89,7 +108,7 @@ async def create_criteria_from_file(
 ):
     """从 JSON 文件创建评估标准"""
     try:
-        return await manager.load_criteria_from_json(file_path)
+        return manager.load_criteria_from_json(file_path)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -119,6 +138,6 @@ async def update_criteria_from_json(
 async def list_criteria_as_json(
     manager: CriteriaManager = Depends(get_criteria_manager)
 ):
-    """列出所有评估标准的 JSON 表示"""
+    """按名称顺序列出所有评估标准的 JSON 表示"""
     criteria = await manager.list_all_criteria()
     return [c.to_json() for c in criteria]
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Dict, List
+from tf2.components.job_manager import JobManager, get_default_job_manager
+from tf2.components.resume_manager import ResumeManager, get_default_resume_manager
+from tf2.components.criteria_manager import CriteriaManager, get_default_criteria_manager
+from tf2.components.blocking_executor import run_blocking
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"]
+)
+
+# 依赖注入函数
+async def get_job_manager():
+    return get_default_job_manager()
+
+async def get_resume_manager():
+    return get_default_resume_manager()
+
+async def get_criteria_manager():
+    return get_default_criteria_manager()
+
+@router.post("/batch/{criteria_name}")
+async def submit_batch_job(
+    criteria_name: str,
+    job_manager: JobManager = Depends(get_job_manager),
+    resume_manager: ResumeManager = Depends(get_resume_manager),
+    criteria_manager: CriteriaManager = Depends(get_criteria_manager)
+) -> Dict[str, Any]:
+    """
+    提交后台批量评分任务，立即返回任务 ID
+    
+    Args:
+        criteria_name: 评估标准名称
+    """
+    criterion = await criteria_manager.get_criteria(criteria_name)
+    if not resume_manager.base_folder:
+        raise HTTPException(
+            status_code=400,
+            detail="Base folder not set"
+        )
+    return await run_blocking(
+        "jobs.write", job_manager.submit, criterion, resume_manager.base_folder
+    )
+
+@router.get("/")
+async def list_jobs(
+    skip: int = 0,
+    limit: int = 20,
+    job_manager: JobManager = Depends(get_job_manager)
+) -> List[Dict[str, Any]]:
+    """列出最近的任务"""
+    return await run_blocking("jobs.read", job_manager.list_jobs, skip=skip, limit=limit)
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    job_manager: JobManager = Depends(get_job_manager)
+) -> Dict[str, Any]:
+    """获取任务状态与进度"""
+    return await run_blocking("jobs.read", job_manager.get_job, job_id)
+
+@router.get("/{job_id}/results")
+async def get_job_results(
+    job_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    include_tree: bool = False,
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """获取任务结果，任务运行中时返回已完成的部分"""
+    return await run_blocking(
+        "jobs.read",
+        job_manager.get_results,
+        job_id,
+        skip=skip,
+        limit=limit,
+        include_tree=include_tree
+    )
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(
+    job_id: str,
+    job_manager: JobManager = Depends(get_job_manager)
+) -> Dict[str, Any]:
+    """取消任务，已完成的结果会保留"""
+    return await run_blocking("jobs.write", job_manager.cancel, job_id)
+
+"""
+# 提交后台批量评分任务
+curl -X POST "http://localhost:8000/jobs/batch/數據科學家評估標準"
+
+# 查询进度
+curl "http://localhost:8000/jobs/<job_id>"
+
+# 获取（部分）结果
+curl "http://localhost:8000/jobs/<job_id>/results?skip=0&limit=100"
+
+# 取消任务
+curl -X POST "http://localhost:8000/jobs/<job_id>/cancel"
+"""
@@ -1,41 +1,161 @@
 # tf2/api/resumes.py
-from fastapi import APIRouter, Depends
-from typing import List, Dict
-from langchain.schema import Document
-from tf2.components.resume_manager import ResumeManager
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Iterator, List, Dict, Optional, Tuple
+import asyncio
+import json
+from tf2.components.page import Page
+from tf2.components.resume_manager import ResumeManager, get_default_resume_manager
+from tf2.components.resume_watcher import ResumeWatcher, get_default_resume_watcher
+from tf2.components.resume_upload import ResumeUpload
+from tf2.components.blocking_executor import (
+    get_blocking_executor,
+    get_limiter,
+    run_blocking,
+    stream_blocking
+)
 
 router = APIRouter(
     prefix="/resumes",
     tags=["resumes"]
 )
 
-# 依赖注入函数
+# 依赖注入函数：整个进程共享同一个简历管理器
 async def get_resume_manager():
-    return ResumeManager()  # 实际使用时可能需要配置基础路径
+    return get_default_resume_manager()
+
+async def get_resume_watcher():
+    return get_default_resume_watcher()
 
 @router.post("/folder")
 async def set_resume_folder(
     folder_path: str,
-    manager: ResumeManager = Depends(get_resume_manager)
+    manager: ResumeManager = Depends(get_resume_manager),
+    watcher: ResumeWatcher = Depends(get_resume_watcher)
 ):
-    """设置简历文件夹路径"""
-    manager.set_base_folder(folder_path)
+    """设置简历文件夹路径，正在运行的监视器改为监视新文件夹"""
+    def change_folder() -> None:
+        # 检查文件夹并打开（必要时创建）索引数据库；重启监视器会等待旧的监视线程退出
+        manager.set_base_folder(folder_path)
+        watcher.follow_folder()
+    
+    await run_blocking("resumes.folder", change_folder)
     return {"status": "success", "folder": folder_path}
 
+@router.post("/upload")
+async def upload_resumes(
+    request: Request,
+    max_file_size: int = Query(20 * 1024 * 1024, ge=1),
+    manager: ResumeManager = Depends(get_resume_manager)
+):
+    """
+    上传简历（multipart/form-data，可以包含多个文件）
+    请求体按块流式写入简历文件夹，不会整个读入内存；边写边计算哈希并检查 PDF 文件头，
+    与文件夹中已有简历内容相同的文件不会被保存，也不会再次提取文本
+    
+    Args:
+        max_file_size: 单个文件的最大字节数，超过的文件被拒绝
+    """
+    upload = ResumeUpload(manager, request.headers.get("content-type", ""), max_file_size)
+    loop = asyncio.get_running_loop()
+    executor = get_blocking_executor()
+    async with get_limiter("resumes.upload").slot():
+        try:
+            async for chunk in request.stream():
+                await loop.run_in_executor(executor, upload.feed, chunk)
+            results = await loop.run_in_executor(executor, upload.finish)
+        except BaseException:
+            upload.abort()
+            raise
+    return {
+        "stored": sum(result["status"] == "stored" for result in results),
+        "duplicates": sum(result["status"] == "duplicate" for result in results),
+        "rejected": sum(result["status"] == "rejected" for result in results),
+        "files": results
+    }
+
 @router.get("/metadata")
 async def get_resumes_metadata(
     manager: ResumeManager = Depends(get_resume_manager)
 ):
     """获取所有简历的元数据"""
-    return manager.get_resume_metadata()
+    return await run_blocking("resumes.metadata", manager.get_resume_metadata)
+
+@router.post("/index/rescan")
+async def rescan_resume_index(
+    manager: ResumeManager = Depends(get_resume_manager)
+):
+    """立即增量扫描简历文件夹索引"""
+    if manager.index is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Resume index not enabled or base folder not set"
+        )
+    return await run_blocking("resumes.rescan", manager.index.rescan)
+
+@router.post("/watcher/start")
+async def start_resume_watcher(
+    max_workers: int = 2,
+    poll_interval: float = 2.0,
+    warm_start: bool = False,
+    watcher: ResumeWatcher = Depends(get_resume_watcher)
+):
+    """启动文件夹监视器，在后台预先提取新增或修改的简历"""
+    def restart() -> None:
+        # 停止时等待监视线程和进程池退出，启动时创建进程池，都会阻塞
+        watcher.stop()
+        watcher.max_workers = max_workers
+        watcher.poll_interval = poll_interval
+        watcher.warm_start = warm_start
+        watcher.start()
+    
+    try:
+        await run_blocking("resumes.watcher", restart)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return watcher.status()
+
+@router.post("/watcher/stop")
+async def stop_resume_watcher(
+    watcher: ResumeWatcher = Depends(get_resume_watcher)
+):
+    """停止文件夹监视器"""
+    await run_blocking("resumes.watcher", watcher.stop)
+    return watcher.status()
+
+@router.get("/watcher/status")
+async def get_resume_watcher_status(
+    watcher: ResumeWatcher = Depends(get_resume_watcher)
+):
+    """获取文件夹监视器状态"""
+    return watcher.status()
+
+@router.get("/cache/stats")
+async def get_extraction_cache_stats(
+    manager: ResumeManager = Depends(get_resume_manager)
+):
+    """获取简历文本提取缓存的命中统计"""
+    if manager.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **manager.cache.stats()}
 
 @router.get("/{filename}")
 async def get_resume(
     filename: str,
+    max_pages: Optional[int] = Query(None, ge=1),
+    max_chars: Optional[int] = Query(None, ge=1),
     manager: ResumeManager = Depends(get_resume_manager)
 ):
-    """获取单个简历的内容"""
-    documents = manager.read_resume(filename)
+    """
+    获取单个简历的内容
+    
+    Args:
+        filename: 简历文件名
+        max_pages: 最多读取的页数，默认使用管理器的设置
+        max_chars: 最多读取的字符数，默认使用管理器的设置
+    """
+    documents = await run_blocking(
+        "resumes.read", manager.read_resume, filename, max_pages, max_chars
+    )
     return {
         "filename": filename,
         "pages": len(documents),
@@ -43,31 +163,63 @@ async def get_resume(
         "metadata": [doc.metadata for doc in documents]
     }
 
-@router.get("/")
-async def read_all_resumes(
-    manager: ResumeManager = Depends(get_resume_manager)
-):
-    """读取所有简历"""
-    resumes = manager.read_all_resumes()
-    return {
-        filename: {
+def _resumes_json(resumes: Iterator[Tuple[str, List[Page]]]) -> Iterator[str]:
+    """逐份输出 {文件名: 内容} 形式的 JSON 对象，同一时间只保留一份简历的页面"""
+    yield "{"
+    for i, (filename, docs) in enumerate(resumes):
+        entry = {
             "pages": len(docs),
             "content": [doc.page_content for doc in docs],
             "metadata": [doc.metadata for doc in docs]
         }
-        for filename, docs in resumes.items()
-    }
+        yield (
+            ("," if i else "")
+            + json.dumps(filename, ensure_ascii=False)
+            + ":"
+            + json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        )
+    yield "}"
+
+@router.get("/")
+async def read_all_resumes(
+    max_pages: Optional[int] = Query(None, ge=1),
+    max_chars: Optional[int] = Query(None, ge=1),
+    manager: ResumeManager = Depends(get_resume_manager)
+):
+    """
+    读取所有简历
+    响应以流的形式逐份输出，不会把整个文件夹的文本同时放在内存中
     
+    Args:
+        max_pages: 每份简历最多读取的页数，默认使用管理器的设置
+        max_chars: 每份简历最多读取的字符数，默认使用管理器的设置
+    """
+    # 在线程池中列出文件（文件夹未设置时在开始输出前返回 400），之后逐份读取
+    resumes = await run_blocking("resumes.list", manager.iter_resumes, max_pages, max_chars)
+    return await stream_blocking("resumes.list", _resumes_json(resumes), media_type="application/json")
+
 
 """
 curl -X POST "http://localhost:8000/resumes/folder" -d '"path/to/resumes"'
 
+# 上传简历（可以一次上传多个），内容重复的文件返回已有的文件名
+curl -F "files=@a.pdf" -F "files=@b.pdf" "http://localhost:8000/resumes/upload"
+
 # 获取所有简历元数据
 curl "http://localhost:8000/resumes/metadata"
 
 # 读取特定简历
 curl "http://localhost:8000/resumes/example.pdf"
 
-# 读取所有简历
-curl "http://localhost:8000/resumes/"
+# 读取所有简历（流式输出），每份最多读取 5 页
+curl "http://localhost:8000/resumes/?max_pages=5"
+
+# 立即重新扫描文件夹索引
+curl -X POST "http://localhost:8000/resumes/index/rescan"
+
+# 启动文件夹监视器，后台预先提取新放入的简历
+curl -X POST "http://localhost:8000/resumes/watcher/start?max_workers=4"
+
+# 查看提取缓存命中率
+curl "http://localhost:8000/resumes/cache/stats"
 """
\ No newline at end of file
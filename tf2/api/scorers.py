@@ -1,10 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, List
-from langchain.schema import Document
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Set, Tuple
+import heapq
+import numpy as np
+from tf2.components.page import Page
 from tf2.db.schemas import Criterion
+from tf2.components.compiled_criterion import BatchScores, CompiledCriterion
 from tf2.components.resume_scorer import ResumeScorer
-from tf2.components.resume_manager import ResumeManager
-from tf2.components.criteria_manager import CriteriaManager
+from tf2.components.resume_manager import ResumeManager, get_default_resume_manager
+from tf2.components.criteria_manager import CriteriaManager, get_default_criteria_manager
+from tf2.components.result_store import ResultStore, StoredResult, get_default_result_store
+from tf2.components.leaf_cache import get_default_leaf_cache
+from tf2.components.blocking_executor import run_blocking, stream_blocking
+from tf2.components.tree_json import TreeTemplate, dumps, get_tree_template, json_response, parse_fields
 
 router = APIRouter(
     prefix="/scorers",
@@ -13,79 +21,495 @@ router = APIRouter(
 
 # 依赖注入函数
 async def get_scorer():
-    return ResumeScorer(seed=42)  # 使用固定种子以保持结果一致性
+    # 使用固定种子以保持结果一致性；叶子评估结果在所有请求间共享
+    return ResumeScorer(seed=42, cache=get_default_leaf_cache())
 
 async def get_resume_manager():
-    return ResumeManager()
+    return get_default_resume_manager()
 
 async def get_criteria_manager():
-    return CriteriaManager()
+    return get_default_criteria_manager()
 
-@router.post("/{criteria_name}/{resume_filename}")
-async def score_single_resume(
+async def get_result_store():
+    return get_default_result_store()
+
+def _score_paths(
+    compiled: CompiledCriterion,
+    paths: List[Path],
+    scorer: ResumeScorer,
+    resume_manager: ResumeManager,
+    store: ResultStore
+) -> Tuple[BatchScores, Set[str]]:
+    """
+    为一组简历评分，已保存过的 (简历, 标准版本, 评分器) 直接使用保存的分数
+    
+    Returns:
+        分数矩阵，以及读取失败的文件名集合（失败的结果不会被保存）
+    """
+    hashes = {path: resume_manager.content_hash(str(path)) for path in paths}
+    stored = store.get_many(
+        [h for h in hashes.values() if h is not None],
+        compiled.content_hash,
+        scorer.scorer_id
+    )
+    
+    # 只读取和评分未命中的简历
+    misses = [path for path in paths if hashes[path] not in stored]
+    documents_batch = resume_manager.read_resumes(misses) if misses else {}
+    fresh = scorer.score_resume_matrix(compiled, documents_batch)
+    failed = {
+        filename for filename, documents in documents_batch.items()
+        if any(doc.metadata.get("error") for doc in documents)
+    }
+    
+    scores = np.empty((len(paths), len(compiled)))
+    new_results = []
+    fresh_rows = {filename: row for row, filename in enumerate(fresh.resume_ids)}
+    for row, path in enumerate(paths):
+        content_hash = hashes[path]
+        if content_hash in stored:
+            scores[row] = stored[content_hash].scores
+            continue
+        scores[row] = fresh.scores[fresh_rows[path.name]]
+        if content_hash is not None and path.name not in failed:
+            new_results.append(StoredResult(
+                resume_hash=content_hash,
+                resume_name=path.name,
+                overall_score=fresh.overall_score(path.name),
+                scores=scores[row]
+            ))
+    
+    if new_results:
+        store.put_many(compiled.root.name, compiled.content_hash, scorer.scorer_id, new_results)
+    return BatchScores(compiled, [path.name for path in paths], scores), failed
+
+# 排名时每次评分的简历数
+_RANK_BATCH_SIZE = 64
+
+def _push_top_k(
+    heap: List[tuple],
+    k: int,
+    values: np.ndarray,
+    rows: List[tuple],
+    seq: int
+) -> int:
+    """
+    把一批 (分数, 行) 放入大小为 k 的最小堆，分数缺失的行被跳过
+    同分时保留先出现的行
+    Returns:
+        下一批的起始序号
+    """
+    for value, row in zip(values, rows):
+        if not np.isnan(value):
+            item = (float(value), -seq, row)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+        seq += 1
+    return seq
+
+def _rerank_stored(
+    criteria_name: str,
+    weights: Dict[str, float],
+    compiled: CompiledCriterion,
+    reweighted: CompiledCriterion,
+    store: ResultStore,
+    scorer_id: str,
+    include_nodes: bool,
+    limit: Optional[int]
+) -> Dict:
+    """按新权重重新聚合已保存的结果并排名"""
+    # 已保存的是按前序排列的直接分数，权重变化不影响节点顺序
+    stored = store.results_for(compiled.content_hash, scorer_id)
+    scores = np.empty((len(stored), len(compiled)))
+    for row, result in enumerate(stored):
+        scores[row] = result.scores
+    batch = BatchScores(reweighted, [result.resume_hash for result in stored], scores)
+    
+    overall = batch.overall_scores()
+    # 缺失总分的简历排在最后，同分时保持按文件名的顺序
+    order = np.argsort(-np.where(np.isnan(overall), -np.inf, overall), kind="stable")
+    if limit is not None:
+        order = order[:limit]
+    
+    ranking = []
+    for rank, row in enumerate(order, start=1):
+        entry = {
+            "rank": rank,
+            "resume": stored[row].resume_name,
+            "resume_hash": stored[row].resume_hash,
+            "overall_score": None if np.isnan(overall[row]) else float(overall[row]),
+            "previous_overall_score": stored[row].overall_score
+        }
+        if include_nodes:
+            entry["node_scores"] = {
+                name: None if np.isnan(value) else float(value)
+                for name, value in zip(reweighted.names, batch.aggregated[row])
+            }
+        ranking.append(entry)
+    
+    return {
+        "criteria": criteria_name,
+        "weights": weights,
+        "count": len(stored),
+        "ranking": ranking
+    }
+
+def _top_k(
+    criteria_name: str,
+    compiled: CompiledCriterion,
+    k: int,
+    column: int,
+    by: Optional[str],
+    source: str,
+    template: Optional[TreeTemplate],
+    scorer: ResumeScorer,
+    resume_manager: ResumeManager,
+    store: ResultStore
+) -> Dict:
+    """用大小为 k 的堆找出 column 列聚合分数最高的简历，template 为 None 时不返回评分树"""
+    # 堆中的行为 (简历名称, 前序节点分数, 聚合分数)；内存占用只与 k 有关
+    # 排名分数与总分取自同一次聚合，按根节点排名时两者完全相同
+    heap: List[tuple] = []
+    seq = 0
+    if source == "stored":
+        for results in store.iter_results(compiled.content_hash, scorer.scorer_id):
+            scores = np.vstack([result.scores for result in results])
+            aggregated = compiled.aggregate(scores)
+            values = aggregated[:, column]
+            rows = [
+                (result.resume_name, result.scores, row_aggregated)
+                for result, row_aggregated in zip(results, aggregated)
+            ]
+            seq = _push_top_k(heap, k, values, rows, seq)
+    else:
+        paths = resume_manager.list_resume_paths()
+        for start in range(0, len(paths), _RANK_BATCH_SIZE):
+            batch, _ = _score_paths(
+                compiled,
+                paths[start:start + _RANK_BATCH_SIZE],
+                scorer,
+                resume_manager,
+                store
+            )
+            values = batch.aggregated[:, column]
+            rows = list(zip(batch.resume_ids, batch.scores, batch.aggregated))
+            seq = _push_top_k(heap, k, values, rows, seq)
+    
+    results = []
+    for rank, (value, _, (resume, scores, aggregated)) in enumerate(
+        sorted(heap, reverse=True), start=1
+    ):
+        overall_score = aggregated[0]
+        entry = {
+            "rank": rank,
+            "resume": resume,
+            "score": value,
+            "overall_score": None if np.isnan(overall_score) else float(overall_score)
+        }
+        if template is not None:
+            entry["scored_criterion"] = template.fragment(scores)
+        results.append(entry)
+    
+    return {
+        "criteria": criteria_name,
+        "by": by or criteria_name,
+        "source": source,
+        "count": seq,
+        "results": results
+    }
+
+def _score_single(
     criteria_name: str,
     resume_filename: str,
+    compiled: CompiledCriterion,
+    scorer: ResumeScorer,
+    resume_manager: ResumeManager,
+    store: ResultStore
+) -> Tuple[np.ndarray, Optional[float]]:
+    """
+    对单份简历评分，已保存的评分结果直接返回
+    Returns:
+        (按前序排列的节点分数, 总分)
+    """
+    resume_hash = resume_manager.content_hash(resume_filename)
+    stored = None
+    if resume_hash is not None:
+        stored = store.get(resume_hash, compiled.content_hash, scorer.scorer_id)
+
+    if stored is not None:
+        scores = stored.scores
+        overall_score = stored.overall_score
+    else:
+        # 读取简历文档并评分
+        documents = resume_manager.read_resume(resume_filename)
+        batch = scorer.score_resume_matrix(compiled, {resume_filename: documents})
+        scores = batch.scores[0]
+        overall_score = batch.overall_score(resume_filename)
+        if resume_hash is not None:
+            store.put(
+                criteria_name,
+                compiled.content_hash,
+                scorer.scorer_id,
+                StoredResult(
+                    resume_hash=resume_hash,
+                    resume_name=Path(resume_filename).name,
+                    overall_score=overall_score,
+                    scores=scores
+                )
+            )
+
+    return scores, overall_score
+
+@router.post("/batch/{criteria_name}")
+async def score_resume_batch(
+    criteria_name: str,
+    include_tree: bool = True,
+    fields: Optional[str] = None,
     scorer: ResumeScorer = Depends(get_scorer),
     resume_manager: ResumeManager = Depends(get_resume_manager),
-    criteria_manager: CriteriaManager = Depends(get_criteria_manager)
+    criteria_manager: CriteriaManager = Depends(get_criteria_manager),
+    store: ResultStore = Depends(get_result_store)
 ):
     """
-    对单份简历进行评分
+    批量评分处理，已保存的评分结果不会重复计算
     
     Args:
         criteria_name: 评估标准名称
-        resume_filename: 简历文件名
+        include_tree: 是否返回每份简历的评分树；为 False 时只返回总分
+        fields: 评分树每个节点包含的字段（逗号分隔，例如 name,score），默认全部字段
     """
     try:
-        # 获取评估标准
-        criterion = await criteria_manager.get_criteria(criteria_name)
+        # 获取编译后的评估标准
+        compiled = await criteria_manager.get_compiled_criteria(criteria_name)
+        # 评分树的静态部分按标准版本缓存，每份简历只填入分数
+        template = get_tree_template(compiled, parse_fields(fields)) if include_tree else None
         
-        # 读取简历文档
-        documents = resume_manager.read_resume(resume_filename)
-        
-        # 评分
-        scored_criterion = scorer.score_resume(criterion, documents)
+        def score_all() -> Dict[str, Dict]:
+            # 批量评分，分数保存在一个矩阵中；只读取没有保存结果的简历
+            batch, _ = _score_paths(
+                compiled,
+                resume_manager.list_resume_paths(),
+                scorer,
+                resume_manager,
+                store
+            )
+            
+            # 格式化返回结果，评分树只在需要时生成
+            results = {}
+            for row, (filename, overall_score) in enumerate(batch.items()):
+                entry = {}
+                if template is not None:
+                    entry["scored_criterion"] = template.fragment(batch.scores[row])
+                entry["overall_score"] = overall_score
+                results[filename] = entry
+            return results
         
-        return {
-            "resume": resume_filename,
-            "criteria": criteria_name,
-            "scored_criterion": scored_criterion,
-            "overall_score": scored_criterion.calculate_overall_score()
-        }
+        # PDF 解析和评分在专用线程池中执行，不阻塞事件循环
+        return json_response(await run_blocking("scorers.batch", score_all))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/batch/{criteria_name}")
-async def score_resume_batch(
+@router.post("/batch/{criteria_name}/stream")
+async def stream_resume_batch(
     criteria_name: str,
+    include_tree: bool = True,
+    fields: Optional[str] = None,
     scorer: ResumeScorer = Depends(get_scorer),
     resume_manager: ResumeManager = Depends(get_resume_manager),
-    criteria_manager: CriteriaManager = Depends(get_criteria_manager)
+    criteria_manager: CriteriaManager = Depends(get_criteria_manager),
+    store: ResultStore = Depends(get_result_store)
 ):
     """
-    批量评分处理
+    流式批量评分，以 NDJSON 格式每评完一份简历输出一行，最后输出一行汇总
     
     Args:
         criteria_name: 评估标准名称
+        include_tree: 每行是否包含评分树
+        fields: 评分树每个节点包含的字段（逗号分隔，例如 name,score），默认全部字段
     """
-    try:
-        # 获取评估标准
-        criterion = await criteria_manager.get_criteria(criteria_name)
-        
-        # 读取所有简历
-        documents_batch = resume_manager.read_all_resumes()
-        
-        # 批量评分
-        results = scorer.score_resume_batch(criterion, documents_batch)
+    # 在开始输出前完成所有可能失败的检查，以便返回正常的错误状态码
+    compiled = await criteria_manager.get_compiled_criteria(criteria_name)
+    template = get_tree_template(compiled, parse_fields(fields)) if include_tree else None
+    paths = await run_blocking("scorers.stream", resume_manager.list_resume_paths)
+    
+    def generate():
+        count = 0
+        errors = 0
+        scored_sum = 0.0
+        scored_count = 0
+        for path in paths:
+            filename = path.name
+            batch, failed = _score_paths(compiled, [path], scorer, resume_manager, store)
+            overall_score = batch.overall_score(filename)
+            has_error = filename in failed
+            
+            line = {"type": "result", "resume": filename, "error": has_error}
+            if template is not None:
+                line["scored_criterion"] = template.fragment(batch.scores[0])
+            line["overall_score"] = overall_score
+            yield dumps(line) + b"\n"
+            
+            count += 1
+            errors += has_error
+            if overall_score is not None:
+                scored_sum += overall_score
+                scored_count += 1
         
-        # ���式化返回结果
-        return {
-            filename: {
-                "scored_criterion": scored,
-                "overall_score": scored.calculate_overall_score()
-            }
-            for filename, scored in results.items()
-        }
+        yield dumps({
+            "type": "summary",
+            "criteria": criteria_name,
+            "count": count,
+            "errors": errors,
+            "mean_overall_score": scored_sum / scored_count if scored_count else None
+        }) + b"\n"
+    
+    # 每一行都在专用线程池中生成；占用一个名额直到输出结束，饱和时直接返回 503
+    return await stream_blocking("scorers.stream", generate(), media_type="application/x-ndjson")
+
+@router.get("/leaf-cache/stats")
+async def get_leaf_cache_stats():
+    """叶子评估缓存的命中统计"""
+    return get_default_leaf_cache().stats()
+
+@router.post("/reweight/{criteria_name}")
+async def reweight_stored_results(
+    criteria_name: str,
+    weights: Dict[str, float],
+    include_nodes: bool = False,
+    limit: Optional[int] = None,
+    scorer: ResumeScorer = Depends(get_scorer),
+    criteria_manager: CriteriaManager = Depends(get_criteria_manager),
+    store: ResultStore = Depends(get_result_store)
+):
+    """
+    使用新的子标准权重重新计算已保存的评分结果并重新排名，不会重新评分任何叶子
+    
+    Args:
+        criteria_name: 评估标准名称
+        weights: 节点名称到新权重的映射，例如 {"基礎技術能力": 0.5}
+        include_nodes: 是否返回每个节点按新权重由子节点重新聚合的分数
+        limit: 只返回排名前 limit 的简历
+    """
+    compiled = await criteria_manager.get_compiled_criteria(criteria_name)
+    try:
+        reweighted = compiled.with_weights(weights)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Criterion {e.args[0]} not found in {criteria_name}"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await run_blocking(
+        "scorers.reweight",
+        _rerank_stored,
+        criteria_name,
+        weights,
+        compiled,
+        reweighted,
+        store,
+        scorer.scorer_id,
+        include_nodes,
+        limit
+    )
+
+@router.post("/rank/{criteria_name}")
+async def rank_resumes(
+    criteria_name: str,
+    k: int = 10,
+    by: Optional[str] = None,
+    source: Literal["live", "stored"] = "live",
+    include_tree: bool = True,
+    fields: Optional[str] = None,
+    scorer: ResumeScorer = Depends(get_scorer),
+    resume_manager: ResumeManager = Depends(get_resume_manager),
+    criteria_manager: CriteriaManager = Depends(get_criteria_manager),
+    store: ResultStore = Depends(get_result_store)
+):
+    """
+    返回分数最高的 k 份简历，只为这 k 份构建评分树
+    
+    Args:
+        criteria_name: 评估标准名称
+        k: 返回的简历数
+        by: 按哪个子标准的聚合分数排名，默认按总分
+        source: live 为对当前文件夹评分（已保存的结果会被复用），stored 为只使用已保存的结果
+        include_tree: 是否返回每份简历的评分树
+        fields: 评分树每个节点包含的字段（逗号分隔，例如 name,score），默认全部字段
+    """
+    if k < 1:
+        raise HTTPException(status_code=400, detail="k must be at least 1")
+    compiled = await criteria_manager.get_compiled_criteria(criteria_name)
+    try:
+        column = compiled.index_of(by) if by is not None else 0
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Criterion {by} not found in {criteria_name}"
+        )
+    
+    template = get_tree_template(compiled, parse_fields(fields)) if include_tree else None
+    
+    return json_response(await run_blocking(
+        "scorers.rank",
+        _top_k,
+        criteria_name,
+        compiled,
+        k,
+        column,
+        by,
+        source,
+        template,
+        scorer,
+        resume_manager,
+        store
+    ))
+
+@router.post("/{criteria_name}/{resume_filename}")
+async def score_single_resume(
+    criteria_name: str,
+    resume_filename: str,
+    fields: Optional[str] = None,
+    scorer: ResumeScorer = Depends(get_scorer),
+    resume_manager: ResumeManager = Depends(get_resume_manager),
+    criteria_manager: CriteriaManager = Depends(get_criteria_manager),
+    store: ResultStore = Depends(get_result_store)
+):
+    """
+    对单份简历进行评分，已保存的评分结果直接返回
+    
+    Args:
+        criteria_name: 评估标准名称
+        resume_filename: 简历文件名
+        fields: 评分树每个节点包含的字段（逗号分隔，例如 name,score），默认全部字段
+    """
+    try:
+        # 获取编译后的评估标准
+        compiled = await criteria_manager.get_compiled_criteria(criteria_name)
+        template = get_tree_template(compiled, parse_fields(fields))
+        scores, overall_score = await run_blocking(
+            "scorers.single",
+            _score_single,
+            criteria_name,
+            resume_filename,
+            compiled,
+            scorer,
+            resume_manager,
+            store
+        )
+        return json_response({
+            "resume": resume_filename,
+            "criteria": criteria_name,
+            "scored_criterion": template.fragment(scores),
+            "overall_score": overall_score
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -95,26 +519,31 @@ async def get_scoring_details(
     resume_filename: str,
     scorer: ResumeScorer = Depends(get_scorer),
     resume_manager: ResumeManager = Depends(get_resume_manager),
-    criteria_manager: CriteriaManager = Depends(get_criteria_manager)
+    criteria_manager: CriteriaManager = Depends(get_criteria_manager),
+    store: ResultStore = Depends(get_result_store)
 ):
     """
-    获取详细的评分结果
+    获取详细的评分结果（优先使用已保存的评分结果）
     
     Args:
         criteria_name: 评估标准名称
         resume_filename: 简历文件名
     """
     try:
-        result = await score_single_resume(
+        compiled = await criteria_manager.get_compiled_criteria(criteria_name)
+        scores, overall_score = await run_blocking(
+            "scorers.single",
+            _score_single,
             criteria_name,
             resume_filename,
+            compiled,
             scorer,
             resume_manager,
-            criteria_manager
+            store
         )
         
         # 添加更多详细信息
-        scored_criterion = result["scored_criterion"]
+        scored_criterion = compiled.build_criterion(scores)
         
         def extract_scores(criterion: Criterion) -> Dict:
             return {
@@ -133,8 +562,10 @@ async def get_scoring_details(
         return {
             "resume": resume_filename,
             "criteria": criteria_name,
-            "overall_score": result["overall_score"],
+            "overall_score": overall_score,
             "detailed_scores": extract_scores(scored_criterion)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,356 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+import asyncio
+import hashlib
+import random
+import time
+import weakref
+import numpy as np
+from tf2.components.page import Page
+from tf2.db.schemas import Criterion
+from tf2.components.compiled_criterion import BatchScores, CompiledCriterion
+from tf2.components.leaf_cache import LeafScoreCache, leaf_hash, text_hash
+from tf2.components.chunk_retriever import ChunkRetriever
+from tf2.components.blocking_executor import get_blocking_executor
+
+@dataclass(frozen=True)
+class LeafRequest:
+    """一次叶子标准评估请求：标准本身以及提供给模型的简历上下文"""
+    criterion: Criterion
+    context: str
+
+class LeafEvaluator(Protocol):
+    """
+    叶子标准评估器协议（例如调用语言模型的客户端）
+
+    一次调用评估同一份简历的多个叶子标准，返回与 requests 等长的分数列表，
+    无法评估的叶子返回 None。
+    """
+
+    evaluator_id: str
+
+    async def evaluate(
+        self,
+        resume_id: str,
+        requests: Sequence[LeafRequest]
+    ) -> List[Optional[float]]:
+        ...
+
+class AsyncResumeScorer:
+    """
+    异步评分器
+
+    每份简历的叶子标准按 leaves_per_call 分组，一组一次调用；多份简历并发评分。
+    所有调用共享一个全局并发上限，每次调用有超时，失败后按指数退避重试，
+    重试耗尽的叶子分数记为缺失（NaN）。只为叶子评分，中间节点由 CompiledCriterion 聚合。
+    """
+
+    def __init__(
+        self,
+        evaluator: LeafEvaluator,
+        max_concurrency: int = 8,
+        leaves_per_call: int = 8,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        max_context_chars: int = 8000,
+        retry_on: Tuple[type, ...] = (asyncio.TimeoutError, OSError),
+        cache: Optional[LeafScoreCache] = None,
+        retriever: Optional[ChunkRetriever] = None
+    ):
+        """
+        初始化异步评分器
+        Args:
+            evaluator: 叶子标准评估器
+            max_concurrency: 同时进行的评估调用上限（所有简历共享）
+            leaves_per_call: 每次调用评估的叶子数
+            timeout: 单次调用超时（秒）
+            max_retries: 失败后的最大重试次数
+            backoff_base: 第一次重试前的等待时间（秒），之后每次翻倍
+            backoff_max: 单次等待时间上限（秒）
+            max_context_chars: 提供给评估器的简历文本最大长度
+            retry_on: 需要重试的异常类型，其他异常直接抛出
+            cache: 可选的叶子评估缓存，命中的叶子不会发送给评估器
+            retriever: 可选的片段检索器，每个叶子只看到与其内容最相关的片段；
+                为 None 时所有叶子共用截断后的全文
+        """
+        self.evaluator = evaluator
+        self.max_concurrency = max_concurrency
+        self.leaves_per_call = leaves_per_call
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_context_chars = max_context_chars
+        self.retry_on = retry_on
+        self.cache = cache
+        self.retriever = retriever
+        self._rng = random.Random()
+        # asyncio.Semaphore 只能在一个事件循环中使用，按循环分别创建
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._calls = 0
+        self._retries = 0
+        self._failed_calls = 0
+        self._leaf_evaluations = 0
+
+    @property
+    def scorer_id(self) -> str:
+        """评分器标识与版本，作为评分结果缓存键的一部分"""
+        scorer_id = f"async:{self.evaluator.evaluator_id}"
+        if self.retriever is not None:
+            # 上下文的构造方式不同，评估结果也不同
+            scorer_id += f":{self.retriever.retriever_id}"
+        return scorer_id
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def _contexts(
+        self,
+        compiled: CompiledCriterion,
+        documents: List[Page],
+        positions: List[int]
+    ) -> List[str]:
+        """
+        返回 leaf_index[position] 对应叶子的上下文，每个上下文截断到 max_context_chars
+        切分、建 BM25 索引和检索都是 CPU 密集的，在专用线程池中执行
+        """
+        if self.retriever is None:
+            text = "\n".join(doc.page_content for doc in documents)[:self.max_context_chars]
+            return [text] * len(positions)
+        queries = [compiled.contents[compiled.leaf_index[p]] for p in positions]
+        loop = asyncio.get_running_loop()
+        contexts = await loop.run_in_executor(
+            get_blocking_executor(), self.retriever.contexts, documents, queries
+        )
+        return [context[:self.max_context_chars] for context in contexts]
+
+    async def _evaluate_with_retry(
+        self,
+        resume_id: str,
+        requests: List[LeafRequest]
+    ) -> List[Optional[float]]:
+        """带并发上限、超时和退避重试的一次评估调用，重试耗尽时返回全 None"""
+        semaphore = self._semaphore()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    self._calls += 1
+                    scores = await asyncio.wait_for(
+                        self.evaluator.evaluate(resume_id, requests),
+                        timeout=self.timeout
+                    )
+            except self.retry_on:
+                if attempt == self.max_retries:
+                    break
+                self._retries += 1
+                # 在信号量之外等待，不占用并发名额
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(delay * (0.5 + self._rng.random()))
+                continue
+
+            if len(scores) != len(requests):
+                raise ValueError(
+                    f"Evaluator returned {len(scores)} scores for {len(requests)} criteria"
+                )
+            self._leaf_evaluations += len(requests)
+            return list(scores)
+
+        self._failed_calls += 1
+        return [None] * len(requests)
+
+    async def score_resume(
+        self,
+        compiled: CompiledCriterion,
+        resume_id: str,
+        documents: List[Page]
+    ) -> np.ndarray:
+        """
+        为单份简历的所有叶子评分
+        Returns:
+            按前序排列的节点分数，非叶子节点与评估失败的叶子为 NaN
+        """
+        leaf_scores: List[Optional[float]] = [None] * len(compiled.leaf_index)
+        keys: List[Optional[tuple]] = [None] * len(compiled.leaf_index)
+        pending = list(range(len(compiled.leaf_index)))
+        if self.cache is not None:
+            resume_text = text_hash(documents)
+            for position, i in enumerate(compiled.leaf_index):
+                keys[position] = (
+                    leaf_hash(compiled.contents[i], compiled.scales[i]),
+                    resume_text,
+                    self.scorer_id
+                )
+            # 读缓存是同步的 SQLite 查询，放到线程中执行
+            cached = await asyncio.to_thread(self.cache.get_many, keys)
+            pending = []
+            for position, key in enumerate(keys):
+                if key in cached:
+                    leaf_scores[position] = cached[key]
+                else:
+                    pending.append(position)
+        
+        if pending:
+            contexts = await self._contexts(compiled, documents, pending)
+            requests = []
+            for position, context in zip(pending, contexts):
+                i = compiled.leaf_index[position]
+                requests.append(LeafRequest(
+                    criterion=Criterion(
+                        name=compiled.names[i],
+                        content=compiled.contents[i],
+                        scale=compiled.scales[i],
+                        metadata=compiled.metadata[i]
+                    ),
+                    context=context
+                ))
+            step = self.leaves_per_call
+            chunks = [
+                (pending[start:start + step], requests[start:start + step])
+                for start in range(0, len(requests), step)
+            ]
+            results = await asyncio.gather(
+                *(self._evaluate_with_retry(resume_id, chunk) for _, chunk in chunks)
+            )
+            fresh = {}
+            for (positions, _), chunk_scores in zip(chunks, results):
+                for position, score in zip(positions, chunk_scores):
+                    leaf_scores[position] = score
+                    if self.cache is not None and score is not None:
+                        fresh[keys[position]] = float(score)
+            if fresh:
+                await asyncio.to_thread(self.cache.put_many, fresh)
+        
+        return compiled.node_scores_from_leaves(leaf_scores)
+
+    async def score_resume_matrix(
+        self,
+        compiled: CompiledCriterion,
+        documents_batch: Dict[str, List[Page]]
+    ) -> BatchScores:
+        """
+        并发地为一批简历评分，接口与 ResumeScorer.score_resume_matrix 相同
+        Args:
+            compiled: 编译后的评估标准
+            documents_batch: 简历文档批次，键为文件名
+        """
+        resume_ids = list(documents_batch)
+        rows = await asyncio.gather(
+            *(
+                self.score_resume(compiled, resume_id, documents_batch[resume_id])
+                for resume_id in resume_ids
+            )
+        )
+        scores = np.vstack(rows) if rows else np.empty((0, len(compiled)))
+        return BatchScores(compiled, resume_ids, scores)
+
+    def stats(self) -> Dict[str, Any]:
+        """调用统计"""
+        return {
+            "calls": self._calls,
+            "retries": self._retries,
+            "failed_calls": self._failed_calls,
+            "leaf_evaluations": self._leaf_evaluations,
+            "max_concurrency": self.max_concurrency,
+            "leaves_per_call": self.leaves_per_call
+        }
+
+class FakeModelEvaluator:
+    """
+    进程内模拟的模型评估器，用于离线测试吞吐量
+
+    每次调用等待 latency + 每个叶子 per_leaf_latency 秒（加上随机抖动），
+    按 failure_rate 随机抛出 ConnectionError；分数由提供给模型的上下文和标准内容确定性地生成，
+    与简历标识无关，和叶子缓存键（标准内容哈希、简历文本哈希）的含义一致。
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        per_leaf_latency: float = 0.02,
+        jitter: float = 0.05,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+        evaluator_id: str = "fake-model-v2"
+    ):
+        self.latency = latency
+        self.per_leaf_latency = per_leaf_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.evaluator_id = evaluator_id
+        self._rng = random.Random(seed)
+
+    async def evaluate(
+        self,
+        resume_id: str,
+        requests: Sequence[LeafRequest]
+    ) -> List[Optional[float]]:
+        await asyncio.sleep(
+            self.latency
+            + self.per_leaf_latency * len(requests)
+            + self._rng.uniform(0.0, self.jitter)
+        )
+        if self._rng.random() < self.failure_rate:
+            raise ConnectionError("Simulated model server failure")
+
+        scores = []
+        for request in requests:
+            digest = hashlib.sha256(
+                f"{request.context}\0"
+                f"{leaf_hash(request.criterion.content, request.criterion.scale)}".encode("utf-8")
+            ).digest()
+            scores.append(round(int.from_bytes(digest[:8], "big") / 2 ** 64, 2))
+        return scores
+
+async def measure_throughput(
+    scorer: AsyncResumeScorer,
+    compiled: CompiledCriterion,
+    num_resumes: int = 100
+) -> Dict[str, Any]:
+    """
+    用空文档批量评分，测量每秒完成的叶子评估数
+    Returns:
+        耗时、叶子评估数、每秒叶子评估数以及评分器的调用统计
+    """
+    documents_batch = {
+        f"resume-{i}.pdf": [Page(page_content="", metadata={})]
+        for i in range(num_resumes)
+    }
+    before = scorer.stats()["leaf_evaluations"]
+    start = time.perf_counter()
+    await scorer.score_resume_matrix(compiled, documents_batch)
+    elapsed = time.perf_counter() - start
+    evaluations = scorer.stats()["leaf_evaluations"] - before
+    return {
+        "resumes": num_resumes,
+        "elapsed_seconds": elapsed,
+        "leaf_evaluations": evaluations,
+        "leaf_evaluations_per_second": evaluations / elapsed if elapsed else 0.0,
+        **scorer.stats()
+    }
+
+# 使用示例：
+"""
+scorer = AsyncResumeScorer(
+    FakeModelEvaluator(latency=0.2, failure_rate=0.05),
+    max_concurrency=16,
+    leaves_per_call=8,
+    timeout=10.0
+)
+compiled = await criteria_manager.get_compiled_criteria("數據科學家評估標準")
+
+batch = await scorer.score_resume_matrix(compiled, resume_manager.read_all_resumes())
+for filename, overall in batch.items():
+    print(f"{filename}: {overall}")
+
+# 离线测量吞吐量（每秒叶子评估数）
+print(await measure_throughput(scorer, compiled, num_resumes=200))
+"""
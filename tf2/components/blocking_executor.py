@@ -0,0 +1,256 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional, Tuple, TypeVar
+import asyncio
+import functools
+import os
+import threading
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+T = TypeVar("T")
+
+# 各端点的默认 (并发上限, 排队上限, 最长排队时间秒)
+DEFAULT_LIMITS: Dict[str, Tuple[int, int, float]] = {
+    "resumes.read": (4, 16, 10.0),
+    "resumes.list": (1, 2, 5.0),
+    "resumes.metadata": (2, 8, 5.0),
+    "resumes.rescan": (1, 0, 0.0),
+    "resumes.upload": (4, 8, 10.0),
+    "resumes.folder": (1, 4, 10.0),
+    "resumes.watcher": (1, 4, 10.0),
+    "scorers.single": (4, 16, 10.0),
+    "scorers.batch": (2, 4, 5.0),
+    "scorers.stream": (2, 0, 0.0),
+    "scorers.rank": (2, 4, 5.0),
+    "scorers.reweight": (4, 8, 5.0),
+    "jobs.read": (4, 16, 5.0),
+    "jobs.write": (2, 8, 5.0),
+}
+
+class EndpointLimiter:
+    """
+    单个端点的并发限制
+
+    最多 max_concurrent 个请求同时执行，之后的请求最多排队 max_queue 个、
+    等待 queue_timeout 秒；队列已满或等待超时时返回 503，由客户端稍后重试。
+    只能在事件循环线程中调用 acquire/release。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: int = 0,
+        queue_timeout: float = 0.0
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._rejected = 0
+        self._completed = 0
+
+    def _saturated(self) -> HTTPException:
+        self._rejected += 1
+        return HTTPException(
+            status_code=503,
+            detail=f"Too many concurrent {self.name} requests, please retry later",
+            headers={"Retry-After": "1"}
+        )
+
+    async def acquire(self) -> None:
+        """获取一个执行名额，饱和时抛出 503"""
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._saturated()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            # 超时的同时恰好被唤醒：名额已经转交过来，需要归还
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise self._saturated()
+        except asyncio.CancelledError:
+            # 请求被取消（例如客户端断开）时同样可能已经拿到名额
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self) -> None:
+        """归还名额，有排队的请求时直接转交给它"""
+        self._completed += 1
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "completed": self._completed,
+            "rejected": self._rejected
+        }
+
+_executor: Optional[ThreadPoolExecutor] = None
+_limiters: Dict[str, EndpointLimiter] = {}
+_lock = threading.Lock()
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """
+    获取专门执行阻塞操作（PDF 解析、评分、SQLite 查询）的线程池
+    与 Starlette 默认的线程池分开，阻塞操作再多也不会占满处理其他请求的线程
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = int(os.environ.get("TF2_BLOCKING_WORKERS", min(8, (os.cpu_count() or 1) + 2)))
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="blocking"
+                )
+    return _executor
+
+def get_limiter(name: str) -> EndpointLimiter:
+    """获取端点的并发限制，未配置的端点使用 (4, 16, 10.0)"""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = EndpointLimiter(name, *DEFAULT_LIMITS.get(name, (4, 16, 10.0)))
+                _limiters[name] = limiter
+    return limiter
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """所有端点的并发状态"""
+    return {name: limiter.stats() for name, limiter in sorted(_limiters.items())}
+
+async def run_blocking(endpoint: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在端点的并发限制下，把阻塞调用放到专用线程池中执行
+    Args:
+        endpoint: 端点名称，对应 DEFAULT_LIMITS 中的键
+        fn: 阻塞函数
+    Raises:
+        HTTPException: 端点饱和时返回 503
+    """
+    async with get_limiter(endpoint).slot():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_blocking_executor(), functools.partial(fn, *args, **kwargs)
+        )
+
+class _Slot:
+    """一个已获取的名额，可以重复调用 release，只归还一次"""
+
+    def __init__(self, limiter: EndpointLimiter):
+        self._limiter = limiter
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter.release()
+
+class BlockingStreamingResponse(StreamingResponse):
+    """
+    占用端点名额的流式响应
+    响应结束、客户端断开或发送失败时都会归还名额，
+    包括还没开始迭代响应体就失败的情况
+    """
+
+    def __init__(self, content: AsyncIterator[Any], slot: _Slot, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self._slot = slot
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._slot.release()
+
+async def stream_blocking(
+    endpoint: str,
+    iterator: Iterator[Any],
+    media_type: Optional[str] = None
+) -> BlockingStreamingResponse:
+    """
+    在端点的并发限制下，于专用线程池中逐项迭代阻塞的迭代器，作为流式响应输出
+    名额在返回前获取（饱和时立即返回 503，而不是在开始输出之后），
+    一直占用到响应结束或客户端断开
+    Args:
+        endpoint: 端点名称，对应 DEFAULT_LIMITS 中的键
+        iterator: 每次取下一项都可能阻塞的迭代器（例如生成器）
+        media_type: 响应的媒体类型
+    """
+    limiter = get_limiter(endpoint)
+    await limiter.acquire()
+    slot = _Slot(limiter)
+    return BlockingStreamingResponse(
+        _iterate_blocking(slot, iterator), slot, media_type=media_type
+    )
+
+async def _iterate_blocking(slot: _Slot, iterator: Iterator[T]) -> AsyncIterator[T]:
+    loop = asyncio.get_running_loop()
+    done = object()
+    try:
+        while True:
+            item = await loop.run_in_executor(get_blocking_executor(), next, iterator, done)
+            if item is done:
+                break
+            yield item
+    finally:
+        slot.release()
+
+def shutdown_blocking_executor() -> None:
+    """关闭线程池（应用退出时调用）"""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+# 使用示例：
+"""
+@router.get("/{filename}")
+async def get_resume(filename: str, manager: ResumeManager = Depends(get_resume_manager)):
+    # 饱和时返回 503，其余请求（例如 /criteria）不受影响
+    documents = await run_blocking("resumes.read", manager.read_resume, filename)
+    ...
+
+@router.get("/")
+async def read_all_resumes(manager: ResumeManager = Depends(get_resume_manager)):
+    # 逐份在线程池中读取并输出，名额占用到输出结束
+    return await stream_blocking(
+        "resumes.list", resumes_json(manager.iter_resumes()), media_type="application/json"
+    )
+
+print(limiter_stats())
+"""
@@ -0,0 +1,159 @@
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+import heapq
+import math
+import re
+from tf2.components.page import Page
+
+# 拉丁字母词（保留 c++、c#、node.js 这类写法）与连续的中日韩字符
+_LATIN_PATTERN = re.compile(r"[a-z0-9]+(?:[.+#][a-z0-9]+)*[+#]*")
+_CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af]+")
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：拉丁字母按词切分并转为小写，中日韩文字按相邻两字（bigram）切分
+    单独出现的一个中日韩字符保留为一个词
+    """
+    text = text.lower()
+    tokens = _LATIN_PATTERN.findall(text)
+    for run in _CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+def chunk_documents(documents: Sequence[Page], max_chars: int = 600) -> List[Page]:
+    """
+    把每页按段落切分成不超过 max_chars 的片段，短段落会与相邻段落合并
+    片段的 metadata 继承所在页，并加上 chunk 序号
+    """
+    chunks: List[Page] = []
+    for doc in documents:
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", doc.page_content) if p.strip()]
+        buffer = ""
+        pieces: List[str] = []
+        for paragraph in paragraphs:
+            # 超长段落按行再切
+            lines = [paragraph] if len(paragraph) <= max_chars else paragraph.splitlines()
+            for line in lines:
+                if len(line) > max_chars:
+                    # 先输出已合并的内容，保持片段与原文顺序一致
+                    if buffer:
+                        pieces.append(buffer)
+                        buffer = ""
+                    while len(line) > max_chars:
+                        pieces.append(line[:max_chars])
+                        line = line[max_chars:]
+                if buffer and len(buffer) + len(line) + 1 > max_chars:
+                    pieces.append(buffer)
+                    buffer = ""
+                buffer = f"{buffer}\n{line}" if buffer else line
+        if buffer:
+            pieces.append(buffer)
+        for piece in pieces:
+            chunks.append(Page(
+                page_content=piece,
+                metadata={**doc.metadata, "chunk": len(chunks)}
+            ))
+    return chunks
+
+class BM25Index:
+    """一份简历的片段上的 BM25 索引"""
+
+    def __init__(self, chunks: Sequence[Page], k1: float = 1.5, b: float = 0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self._term_freqs: List[Counter] = [Counter(tokenize(c.page_content)) for c in self.chunks]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        doc_freq: Counter = Counter()
+        for tf in self._term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(self.chunks)
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def scores(self, query: str) -> List[float]:
+        """每个片段对查询的 BM25 分数"""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        scores = [0.0] * len(self.chunks)
+        if not terms or not self._avg_length:
+            return scores
+        for i, tf in enumerate(self._term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / self._avg_length)
+            total = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    total += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores[i] = total
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[Tuple[float, int]]:
+        """
+        返回得分最高的 k 个片段 (分数, 下标)，按分数从高到低排列
+        没有任何片段命中时返回前 k 个片段（分数为 0）
+        """
+        scores = self.scores(query)
+        best = heapq.nlargest(k, ((score, -i) for i, score in enumerate(scores) if score > 0))
+        if not best:
+            return [(0.0, i) for i in range(min(k, len(self.chunks)))]
+        return [(score, -negative) for score, negative in best]
+
+class ChunkRetriever:
+    """
+    每个叶子标准的相关片段检索
+
+    每份简历只切分和建索引一次，然后用每个叶子标准的 content 检索 top_k 个片段，
+    按原文顺序拼接为该叶子的上下文。
+    """
+
+    def __init__(self, top_k: int = 3, chunk_chars: int = 600):
+        """
+        初始化检索器
+        Args:
+            top_k: 每个叶子使用的片段数
+            chunk_chars: 每个片段的最大字符数
+        """
+        self.top_k = top_k
+        self.chunk_chars = chunk_chars
+
+    @property
+    def retriever_id(self) -> str:
+        """检索配置标识，改变配置会改变评估器看到的上下文"""
+        return f"bm25-v2:k={self.top_k}:chars={self.chunk_chars}"
+
+    def build_index(self, documents: Sequence[Page]) -> BM25Index:
+        return BM25Index(chunk_documents(documents, self.chunk_chars))
+
+    def contexts(self, documents: Sequence[Page], queries: Sequence[str]) -> List[str]:
+        """
+        为每个查询返回拼接后的上下文
+        Args:
+            documents: 简历的页面
+            queries: 每个叶子标准的 content
+        """
+        index = self.build_index(documents)
+        contexts = []
+        for query in queries:
+            selected = sorted(i for _, i in index.top_k(query, self.top_k))
+            contexts.append("\n\n".join(index.chunks[i].page_content for i in selected))
+        return contexts
+
+# 使用示例：
+"""
+retriever = ChunkRetriever(top_k=3, chunk_chars=600)
+documents = resume_manager.read_resume("/path/to/resumes/example.pdf")
+
+# 每个叶子只看到与其内容最相关的 3 个片段
+contexts = retriever.contexts(documents, ["熟悉 Python 基本語法", "了解 SQL 查詢"])
+
+# 在异步评分器中使用
+scorer = AsyncResumeScorer(FakeModelEvaluator(), retriever=retriever)
+"""
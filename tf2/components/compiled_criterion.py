@@ -0,0 +1,384 @@
+from typing import Iterator, List, Mapping, Optional, Sequence, Tuple
+import copy
+import threading
+import weakref
+import numpy as np
+from tf2.db.schemas import Criterion
+
+class CompiledCriterion:
+    """
+    评估标准树的扁平数组表示
+
+    节点按前序（深度优先）排列，父节点总在子节点之前；
+    聚合时按深度从下往上逐层做向量运算，不需要 Python 递归。
+    分数使用 float 数组表示，NaN 对应 Criterion.score 为 None。
+
+    编译后的结构不可修改（数组为只读），可以被所有简历和线程共享；
+    通过 intern 获取时，内容相同的评估标准共用同一个实例。
+    """
+
+    _interned: "weakref.WeakValueDictionary[str, CompiledCriterion]" = weakref.WeakValueDictionary()
+    _intern_lock = threading.Lock()
+
+    def __init__(self, criterion: Criterion):
+        """
+        编译评估标准树
+        Args:
+            criterion: 评估标准根节点
+        """
+        names: List[str] = []
+        contents: List[str] = []
+        scales: List[str] = []
+        metadata: List[dict] = []
+        parents: List[int] = []
+        weights: List[float] = []
+        depths: List[int] = []
+
+        # 显式栈的前序遍历，与 ResumeScorer 的递归填分顺序一致
+        stack = [(criterion, -1, 0.0, 0)]
+        while stack:
+            node, parent, weight, depth = stack.pop()
+            names.append(node.name)
+            contents.append(node.content)
+            scales.append(node.scale)
+            metadata.append(node.metadata)
+            parents.append(parent)
+            weights.append(weight)
+            depths.append(depth)
+            index = len(names) - 1
+            for child_weight, child in reversed(node.children):
+                stack.append((child, index, float(child_weight), depth + 1))
+
+        self.root = criterion
+        # 标准版本：内容（不含分数）的哈希
+        self.content_hash = criterion.content_hash()
+        self.names: Tuple[str, ...] = tuple(names)
+        self.contents: Tuple[str, ...] = tuple(contents)
+        self.scales: Tuple[str, ...] = tuple(scales)
+        self.metadata: Tuple[dict, ...] = tuple(metadata)
+        self.parent = np.asarray(parents, dtype=np.intp)
+        self.weight = np.asarray(weights, dtype=np.float64)
+        self.depth = np.asarray(depths, dtype=np.intp)
+
+        n = len(names)
+        child_count = np.bincount(self.parent[1:], minlength=n)
+        self.is_leaf = child_count == 0
+        self.leaf_index = np.flatnonzero(self.is_leaf)
+        children_index: List[List[int]] = [[] for _ in range(n)]
+        for i in range(1, n):
+            children_index[parents[i]].append(i)
+        self.children_index: Tuple[Tuple[int, ...], ...] = tuple(map(tuple, children_index))
+        self._build_levels()
+
+    @classmethod
+    def intern(cls, criterion: Criterion) -> "CompiledCriterion":
+        """获取内容相同（不含分数）的评估标准共享的编译实例，没有时编译一次"""
+        content_hash = criterion.content_hash()
+        with cls._intern_lock:
+            compiled = cls._interned.get(content_hash)
+        if compiled is None:
+            compiled = cls(criterion)
+            with cls._intern_lock:
+                compiled = cls._interned.setdefault(content_hash, compiled)
+        return compiled
+
+    def _build_levels(self) -> None:
+        """根据当前权重计算每个父节点的总权重和逐层聚合矩阵"""
+        n = len(self.names)
+        self.total_weight = np.bincount(self.parent[1:], weights=self.weight[1:], minlength=n)
+        # 每一层的 (子节点, 父节点列表, 子到父的 one-hot 加权矩阵, 指示矩阵)
+        self._levels = []
+        for level in range(int(self.depth.max()), 0, -1):
+            child_idx = np.flatnonzero(self.depth == level)
+            parent_idx, inverse = np.unique(self.parent[child_idx], return_inverse=True)
+            indicator = np.zeros((len(child_idx), len(parent_idx)))
+            indicator[np.arange(len(child_idx)), inverse] = 1.0
+            weighted = indicator * self.weight[child_idx][:, None]
+            self._levels.append((child_idx, parent_idx, weighted, indicator))
+
+        # 共享的结构只读，防止评分时意外修改
+        arrays = [self.parent, self.weight, self.depth, self.is_leaf, self.leaf_index, self.total_weight]
+        for level in self._levels:
+            arrays.extend(level)
+        for array in arrays:
+            array.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def with_weights(self, weights: Mapping[str, float]) -> "CompiledCriterion":
+        """
+        返回只修改了权重的副本，节点顺序不变，因此原有的分数数组可以直接用于新副本
+        Args:
+            weights: 节点名称到该节点在父节点下的新权重；同名节点都会被修改
+        Raises:
+            KeyError: 名称不存在
+            ValueError: 修改根节点，或权重为负数、非有限值
+        """
+        weight = self.weight.copy()
+        for name, value in weights.items():
+            indices = [i for i, node_name in enumerate(self.names) if node_name == name]
+            if not indices:
+                raise KeyError(name)
+            if indices == [0]:
+                raise ValueError(f"Criterion {name} is the root and has no weight")
+            value = float(value)
+            if not np.isfinite(value) or value < 0:
+                raise ValueError(f"Invalid weight {value} for criterion {name}")
+            weight[[i for i in indices if i != 0]] = value
+
+        reweighted = copy.copy(self)
+        reweighted.weight = weight
+        reweighted._build_levels()
+        reweighted.root = reweighted.build_criterion(np.full(len(self.names), np.nan))
+        reweighted.content_hash = reweighted.root.content_hash()
+        return reweighted
+
+    @property
+    def leaf_names(self) -> List[str]:
+        return [self.names[i] for i in self.leaf_index]
+
+    def index_of(self, name: str) -> int:
+        """按名称查找节点下标（名称重复时返回前序中的第一个）"""
+        try:
+            return self.names.index(name)
+        except ValueError:
+            raise KeyError(name)
+
+    def node_scores_from_leaves(self, leaf_scores: Sequence[Optional[float]]) -> np.ndarray:
+        """
+        把叶子分数展开为全部节点的分数数组，非叶子节点为 NaN
+        Args:
+            leaf_scores: 按 leaf_index 顺序排列的叶子分数，None 表示缺失
+        """
+        if not isinstance(leaf_scores, np.ndarray):
+            leaf_scores = [np.nan if s is None else s for s in leaf_scores]
+        leaf_scores = np.asarray(leaf_scores, dtype=np.float64)
+        if leaf_scores.shape[-1] != len(self.leaf_index):
+            raise ValueError(
+                f"Expected {len(self.leaf_index)} leaf scores, got {leaf_scores.shape[-1]}"
+            )
+        scores = np.full(leaf_scores.shape[:-1] + (len(self.names),), np.nan)
+        scores[..., self.leaf_index] = leaf_scores
+        return scores
+
+    def aggregate(self, node_scores: np.ndarray) -> np.ndarray:
+        """
+        计算每个节点的聚合分数，语义与 Criterion.calculate_overall_score 相同：
+        - 叶子节点返回自身分数
+        - 子节点有直接分数时使用直接分数，否则使用其聚合分数
+        - 任一子节点分数缺失时结果为 NaN
+        - 子节点总权重为 0 时返回自身分数
+        Args:
+            node_scores: 形状为 (节点数,) 或 (批量, 节点数) 的直接分数，NaN 表示缺失
+        Returns:
+            与输入同形状的聚合分数，根节点的值即总分
+        """
+        scores = np.asarray(node_scores, dtype=np.float64)
+        single = scores.ndim == 1
+        if single:
+            scores = scores[None, :]
+
+        aggregated = scores.copy()
+        # 参与父节点计算的有效分数：有直接分数用直接分数，否则用聚合分数
+        effective = scores.copy()
+        for child_idx, parent_idx, weighted, indicator in self._levels:
+            child_scores = effective[:, child_idx]
+            missing = np.isnan(child_scores)
+            weighted_sum = np.where(missing, 0.0, child_scores) @ weighted
+            any_missing = (missing @ indicator) > 0
+            total = self.total_weight[parent_idx]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                parent_scores = weighted_sum / total
+            parent_scores = np.where(total == 0, scores[:, parent_idx], parent_scores)
+            parent_scores = np.where(any_missing, np.nan, parent_scores)
+            aggregated[:, parent_idx] = parent_scores
+            own = scores[:, parent_idx]
+            effective[:, parent_idx] = np.where(np.isnan(own), parent_scores, own)
+
+        return aggregated[0] if single else aggregated
+
+    def overall_score(self, node_scores: np.ndarray) -> Optional[float]:
+        """计算单份简历的总分，缺失时返回 None"""
+        value = self.aggregate(node_scores)[0]
+        return None if np.isnan(value) else float(value)
+
+    def overall_from_leaves(self, leaf_scores: Sequence[Optional[float]]) -> Optional[float]:
+        """只根据叶子分数计算总分"""
+        return self.overall_score(self.node_scores_from_leaves(leaf_scores))
+
+    def node_scores_of(self, criterion: Criterion) -> np.ndarray:
+        """按前序读取一棵同结构评估标准树上的直接分数"""
+        scores = np.empty(len(self.names))
+        stack = [criterion]
+        i = 0
+        while stack:
+            node = stack.pop()
+            scores[i] = np.nan if node.score is None else node.score
+            i += 1
+            stack.extend(child for _, child in reversed(node.children))
+        if i != len(self.names):
+            raise ValueError("Criterion does not match the compiled structure")
+        return scores
+
+    def build_criterion(self, node_scores: np.ndarray) -> Criterion:
+        """
+        按需根据分数数组构建一棵带分数的 Criterion 树，模板本身不会被修改
+        结构已经在编译时验证过，这里用 model_construct 跳过 pydantic 验证
+        Args:
+            node_scores: 形状为 (节点数,) 的直接分数，NaN 表示缺失
+        """
+        nodes: List[Optional[Criterion]] = [None] * len(self.names)
+        # 逆前序遍历保证子节点先于父节点构建
+        for i in range(len(self.names) - 1, -1, -1):
+            score = node_scores[i]
+            nodes[i] = Criterion.model_construct(
+                name=self.names[i],
+                content=self.contents[i],
+                scale=self.scales[i],
+                score=None if np.isnan(score) else float(score),
+                children=[
+                    (float(self.weight[c]), nodes[c]) for c in self.children_index[i]
+                ],
+                metadata=self.metadata[i]
+            )
+        return nodes[0]
+
+class ScoredCriterion:
+    """
+    一份简历的评分结果：共享的编译模板加上一个分数数组
+
+    每份简历只占用一个 float 数组；需要 Criterion 树时再按需构建。
+    """
+
+    __slots__ = ("template", "scores", "_aggregated")
+
+    def __init__(self, template: CompiledCriterion, scores: np.ndarray):
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.shape != (len(template),):
+            raise ValueError(
+                f"Expected {len(template)} node scores, got shape {scores.shape}"
+            )
+        self.template = template
+        self.scores = scores
+        self._aggregated: Optional[np.ndarray] = None
+
+    @property
+    def aggregated(self) -> np.ndarray:
+        """每个节点的聚合分数"""
+        if self._aggregated is None:
+            self._aggregated = self.template.aggregate(self.scores)
+        return self._aggregated
+
+    @property
+    def overall_score(self) -> Optional[float]:
+        value = self.aggregated[0]
+        return None if np.isnan(value) else float(value)
+
+    def score_of(self, name: str) -> Optional[float]:
+        """某个节点的直接分数"""
+        value = self.scores[self.template.index_of(name)]
+        return None if np.isnan(value) else float(value)
+
+    def to_criterion(self) -> Criterion:
+        """构建带分数的 Criterion 树"""
+        return self.template.build_criterion(self.scores)
+
+class BatchScores:
+    """
+    一批简历在同一评估标准下的分数矩阵
+
+    scores 的形状为 (简历数, 节点数)，列按 CompiledCriterion 的前序排列；
+    叶子分数即 scores[:, compiled.leaf_index]。中间节点与总分通过矩阵运算得到，
+    每份简历的 Criterion 树只在需要时才构建。
+    """
+
+    def __init__(
+        self,
+        compiled: CompiledCriterion,
+        resume_ids: Sequence[str],
+        scores: np.ndarray
+    ):
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.shape != (len(resume_ids), len(compiled)):
+            raise ValueError(
+                f"Expected score matrix of shape {(len(resume_ids), len(compiled))}, "
+                f"got {scores.shape}"
+            )
+        self.compiled = compiled
+        self.resume_ids = list(resume_ids)
+        self.scores = scores
+        self._positions = {rid: i for i, rid in enumerate(self.resume_ids)}
+        self._aggregated: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_leaf_scores(
+        cls,
+        compiled: CompiledCriterion,
+        resume_ids: Sequence[str],
+        leaf_scores: np.ndarray
+    ) -> "BatchScores":
+        """由 (简历数, 叶子数) 的叶子分数矩阵创建"""
+        return cls(compiled, resume_ids, compiled.node_scores_from_leaves(leaf_scores))
+
+    def __len__(self) -> int:
+        return len(self.resume_ids)
+
+    @property
+    def leaf_scores(self) -> np.ndarray:
+        return self.scores[:, self.compiled.leaf_index]
+
+    @property
+    def aggregated(self) -> np.ndarray:
+        """每份简历每个节点的聚合分数，形状为 (简历数, 节点数)"""
+        if self._aggregated is None:
+            self._aggregated = self.compiled.aggregate(self.scores)
+        return self._aggregated
+
+    def overall_scores(self) -> np.ndarray:
+        """所有简历的总分，缺失为 NaN"""
+        return self.aggregated[:, 0]
+
+    def overall_score(self, resume_id: str) -> Optional[float]:
+        value = self.aggregated[self._positions[resume_id], 0]
+        return None if np.isnan(value) else float(value)
+
+    def to_criterion(self, resume_id: str) -> Criterion:
+        """构建单份简历带分数的 Criterion 树"""
+        return self.compiled.build_criterion(self.scores[self._positions[resume_id]])
+
+    def overlay(self, resume_id: str) -> ScoredCriterion:
+        """单份简历的评分结果，与批次共享分数数组"""
+        return ScoredCriterion(self.compiled, self.scores[self._positions[resume_id]])
+
+    def items(self) -> Iterator[Tuple[str, Optional[float]]]:
+        """依次返回 (简历标识, 总分)"""
+        for resume_id, value in zip(self.resume_ids, self.overall_scores()):
+            yield resume_id, None if np.isnan(value) else float(value)
+
+# 使用示例：
+"""
+compiled = CompiledCriterion(criterion)
+# 或者与内容相同的评估标准共用同一个编译实例
+compiled = CompiledCriterion.intern(criterion)
+
+# 只有叶子分数
+overall = compiled.overall_from_leaves([0.8, 0.6, 0.9])
+
+# 每个节点的聚合分数（前序排列）
+node_scores = compiled.node_scores_from_leaves([0.8, 0.6, 0.9])
+aggregated = compiled.aggregate(node_scores)
+
+# 批量：(简历数, 叶子数) 的矩阵
+batch = BatchScores.from_leaf_scores(compiled, ["a.pdf", "b.pdf"], leaf_matrix)
+overall = batch.overall_scores()
+scored_tree = batch.to_criterion("a.pdf")
+
+# 单份简历：共享模板 + 一个分数数组
+scored = batch.overlay("a.pdf")
+print(scored.overall_score, scored.score_of("基礎技術能力"))
+
+# 修改权重后用同一个分数矩阵重新聚合，不需要重新评分
+reweighted = compiled.with_weights({"基礎技術能力": 0.5})
+overall = BatchScores(reweighted, batch.resume_ids, batch.scores).overall_scores()
+"""
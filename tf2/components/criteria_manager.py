@@ -1,37 +1,230 @@
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Tuple, Union
 from fastapi import HTTPException
-from tf2.db.schemas import Criterion
+from tf2.db.schemas import Criterion, CriterionSummary
+from tf2.db.criteria_repository import CriteriaRepository
+from tf2.components.compiled_criterion import CompiledCriterion
+from tf2.components.metadata_index import MetadataIndex
+import base64
+import binascii
+import bisect
 import json
+import threading
+import time
 from pathlib import Path
 
 class CriteriaManager:
-    def __init__(self, criteria_folder: str = "./assets/criteria"):
+    def __init__(
+        self,
+        criteria_folder: str = "./assets/criteria",
+        reload_interval: float = 1.0,
+        repository: Optional[CriteriaRepository] = None
+    ):
         """
         初始化评估标准管理器
         Args:
             criteria_folder: 评估标准 JSON 文件所在文件夹
+            reload_interval: 两次检查 JSON 文件变化之间的最小间隔（秒）
+            repository: 可选的数据库仓库，通过 API 创建、更新、删除的标准会写入其中
         """
         self._criteria_store: Dict[str, Criterion] = {}
+        # 按名称排序的索引，用于稳定的分页
+        self._sorted_names: List[str] = []
+        # 编译后的扁平数组形式，按需构建，标准变化时失效
+        self._compiled_store: Dict[str, Tuple[Criterion, CompiledCriterion]] = {}
         self.criteria_folder = Path(criteria_folder)
+        self.reload_interval = reload_interval
+        # 记录每个 JSON 文件的 (mtime_ns, size) 以及它提供的标准名称
+        self._file_signatures: Dict[Path, Tuple[int, int]] = {}
+        self._file_criteria: Dict[Path, str] = {}
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        # 标准被写入或删除时的回调：(名称, 新标准或 None)
+        self._listeners: List[Callable[[str, Optional[Criterion]], None]] = []
+        # 元数据倒排索引：根标准按名称索引，所有节点按 (根标准名称, 前序位置) 索引，
+        # 同一棵树中名称相同的节点各自占一个条目
+        self._metadata_index = MetadataIndex()
+        self._nested_metadata_index = MetadataIndex()
+        self._nested_ids: Dict[str, List[Tuple[str, int]]] = {}
+        self.repository = repository
         self._load_default_criteria()
+        self._load_repository_criteria()
+    
+    def add_listener(self, listener: Callable[[str, Optional[Criterion]], None]) -> None:
+        """
+        注册标准变更回调
+        Args:
+            listener: 以 (名称, 新标准) 调用，删除时新标准为 None
+        """
+        self._listeners.append(listener)
+    
+    def _notify(self, name: str, criterion: Optional[Criterion]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(name, criterion)
+            except Exception as e:
+                print(f"Error notifying criteria change for {name}: {str(e)}")
+    
+    def _index_metadata(self, criterion: Criterion) -> None:
+        self._unindex_metadata(criterion.name)
+        self._metadata_index.add(criterion.name, criterion.metadata)
+        ids = []
+        stack = [criterion]
+        while stack:
+            node = stack.pop()
+            item_id = (criterion.name, len(ids))
+            self._nested_metadata_index.add(item_id, node.metadata)
+            ids.append(item_id)
+            stack.extend(child for _, child in reversed(node.children))
+        self._nested_ids[criterion.name] = ids
+    
+    def _unindex_metadata(self, name: str) -> None:
+        self._metadata_index.remove(name)
+        for item_id in self._nested_ids.pop(name, []):
+            self._nested_metadata_index.remove(item_id)
+    
+    def _put_criteria(self, criterion: Criterion) -> None:
+        """写入标准存储（所有写入都经过这里）"""
+        if criterion.name not in self._criteria_store:
+            bisect.insort(self._sorted_names, criterion.name)
+        self._criteria_store[criterion.name] = criterion
+        self._compiled_store.pop(criterion.name, None)
+        self._index_metadata(criterion)
+        self._notify(criterion.name, criterion)
+    
+    def _remove_criteria(self, name: str) -> None:
+        """从标准存储中移除（所有删除都经过这里）"""
+        if self._criteria_store.pop(name, None) is not None:
+            position = bisect.bisect_left(self._sorted_names, name)
+            del self._sorted_names[position]
+            self._compiled_store.pop(name, None)
+            self._unindex_metadata(name)
+            self._notify(name, None)
     
     def _load_default_criteria(self) -> None:
-        """加载默认的评估标准"""
+        """
+        加载默认的评估标准
+        只重新解析 mtime 或大小发生变化的 JSON 文件，已删除文件对应的标准会被移除
+        """
+        with self._lock:
+            try:
+                seen = set()
+                if self.criteria_folder.exists():
+                    for json_file in self.criteria_folder.glob("*.json"):
+                        try:
+                            stat = json_file.stat()
+                        except OSError:
+                            continue
+                        seen.add(json_file)
+                        signature = (stat.st_mtime_ns, stat.st_size)
+                        if self._file_signatures.get(json_file) == signature:
+                            continue
+                        
+                        # 无论解析是否成功都记录签名，避免反复解析同一个坏文件
+                        self._file_signatures[json_file] = signature
+                        try:
+                            with open(json_file, "r", encoding="utf-8") as f:
+                                json_data = json.load(f)
+                                criterion = Criterion.from_json(json_data)
+                        except Exception as e:
+                            print(f"Error loading {json_file}: {str(e)}")
+                            continue
+                        
+                        previous = self._file_criteria.get(json_file)
+                        if previous is not None and previous != criterion.name:
+                            self._remove_criteria(previous)
+                        self._file_criteria[json_file] = criterion.name
+                        self._put_criteria(criterion)
+                
+                # 文件已被删除：移除它提供的标准
+                for json_file in list(self._file_signatures):
+                    if json_file not in seen:
+                        del self._file_signatures[json_file]
+                        name = self._file_criteria.pop(json_file, None)
+                        if name is not None:
+                            self._remove_criteria(name)
+            except Exception as e:
+                print(f"Error loading default criteria: {str(e)}")
+            finally:
+                self._last_refresh = time.monotonic()
+    
+    def _load_repository_criteria(self) -> None:
+        """从数据库加载所有标准树（一次查询），同名时覆盖 JSON 文件中的版本"""
+        if self.repository is None:
+            return
         try:
-            if not self.criteria_folder.exists():
-                return
-            
-            # 加载所有 JSON 文件
-            for json_file in self.criteria_folder.glob("*.json"):
-                try:
-                    with open(json_file, "r", encoding="utf-8") as f:
-                        json_data = json.load(f)
-                        criterion = Criterion.from_json(json_data)
-                        self._criteria_store[criterion.name] = criterion
-                except Exception as e:
-                    print(f"Error loading {json_file}: {str(e)}")
+            trees = self.repository.load_trees()
         except Exception as e:
-            print(f"Error loading default criteria: {str(e)}")
+            print(f"Error loading criteria from repository: {str(e)}")
+            return
+        with self._lock:
+            for criterion in trees.values():
+                self._put_criteria(criterion)
+    
+    def _persist(self, criterion: Criterion, previous_name: Optional[str] = None) -> None:
+        """写入数据库（未配置仓库时什么都不做）"""
+        if self.repository is None:
+            return
+        try:
+            # 重命名时删除旧树和写入新树在同一个事务中完成
+            replace = previous_name if previous_name != criterion.name else None
+            self.repository.save_tree(criterion, replace=replace)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error saving criteria: {str(e)}"
+            )
+    
+    def _persist_delete(self, name: str) -> None:
+        """从数据库删除（未配置仓库时什么都不做）"""
+        if self.repository is None:
+            return
+        try:
+            self.repository.delete_tree(name)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error deleting criteria: {str(e)}"
+            )
+    
+    def refresh(self, force: bool = False) -> None:
+        """
+        检查 JSON 文件是否有变化并热加载
+        Args:
+            force: 为 True 时忽略 reload_interval 立即检查
+        """
+        if not force and time.monotonic() - self._last_refresh < self.reload_interval:
+            return
+        self._load_default_criteria()
+    
+    def start_watching(self, interval: float = 2.0) -> None:
+        """启动后台线程，定期轮询 JSON 文件变化"""
+        with self._lock:
+            if self._watch_thread is not None and self._watch_thread.is_alive():
+                return
+            self._watch_stop.clear()
+            self._watch_thread = threading.Thread(
+                target=self._watch_loop,
+                args=(interval,),
+                name="criteria-watcher",
+                daemon=True
+            )
+            self._watch_thread.start()
+    
+    def stop_watching(self) -> None:
+        """停止后台轮询线程"""
+        self._watch_stop.set()
+        thread = self._watch_thread
+        if thread is not None:
+            thread.join()
+        self._watch_thread = None
+    
+    def _watch_loop(self, interval: float) -> None:
+        while not self._watch_stop.wait(interval):
+            self.refresh(force=True)
     
     def load_criteria_from_json(self, json_path: str) -> Criterion:
         """
@@ -52,8 +245,11 @@ class CriteriaManager:
             with open(path, "r", encoding="utf-8") as f:
                 json_data = json.load(f)
                 criterion = Criterion.from_json(json_data)
-                self._criteria_store[criterion.name] = criterion
-                return criterion
+            with self._lock:
+                self._put_criteria(criterion)
+            return criterion
+        except HTTPException:
+            raise
         except json.JSONDecodeError as e:
             raise HTTPException(
                 status_code=400,
@@ -67,63 +263,157 @@ class CriteriaManager:
     
     async def create_criteria(self, criteria: Criterion) -> Criterion:
         """创建新的评估标准"""
-        if criteria.name in self._criteria_store:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Criteria with name {criteria.name} already exists"
-            )
-        
-        self._criteria_store[criteria.name] = criteria
+        self.refresh()
+        with self._lock:
+            if criteria.name in self._criteria_store:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Criteria with name {criteria.name} already exists"
+                )
+            
+            self._persist(criteria)
+            self._put_criteria(criteria)
         return criteria
     
     async def get_criteria(self, name: str) -> Criterion:
         """获取单个评估标准"""
-        if name not in self._criteria_store:
+        self.refresh()
+        criteria = self._criteria_store.get(name)
+        if criteria is None:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Criteria {name} not found"
             )
-        return self._criteria_store[name]
+        return criteria
+    
+    async def get_compiled_criteria(self, name: str) -> CompiledCriterion:
+        """获取编译后的评估标准，每个标准版本只编译一次，内容相同的标准共用同一个实例"""
+        criteria = await self.get_criteria(name)
+        entry = self._compiled_store.get(name)
+        if entry is not None and entry[0] is criteria:
+            return entry[1]
+        compiled = CompiledCriterion.intern(criteria)
+        with self._lock:
+            if self._criteria_store.get(name) is criteria:
+                self._compiled_store[name] = (criteria, compiled)
+        return compiled
     
     async def list_criteria(self, skip: int = 0, limit: int = 10) -> List[Criterion]:
-        """列出所有评估标准"""
-        return list(self._criteria_store.values())[skip:skip + limit]
+        """按名称顺序列出评估标准"""
+        self.refresh()
+        with self._lock:
+            return [
+                self._criteria_store[name]
+                for name in self._sorted_names[skip:skip + limit]
+            ]
     
-    async def update_criteria(self, name: str, criteria: Criterion) -> Criterion:
-        """更新评估标准"""
-        if name not in self._criteria_store:
+    @staticmethod
+    def _encode_cursor(name: str) -> str:
+        return base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> str:
+        try:
+            return base64.b64decode(
+                cursor.encode("ascii"), altchars=b"-_", validate=True
+            ).decode("utf-8")
+        except (binascii.Error, UnicodeError, ValueError):
             raise HTTPException(
-                status_code=404, 
-                detail=f"Criteria {name} not found"
+                status_code=400,
+                detail=f"Invalid cursor {cursor}"
             )
+    
+    async def list_criteria_page(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        summary: bool = False
+    ) -> Tuple[List[Union[Criterion, CriterionSummary]], Optional[str]]:
+        """
+        基于游标按名称顺序分页列出评估标准
+        游标记录上一页最后一个名称，翻页期间新增或删除标准不会导致重复或遗漏
+        Args:
+            limit: 每页数量
+            cursor: 上一页返回的游标，为 None 时从头开始
+            summary: 为 True 时只返回名称和元数据
+        Returns:
+            (本页标准, 下一页游标)，没有下一页时游标为 None
+        """
+        self.refresh()
+        with self._lock:
+            start = 0
+            if cursor is not None:
+                start = bisect.bisect_right(self._sorted_names, self._decode_cursor(cursor))
+            names = self._sorted_names[start:start + limit]
+            has_more = start + limit < len(self._sorted_names)
+            criteria = [self._criteria_store[name] for name in names]
         
-        self._criteria_store[name] = criteria
+        next_cursor = self._encode_cursor(names[-1]) if names and has_more else None
+        if summary:
+            return [CriterionSummary.from_criterion(c) for c in criteria], next_cursor
+        return criteria, next_cursor
+    
+    async def list_all_criteria(self) -> List[Criterion]:
+        """按名称顺序列出所有评估标准"""
+        self.refresh()
+        with self._lock:
+            return [self._criteria_store[name] for name in self._sorted_names]
+    
+    async def update_criteria(self, name: str, criteria: Criterion) -> Criterion:
+        """更新评估标准"""
+        self.refresh()
+        with self._lock:
+            if name not in self._criteria_store:
+                raise HTTPException(
+                    status_code=404, 
+                    detail=f"Criteria {name} not found"
+                )
+            
+            if criteria.name != name and criteria.name in self._criteria_store:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Criteria with name {criteria.name} already exists"
+                )
+            
+            self._persist(criteria, previous_name=name)
+            if criteria.name != name:
+                self._remove_criteria(name)
+            self._put_criteria(criteria)
         return criteria
     
     async def delete_criteria(self, name: str) -> bool:
         """删除评估标准"""
-        if name not in self._criteria_store:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Criteria {name} not found"
-            )
-        
-        del self._criteria_store[name]
+        self.refresh()
+        with self._lock:
+            if name not in self._criteria_store:
+                raise HTTPException(
+                    status_code=404, 
+                    detail=f"Criteria {name} not found"
+                )
+            
+            self._persist_delete(name)
+            self._remove_criteria(name)
         return True
     
     async def search_criteria_by_metadata(
-        self, metadata_query: Dict[str, Any]
+        self, metadata_query: Dict[str, Any], nested: bool = False
     ) -> List[Criterion]:
-        """通过元数据搜索评估标准"""
-        results = []
-        for criteria in self._criteria_store.values():
-            matches = all(
-                criteria.metadata.get(key) == value 
-                for key, value in metadata_query.items()
-            )
-            if matches:
-                results.append(criteria)
-        return results
+        """
+        通过元数据搜索评估标准（使用倒排索引，结果按名称排序）
+        Args:
+            metadata_query: 元数据条件，所有条件都需满足
+            nested: 为 True 时匹配树中任意一个节点（同一个节点需满足所有条件），返回其所在的根标准
+        """
+        self.refresh()
+        with self._lock:
+            if nested:
+                names = {root for root, _ in self._nested_metadata_index.query(metadata_query)}
+            else:
+                names = self._metadata_index.query(metadata_query)
+            return [
+                self._criteria_store[name] for name in sorted(names)
+                if name in self._criteria_store
+            ]
     
     async def get_criteria_tree(self, name: str) -> Dict[str, Any]:
         """获取评估标准的树形结构"""
@@ -169,11 +459,41 @@ class CriteriaManager:
                 detail=f"Error saving criteria: {str(e)}"
             )
 
+_default_manager: Optional[CriteriaManager] = None
+_default_manager_lock = threading.Lock()
+
+def get_default_criteria_manager() -> CriteriaManager:
+    """
+    获取进程内共享的评估标准管理器
+    所有 API 共用同一个实例，已解析的标准常驻内存，通过 API 创建的标准会写入 SQLite，重启后仍然可用
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = CriteriaManager(
+                    repository=CriteriaRepository.from_url(
+                        "sqlite:///./.cache/criteria.sqlite"
+                    )
+                )
+    return _default_manager
+
 # 使用示例：
 """
 # 创建管理器（会自动加载默认标准）
 manager = CriteriaManager()
 
+# 或者使用进程内共享的管理器
+manager = get_default_criteria_manager()
+
+# 使用数据库持久化通过 API 创建的标准
+manager = CriteriaManager(
+    repository=CriteriaRepository.from_url("sqlite:///./.cache/criteria.sqlite")
+)
+
+# 后台轮询 JSON 文件变化（可选，默认在访问时按 reload_interval 检查）
+manager.start_watching(interval=2.0)
+
 # 从特定 JSON 文件加载标准
 criterion = manager.load_criteria_from_json("path/to/custom_criteria.json")
 
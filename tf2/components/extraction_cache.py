@@ -0,0 +1,174 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+# 解析逻辑变化时修改版本号，旧的缓存条目会自然失效
+EXTRACTOR_VERSION = "pypdf-loader-1"
+
+class ExtractionCache:
+    """
+    以文件内容哈希为键的简历文本提取缓存
+
+    每个条目是一个 zlib 压缩的 JSON 文件，保存每页文本和元数据；
+    条目总大小超过上限时按最近访问时间（文件 mtime）淘汰最旧的条目。
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "./.cache/extraction",
+        max_bytes: int = 512 * 1024 * 1024,
+        extractor_version: str = EXTRACTOR_VERSION
+    ):
+        """
+        初始化提取缓存
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+            extractor_version: 提取器版本，作为缓存键的一部分
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.extractor_version = extractor_version
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._total_bytes = sum(
+            entry.stat().st_size for entry in self.cache_dir.glob("*.json.z")
+        )
+
+    @staticmethod
+    def hash_file(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+        """计算文件内容的 SHA-256"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_path(self, content_hash: str) -> Path:
+        key = hashlib.sha256(
+            f"{self.extractor_version}:{content_hash}".encode("utf-8")
+        ).hexdigest()
+        return self.cache_dir / f"{key}.json.z"
+
+    def contains(self, content_hash: str) -> bool:
+        """检查条目是否存在，不计入命中统计"""
+        return self._entry_path(content_hash).exists()
+
+    def get(self, content_hash: str) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        """
+        读取缓存
+        Args:
+            content_hash: 文件内容哈希
+        Returns:
+            [(页面文本, 页面元数据), ...]，未命中时返回 None
+        """
+        entry = self._entry_path(content_hash)
+        try:
+            with open(entry, "rb") as f:
+                payload = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+            # 更新 mtime 作为 LRU 的访问时间
+            os.utime(entry)
+        except (OSError, ValueError, zlib.error):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+        return [(text, metadata) for text, metadata in payload["pages"]]
+
+    def put(self, content_hash: str, pages: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        写入缓存
+        Args:
+            content_hash: 文件内容哈希
+            pages: [(页面文本, 页面元数据), ...]
+        """
+        entry = self._entry_path(content_hash)
+        data = zlib.compress(
+            json.dumps(
+                {"version": self.extractor_version, "pages": pages},
+                ensure_ascii=False,
+                separators=(",", ":")
+            ).encode("utf-8")
+        )
+        # 先写临时文件再替换，避免并发读到半个条目
+        tmp = entry.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            previous = entry.stat().st_size
+        except OSError:
+            previous = 0
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, entry)
+
+        with self._lock:
+            self._total_bytes += len(data) - previous
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _evict(self) -> None:
+        """按最近访问时间淘汰条目，直到总大小低于上限"""
+        with self._lock:
+            entries = []
+            for entry in self.cache_dir.glob("*.json.z"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    entry.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self._evictions += 1
+            self._total_bytes = total
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for entry in self.cache_dir.glob("*.json.z"):
+                try:
+                    entry.unlink()
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "extractor_version": self.extractor_version
+            }
+
+# 使用示例：
+"""
+cache = ExtractionCache("./.cache/extraction", max_bytes=256 * 1024 * 1024)
+manager = ResumeManager("/path/to/resumes", cache=cache)
+
+# 第二次读取同一文件时直接命中缓存，不再运行 libmagic 和 PDF 解析
+manager.read_resume("/path/to/resumes/example.pdf")
+manager.read_resume("/path/to/resumes/example.pdf")
+print(cache.stats())
+"""
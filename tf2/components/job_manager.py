@@ -0,0 +1,403 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+from fastapi import HTTPException
+from tf2.db.schemas import Criterion
+from tf2.components.compiled_criterion import CompiledCriterion
+from tf2.components.resume_manager import (
+    ResumeManager,
+    _error_documents,
+    get_default_resume_manager
+)
+from tf2.components.resume_scorer import ResumeScorer
+from tf2.components.leaf_cache import get_default_leaf_cache
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    criteria_name TEXT NOT NULL,
+    criteria_json TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER,
+    completed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    overall_score REAL,
+    scores TEXT NOT NULL,
+    error INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, filename)
+);
+CREATE INDEX IF NOT EXISTS job_results_seq ON job_results (job_id, seq);
+"""
+
+class JobManager:
+    """
+    后台批量评分任务管理器
+
+    提交任务后立即返回任务 ID，由线程池在后台逐份读取并评分；
+    任务状态与每份简历的分数保存在 SQLite 中，进程重启后未完成的任务会从断点继续。
+    多个进程可以共用一个数据库：任务在数据库中原子地认领（owner），同一时间只由一个进程执行；
+    执行中的任务每评完一份简历续约一次，超过 lease_seconds 没有续约的任务可以被其他进程接手。
+    取消状态写在数据库中，每份简历之间重新读取，任何进程都可以取消任务。
+    """
+
+    def __init__(
+        self,
+        resume_manager: ResumeManager,
+        scorer: ResumeScorer,
+        db_path: str = "./.cache/jobs.sqlite",
+        max_workers: int = 2,
+        lease_seconds: float = 300.0
+    ):
+        """
+        初始化任务管理器
+        Args:
+            resume_manager: 用于读取简历的管理器
+            scorer: 评分器
+            db_path: SQLite 数据库路径
+            max_workers: 同时运行的任务数
+            lease_seconds: 执行中的任务多久没有进展后视为其进程已退出，可以被重新认领
+        """
+        self.resume_manager = resume_manager
+        self.scorer = scorer
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        # 本进程的标识，认领任务时写入 owner
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="scoring-job"
+        )
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._recover()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _recover(self) -> None:
+        """
+        重新调度尚未开始的任务，以及执行进程已退出（租约过期）的任务
+        其他进程正在执行的任务不会被调度；调度后仍需在 _claim 中原子地认领
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) "
+                "ORDER BY created_at",
+                (PENDING, RUNNING, time.time() - self.lease_seconds)
+            ).fetchall()
+        for row in rows:
+            self._schedule(row["id"])
+
+    def _claim(self, job_id: str) -> bool:
+        """
+        原子地认领任务：尚未开始，或执行中但租约已过期
+        Returns:
+            是否由本进程认领成功
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, updated_at = ? "
+                "WHERE id = ? AND (status = ? OR (status = ? AND updated_at < ?))",
+                (RUNNING, self.owner_id, now, job_id, PENDING, RUNNING, now - self.lease_seconds)
+            )
+            return cursor.rowcount == 1
+
+    def _still_owned(self, job_id: str) -> bool:
+        """任务仍由本进程执行：未被（任何进程）取消，也没有被其他进程接手"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, owner FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return row is not None and row["status"] == RUNNING and row["owner"] == self.owner_id
+
+    def _schedule(self, job_id: str) -> None:
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+        self._executor.submit(self._run_job, job_id)
+
+    def submit(self, criterion: Criterion, folder: Path) -> Dict[str, Any]:
+        """
+        提交批量评分任务
+        Args:
+            criterion: 评估标准，提交时保存一份快照
+            folder: 简历文件夹
+        Returns:
+            任务状态
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, criteria_name, criteria_json, folder, status, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    criterion.name,
+                    json.dumps(criterion.to_json(), ensure_ascii=False),
+                    str(folder),
+                    PENDING,
+                    now,
+                    now
+                )
+            )
+        self._schedule(job_id)
+        return self.get_job(job_id)
+
+    def _set_status(
+        self,
+        job_id: str,
+        status: str,
+        error: Optional[str] = None,
+        owner: Optional[str] = None
+    ) -> None:
+        """
+        更新尚未结束的任务的状态，已结束（如已取消）的任务保持不变
+        Args:
+            owner: 不为 None 时只在任务仍由该进程执行时更新
+        """
+        query = (
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+            "WHERE id = ? AND status IN (?, ?)"
+        )
+        params: List[Any] = [status, error, time.time(), job_id, PENDING, RUNNING]
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(owner)
+        with self._connect() as conn:
+            conn.execute(query, params)
+
+    def _run_job(self, job_id: str) -> None:
+        """在线程池中执行任务，已完成的简历会被跳过"""
+        try:
+            if not self._claim(job_id):
+                # 已结束、已取消，或正由其他进程执行
+                return
+            with self._connect() as conn:
+                job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                done = {
+                    row["filename"] for row in conn.execute(
+                        "SELECT filename FROM job_results WHERE job_id = ?", (job_id,)
+                    )
+                }
+
+            cancel_event = self._cancel_events[job_id]
+            compiled = CompiledCriterion(Criterion.from_json(json.loads(job["criteria_json"])))
+            # 按文件名排序，进度和部分结果的顺序稳定，续跑时也一致
+            paths = sorted(Path(job["folder"]).glob("*.pdf"))
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET total = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                    (len(paths), time.time(), job_id, self.owner_id)
+                )
+
+            seq = len(done)
+            for path in paths:
+                if path.name in done:
+                    continue
+                # 取消可能来自其他进程，每份简历之前检查数据库中的状态
+                if cancel_event.is_set() or not self._still_owned(job_id):
+                    return
+
+                try:
+                    documents = self.resume_manager.read_resume(str(path))
+                except HTTPException as e:
+                    documents = _error_documents(path, e.detail)
+                batch = self.scorer.score_resume_matrix(compiled, {path.name: documents})
+                scores = [None if np.isnan(v) else float(v) for v in batch.scores[0]]
+
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO job_results "
+                        "(job_id, seq, filename, overall_score, scores, error) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            job_id,
+                            seq,
+                            path.name,
+                            batch.overall_score(path.name),
+                            json.dumps(scores),
+                            any(doc.metadata.get("error") for doc in documents)
+                        )
+                    )
+                    # 同时续约；完成数按结果行计算，重复写入同一份简历不会多算
+                    conn.execute(
+                        "UPDATE jobs SET completed = "
+                        "(SELECT COUNT(*) FROM job_results WHERE job_id = ?), updated_at = ? "
+                        "WHERE id = ?",
+                        (job_id, time.time(), job_id)
+                    )
+                seq += 1
+
+            self._set_status(job_id, COMPLETED, owner=self.owner_id)
+        except Exception as e:
+            self._set_status(job_id, FAILED, str(e), owner=self.owner_id)
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+    def _job_row(self, job_id: str) -> sqlite3.Row:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Job {job_id} not found"
+            )
+        return row
+
+    @staticmethod
+    def _job_info(row: sqlite3.Row) -> Dict[str, Any]:
+        total = row["total"]
+        if total is None:
+            progress = 0.0
+        else:
+            progress = row["completed"] / total if total else 1.0
+        return {
+            "job_id": row["id"],
+            "criteria": row["criteria_name"],
+            "folder": row["folder"],
+            "status": row["status"],
+            "total": total,
+            "completed": row["completed"],
+            "progress": progress,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        """获取任务状态与进度"""
+        return self._job_info(self._job_row(job_id))
+
+    def list_jobs(self, skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """按提交时间倒序列出任务"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (limit, skip)
+            ).fetchall()
+        return [self._job_info(row) for row in rows]
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """取消尚未结束的任务，已评分的结果会保留"""
+        row = self._job_row(job_id)
+        if row["status"] in (PENDING, RUNNING):
+            self._set_status(job_id, CANCELLED)
+            with self._lock:
+                event = self._cancel_events.get(job_id)
+            if event is not None:
+                event.set()
+        return self.get_job(job_id)
+
+    def get_results(
+        self,
+        job_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        include_tree: bool = False
+    ) -> Dict[str, Any]:
+        """
+        获取任务结果（任务运行中时返回已完成的部分）
+        Args:
+            job_id: 任务 ID
+            skip: 跳过的结果数
+            limit: 返回的最大结果数
+            include_tree: 是否构建每份简历的评分树
+        """
+        row = self._job_row(job_id)
+        compiled = None
+        if include_tree:
+            compiled = CompiledCriterion(Criterion.from_json(json.loads(row["criteria_json"])))
+
+        with self._connect() as conn:
+            result_rows = conn.execute(
+                "SELECT * FROM job_results WHERE job_id = ? ORDER BY seq LIMIT ? OFFSET ?",
+                (job_id, limit, skip)
+            ).fetchall()
+
+        results = {}
+        for result in result_rows:
+            entry: Dict[str, Any] = {"error": bool(result["error"])}
+            if compiled is not None:
+                scores = np.array(
+                    [np.nan if v is None else v for v in json.loads(result["scores"])]
+                )
+                entry["scored_criterion"] = compiled.build_criterion(scores)
+            entry["overall_score"] = result["overall_score"]
+            results[result["filename"]] = entry
+
+        return {**self._job_info(row), "results": results}
+
+    def shutdown(self, wait: bool = False) -> None:
+        """停止接收新任务；未完成的任务在下次启动时继续"""
+        with self._lock:
+            for event in self._cancel_events.values():
+                event.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+_default_manager: Optional[JobManager] = None
+_default_manager_lock = threading.Lock()
+
+def get_default_job_manager() -> JobManager:
+    """获取进程内共享的任务管理器"""
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = JobManager(
+                    resume_manager=get_default_resume_manager(),
+                    scorer=ResumeScorer(seed=42, cache=get_default_leaf_cache())
+                )
+    return _default_manager
+
+# 使用示例：
+"""
+jobs = JobManager(ResumeManager(cache=ExtractionCache()), ResumeScorer(seed=42))
+
+job = jobs.submit(criterion, Path("/path/to/resumes"))
+print(jobs.get_job(job["job_id"]))
+
+# 任务运行中也可以读取已完成的部分结果
+partial = jobs.get_results(job["job_id"], limit=50)
+
+jobs.cancel(job["job_id"])
+"""
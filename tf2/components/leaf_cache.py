@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import sqlite3
+import threading
+import time
+from tf2.components.page import Page
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leaf_scores (
+    leaf_hash TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    scorer_id TEXT NOT NULL,
+    score REAL NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (leaf_hash, text_hash, scorer_id)
+);
+"""
+
+# SQLite 单条语句的参数个数有上限，批量查询时分块
+_CHUNK_SIZE = 300
+
+# 缓存键：(叶子内容哈希, 简历文本哈希, 评分器标识)
+LeafKey = Tuple[str, str, str]
+
+def leaf_hash(content: str, scale: str) -> str:
+    """叶子标准的内容哈希：只取决于内容和量表，与名称、所在的树无关"""
+    return hashlib.sha256(f"{content}\0{scale}".encode("utf-8")).hexdigest()
+
+def text_hash(documents: List[Page]) -> str:
+    """简历文本的哈希"""
+    digest = hashlib.sha256()
+    for doc in documents:
+        digest.update(doc.page_content.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class LeafScoreCache:
+    """
+    叶子评估结果的两级缓存
+
+    内存中的 LRU 在前，SQLite 在后；同一个叶子（内容 + 量表）出现在多棵评估标准树中、
+    或同一份简历在多个标准下评分时，只需要评估一次。只缓存成功的评估结果。
+    """
+
+    def __init__(
+        self,
+        db_path: str = "./.cache/leaf_scores.sqlite",
+        memory_size: int = 100_000
+    ):
+        """
+        初始化叶子评估缓存
+        Args:
+            db_path: SQLite 数据库路径
+            memory_size: 内存 LRU 的最大条目数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[LeafKey, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key: LeafKey, score: float) -> None:
+        """写入内存 LRU，调用方需持有锁"""
+        self._memory[key] = score
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[LeafKey]) -> Dict[LeafKey, float]:
+        """
+        批量查询，先查内存再查 SQLite，SQLite 命中的条目会被放入内存
+        Returns:
+            命中的键到分数的映射
+        """
+        keys = list(dict.fromkeys(keys))
+        found: Dict[LeafKey, float] = {}
+        pending: List[LeafKey] = []
+        with self._lock:
+            for key in keys:
+                score = self._memory.get(key)
+                if score is None:
+                    pending.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = score
+            self._memory_hits += len(found)
+
+        if pending:
+            disk: Dict[LeafKey, float] = {}
+            with self._connect() as conn:
+                for start in range(0, len(pending), _CHUNK_SIZE):
+                    chunk = pending[start:start + _CHUNK_SIZE]
+                    conditions = " OR ".join(
+                        ["(leaf_hash = ? AND text_hash = ? AND scorer_id = ?)"] * len(chunk)
+                    )
+                    rows = conn.execute(
+                        f"SELECT leaf_hash, text_hash, scorer_id, score FROM leaf_scores "
+                        f"WHERE {conditions}",
+                        [part for key in chunk for part in key]
+                    )
+                    for leaf, text, scorer_id, score in rows:
+                        disk[(leaf, text, scorer_id)] = score
+            with self._lock:
+                for key, score in disk.items():
+                    self._remember(key, score)
+                self._disk_hits += len(disk)
+                self._misses += len(pending) - len(disk)
+            found.update(disk)
+        return found
+
+    def get(self, key: LeafKey) -> Optional[float]:
+        """查询单个叶子评估结果"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, scores: Dict[LeafKey, float]) -> None:
+        """批量写入两级缓存"""
+        if not scores:
+            return
+        with self._lock:
+            for key, score in scores.items():
+                self._remember(key, score)
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO leaf_scores "
+                "(leaf_hash, text_hash, scorer_id, score, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(*key, score, now) for key, score in scores.items()]
+            )
+
+    def put(self, key: LeafKey, score: float) -> None:
+        """写入单个叶子评估结果"""
+        self.put_many({key: score})
+
+    def clear_memory(self) -> None:
+        """清空内存层（SQLite 层保留）"""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            hits = self._memory_hits + self._disk_hits
+            return {
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_size": self.memory_size
+            }
+
+_default_cache: Optional[LeafScoreCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_default_leaf_cache() -> LeafScoreCache:
+    """获取进程内共享的叶子评估缓存"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = LeafScoreCache()
+    return _default_cache
+
+# 使用示例：
+"""
+cache = LeafScoreCache("./.cache/leaf_scores.sqlite", memory_size=50_000)
+scorer = AsyncResumeScorer(FakeModelEvaluator(), cache=cache)
+
+# 同一个叶子出现在多棵树中时只会评估一次
+await scorer.score_resume_matrix(compiled_a, documents_batch)
+await scorer.score_resume_matrix(compiled_b, documents_batch)
+print(cache.stats())
+"""
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Hashable, List, Mapping, Set, Tuple
+
+def freeze_value(value: Any) -> Hashable:
+    """
+    把元数据值转换为可哈希的形式
+    dict、list、set 递归转换；转换后相等当且仅当原值相等（与 == 比较一致）
+    """
+    if isinstance(value, dict):
+        return (dict, frozenset((key, freeze_value(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        # 类型作为标签：list 与 tuple 在 Python 中不相等
+        return (type(value), tuple(freeze_value(item) for item in value))
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(freeze_value(item) for item in value))
+    try:
+        hash(value)
+    except TypeError:
+        return (object, repr(value))
+    return value
+
+class MetadataIndex:
+    """
+    元数据倒排索引：(键, 值) -> 条目 ID 集合
+
+    多键查询时按集合大小从小到大求交集；查询值为 None 时与
+    metadata.get(key) == None 的语义一致，即匹配没有该键或该键值为 None 的条目。
+    """
+
+    def __init__(self):
+        self._postings: Dict[Tuple[str, Hashable], Set[Hashable]] = {}
+        # 每个键下值不为 None 的条目，用于回答值为 None 的查询
+        self._has_key: Dict[str, Set[Hashable]] = {}
+        # 每个条目写入的 (键, 值)，删除时使用
+        self._entries: Dict[Hashable, List[Tuple[str, Hashable]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._entries
+
+    def add(self, item_id: Hashable, metadata: Mapping[str, Any]) -> None:
+        """写入条目，已存在时先移除旧的索引项"""
+        self.remove(item_id)
+        pairs = []
+        for key, value in metadata.items():
+            if value is None:
+                continue
+            pair = (key, freeze_value(value))
+            self._postings.setdefault(pair, set()).add(item_id)
+            self._has_key.setdefault(key, set()).add(item_id)
+            pairs.append(pair)
+        self._entries[item_id] = pairs
+
+    def remove(self, item_id: Hashable) -> None:
+        """移除条目"""
+        pairs = self._entries.pop(item_id, None)
+        if pairs is None:
+            return
+        for pair in pairs:
+            postings = self._postings.get(pair)
+            if postings is not None:
+                postings.discard(item_id)
+                if not postings:
+                    del self._postings[pair]
+            holders = self._has_key.get(pair[0])
+            if holders is not None:
+                holders.discard(item_id)
+                if not holders:
+                    del self._has_key[pair[0]]
+
+    def _candidates(self, key: str, value: Any) -> Set[Hashable]:
+        if value is None:
+            holders = self._has_key.get(key, set())
+            return {item_id for item_id in self._entries if item_id not in holders}
+        return self._postings.get((key, freeze_value(value)), set())
+
+    def query(self, metadata_query: Mapping[str, Any]) -> Set[Hashable]:
+        """
+        查询同时满足所有 (键, 值) 条件的条目
+        Args:
+            metadata_query: 元数据条件；为空时返回所有条目
+        """
+        if not metadata_query:
+            return set(self._entries)
+
+        # 值为 None 的条件需要遍历全部条目，放到最后只在候选集上检查
+        exact = [(key, value) for key, value in metadata_query.items() if value is not None]
+        missing = [key for key, value in metadata_query.items() if value is None]
+
+        if exact:
+            postings = sorted(
+                (self._candidates(key, value) for key, value in exact), key=len
+            )
+            result = set(postings[0])
+            for other in postings[1:]:
+                if not result:
+                    break
+                result &= other
+        else:
+            result = self._candidates(missing.pop(), None)
+
+        for key in missing:
+            holders = self._has_key.get(key, set())
+            result = {item_id for item_id in result if item_id not in holders}
+        return result
+
+# 使用示例：
+"""
+index = MetadataIndex()
+index.add("數據科學家評估標準", {"team": "data", "locale": "zh-TW"})
+
+# 多键查询按候选集大小从小到大求交集
+names = index.query({"team": "data", "locale": "zh-TW"})
+"""
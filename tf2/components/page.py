@@ -0,0 +1,36 @@
+from typing import Any, Dict, Optional
+
+class Page:
+    """
+    简历的一页（或一个片段）：文本和元数据
+
+    只有两个槽位的轻量记录，字段名与 langchain 的 Document 相同
+    （page_content、metadata），可以直接传给需要这两个属性的代码。
+    """
+
+    __slots__ = ("page_content", "metadata")
+
+    def __init__(self, page_content: str = "", metadata: Optional[Dict[str, Any]] = None):
+        self.page_content = page_content
+        self.metadata = metadata if metadata is not None else {}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Page):
+            return NotImplemented
+        return self.page_content == other.page_content and self.metadata == other.metadata
+
+    def __repr__(self) -> str:
+        return f"Page(page_content={self.page_content!r}, metadata={self.metadata!r})"
+
+    def __getstate__(self):
+        # 在进程池之间传递时使用
+        return self.page_content, self.metadata
+
+    def __setstate__(self, state) -> None:
+        self.page_content, self.metadata = state
+
+# 使用示例：
+"""
+page = Page(page_content="熟悉 Python 與 SQL", metadata={"source": "example.pdf", "page": 0})
+print(page.page_content, page.metadata["page"])
+"""
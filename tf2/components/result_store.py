@@ -0,0 +1,232 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+import sqlite3
+import threading
+import time
+import numpy as np
+from tf2.db.schemas import Criterion
+from tf2.components.criteria_manager import get_default_criteria_manager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    resume_hash TEXT NOT NULL,
+    criteria_hash TEXT NOT NULL,
+    scorer_id TEXT NOT NULL,
+    criteria_name TEXT NOT NULL,
+    resume_name TEXT NOT NULL,
+    overall_score REAL,
+    scores BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (resume_hash, criteria_hash, scorer_id)
+);
+CREATE INDEX IF NOT EXISTS results_criteria_name ON results (criteria_name);
+CREATE INDEX IF NOT EXISTS results_criteria ON results (criteria_hash, scorer_id);
+"""
+
+# SQLite 单条语句的参数个数有上限，批量查询时分块
+_CHUNK_SIZE = 500
+
+@dataclass
+class StoredResult:
+    """一条已保存的评分结果"""
+    resume_hash: str
+    resume_name: str
+    overall_score: Optional[float]
+    # 按 CompiledCriterion 前序排列的节点分数，NaN 表示缺失
+    scores: np.ndarray
+
+class ResultStore:
+    """
+    评分结果存储
+
+    以 (简历内容哈希, 评估标准内容哈希, 评分器标识) 为键保存每个节点的分数；
+    相同输入再次评分时直接返回已保存的结果。
+    """
+
+    def __init__(self, db_path: str = "./.cache/results.sqlite"):
+        """
+        初始化结果存储
+        Args:
+            db_path: SQLite 数据库路径
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_result(row: sqlite3.Row) -> StoredResult:
+        return StoredResult(
+            resume_hash=row["resume_hash"],
+            resume_name=row["resume_name"],
+            overall_score=row["overall_score"],
+            scores=np.frombuffer(row["scores"], dtype="<f8").copy()
+        )
+
+    def get(
+        self,
+        resume_hash: str,
+        criteria_hash: str,
+        scorer_id: str
+    ) -> Optional[StoredResult]:
+        """查询单条结果"""
+        return self.get_many([resume_hash], criteria_hash, scorer_id).get(resume_hash)
+
+    def get_many(
+        self,
+        resume_hashes: Iterable[str],
+        criteria_hash: str,
+        scorer_id: str
+    ) -> Dict[str, StoredResult]:
+        """
+        批量查询结果
+        Returns:
+            简历哈希到结果的映射，只包含命中的简历
+        """
+        hashes = list(dict.fromkeys(resume_hashes))
+        results: Dict[str, StoredResult] = {}
+        with self._connect() as conn:
+            for start in range(0, len(hashes), _CHUNK_SIZE):
+                chunk = hashes[start:start + _CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT * FROM results WHERE criteria_hash = ? AND scorer_id = ? "
+                    f"AND resume_hash IN ({placeholders})",
+                    (criteria_hash, scorer_id, *chunk)
+                )
+                for row in rows:
+                    results[row["resume_hash"]] = self._to_result(row)
+        return results
+
+    def put_many(
+        self,
+        criteria_name: str,
+        criteria_hash: str,
+        scorer_id: str,
+        results: Sequence[StoredResult]
+    ) -> None:
+        """批量保存结果（同键覆盖）"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (resume_hash, criteria_hash, scorer_id, "
+                "criteria_name, resume_name, overall_score, scores, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        result.resume_hash,
+                        criteria_hash,
+                        scorer_id,
+                        criteria_name,
+                        result.resume_name,
+                        result.overall_score,
+                        np.asarray(result.scores, dtype="<f8").tobytes(),
+                        now
+                    )
+                    for result in results
+                ]
+            )
+
+    def put(
+        self,
+        criteria_name: str,
+        criteria_hash: str,
+        scorer_id: str,
+        result: StoredResult
+    ) -> None:
+        """保存单条结果"""
+        self.put_many(criteria_name, criteria_hash, scorer_id, [result])
+
+    def results_for(self, criteria_hash: str, scorer_id: Optional[str] = None) -> List[StoredResult]:
+        """列出某个标准版本（可选限定评分器）下的所有结果"""
+        query = "SELECT * FROM results WHERE criteria_hash = ?"
+        params: tuple = (criteria_hash,)
+        if scorer_id is not None:
+            query += " AND scorer_id = ?"
+            params += (scorer_id,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY resume_name", params).fetchall()
+        return [self._to_result(row) for row in rows]
+
+    def iter_results(
+        self,
+        criteria_hash: str,
+        scorer_id: Optional[str] = None,
+        batch_size: int = _CHUNK_SIZE
+    ) -> Iterator[List[StoredResult]]:
+        """按批次迭代某个标准版本下的结果，内存中最多同时保存一批"""
+        query = "SELECT * FROM results WHERE criteria_hash = ?"
+        params: tuple = (criteria_hash,)
+        if scorer_id is not None:
+            query += " AND scorer_id = ?"
+            params += (scorer_id,)
+        with self._connect() as conn:
+            cursor = conn.execute(query + " ORDER BY resume_name", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [self._to_result(row) for row in rows]
+    
+    def invalidate_criteria(self, criteria_name: str, keep_hash: Optional[str] = None) -> int:
+        """
+        删除某个标准的旧结果
+        Args:
+            criteria_name: 标准名称
+            keep_hash: 保留该版本的结果；为 None 时删除该标准的全部结果
+        Returns:
+            删除的条数
+        """
+        with self._connect() as conn:
+            if keep_hash is None:
+                cursor = conn.execute(
+                    "DELETE FROM results WHERE criteria_name = ?", (criteria_name,)
+                )
+            else:
+                cursor = conn.execute(
+                    "DELETE FROM results WHERE criteria_name = ? AND criteria_hash != ?",
+                    (criteria_name, keep_hash)
+                )
+            return cursor.rowcount
+
+    def on_criteria_changed(self, name: str, criterion: Optional[Criterion]) -> None:
+        """CriteriaManager 的变更回调：标准被替换或删除时清理旧结果"""
+        self.invalidate_criteria(
+            name, keep_hash=criterion.content_hash() if criterion is not None else None
+        )
+
+_default_store: Optional[ResultStore] = None
+_default_store_lock = threading.Lock()
+
+def get_default_result_store() -> ResultStore:
+    """获取进程内共享的结果存储，并在共享的标准管理器上注册失效回调"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                store = ResultStore()
+                get_default_criteria_manager().add_listener(store.on_criteria_changed)
+                _default_store = store
+    return _default_store
+
+# 使用示例：
+"""
+store = ResultStore("./.cache/results.sqlite")
+compiled = await criteria_manager.get_compiled_criteria("數據科學家評估標準")
+
+hits = store.get_many(resume_hashes, compiled.content_hash, scorer.scorer_id)
+misses = [h for h in resume_hashes if h not in hits]
+"""
@@ -0,0 +1,251 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    filename TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    mime TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+"""
+
+# libmagic 判断 PDF 只需要文件头
+_SNIFF_BYTES = 8192
+
+class ResumeIndex:
+    """
+    简历文件夹的持久化索引
+
+    记录每个 PDF 的路径、大小、mtime、内容哈希和 MIME 类型；
+    重新扫描时每个文件只调用一次 stat()，只有 (大小, mtime) 变化的文件
+    才会重新计算哈希并调用 libmagic。
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        index_dir: str = "./.cache/index",
+        min_rescan_interval: float = 2.0
+    ):
+        """
+        初始化索引
+        Args:
+            folder: 简历文件夹
+            index_dir: 索引数据库所在目录，每个文件夹一个 SQLite 文件
+            min_rescan_interval: 两次自动重新扫描之间的最小间隔（秒）
+        """
+        self.folder = Path(folder)
+        self._resolved_folder = self.folder.resolve()
+        key = hashlib.sha1(str(self._resolved_folder).encode("utf-8")).hexdigest()
+        self.db_path = Path(index_dir) / f"{key}.sqlite"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.min_rescan_interval = min_rescan_interval
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+        self._magic = None
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @property
+    def _mime(self):
+        """libmagic 在第一次检测文件类型时才加载"""
+        if self._magic is None:
+            import magic
+            self._magic = magic.Magic(mime=True)
+        return self._magic
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _fingerprint(self, path: Path) -> Tuple[str, str]:
+        """读取一遍文件，同时计算 SHA-256 并用文件头检测 MIME 类型"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            head = f.read(_SNIFF_BYTES)
+            digest.update(head)
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest(), self._mime.from_buffer(head)
+
+    def rescan(self) -> Dict[str, int]:
+        """
+        增量扫描文件夹
+        Returns:
+            新增、更新、删除、未变化的文件数
+        """
+        with self._lock:
+            with self._connect() as conn:
+                known = {
+                    row["filename"]: (row["size"], row["mtime_ns"])
+                    for row in conn.execute("SELECT filename, size, mtime_ns FROM files")
+                }
+
+            upserts = []
+            seen = set()
+            added = updated = 0
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    # 与 glob("*.pdf") 相同：忽略隐藏文件，只看 .pdf 后缀
+                    if entry.name.startswith(".") or not entry.name.endswith(".pdf"):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    seen.add(entry.name)
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                    previous = known.get(entry.name)
+                    if previous == signature:
+                        continue
+                    try:
+                        sha256, mime = self._fingerprint(Path(entry.path))
+                    except OSError:
+                        continue
+                    upserts.append((
+                        entry.name,
+                        entry.path,
+                        stat.st_size,
+                        stat.st_mtime,
+                        stat.st_mtime_ns,
+                        sha256,
+                        mime
+                    ))
+                    if previous is None:
+                        added += 1
+                    else:
+                        updated += 1
+
+            removed = [(name,) for name in known if name not in seen]
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files "
+                    "(filename, path, size, mtime, mtime_ns, sha256, mime) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    upserts
+                )
+                conn.executemany("DELETE FROM files WHERE filename = ?", removed)
+            self._last_scan = time.monotonic()
+
+        return {
+            "added": added,
+            "updated": updated,
+            "removed": len(removed),
+            "unchanged": len(seen) - added - updated
+        }
+
+    def refresh(self, force: bool = False) -> None:
+        """距离上次扫描超过 min_rescan_interval 时重新扫描"""
+        if force or time.monotonic() - self._last_scan >= self.min_rescan_interval:
+            self.rescan()
+
+    def entries(self, pdf_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        按文件名顺序列出索引中的文件
+        Args:
+            pdf_only: 只返回 MIME 类型为 application/pdf 的文件
+        """
+        query = "SELECT * FROM files"
+        params: Tuple[Any, ...] = ()
+        if pdf_only:
+            query += " WHERE mime = ?"
+            params = ("application/pdf",)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY filename", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, filename: str) -> Optional[Dict[str, Any]]:
+        """按文件名查询索引条目"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM files WHERE filename = ?", (filename,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def lookup(self, path: Path) -> Optional[Dict[str, Any]]:
+        """
+        查询文件的索引条目，只有文件自索引后未变化时才返回
+        调用方可以直接使用其中的哈希和 MIME 类型而不必重新读取文件
+        """
+        path = Path(path)
+        if path.parent != self.folder and path.parent.resolve() != self._resolved_folder:
+            return None
+        entry = self.get(path.name)
+        if entry is None:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+            return None
+        return entry
+
+    def record(self, path: Path, sha256: str, head: bytes) -> Dict[str, Any]:
+        """
+        登记一个已知哈希的新文件（例如边上传边计算哈希），下次扫描时不必重新读取
+        Args:
+            path: 文件夹中的文件路径
+            sha256: 文件内容哈希
+            head: 文件开头至少 _SNIFF_BYTES 字节（文件更短时为全部内容），用于检测 MIME 类型
+        """
+        path = Path(path)
+        stat = path.stat()
+        entry = {
+            "filename": path.name,
+            "path": str(self.folder / path.name),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "mime": self._mime.from_buffer(head[:_SNIFF_BYTES])
+        }
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO files "
+                    "(filename, path, size, mtime, mtime_ns, sha256, mime) "
+                    "VALUES (:filename, :path, :size, :mtime, :mtime_ns, :sha256, :mime)",
+                    entry
+                )
+        return entry
+
+    def find_by_hash(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """按内容哈希查找文件"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM files WHERE sha256 = ? ORDER BY filename LIMIT 1",
+                (sha256,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+# 使用示例：
+"""
+index = ResumeIndex(Path("/path/to/resumes"))
+
+# 第一次扫描会计算所有文件的哈希，之后只处理变化的文件
+print(index.rescan())
+
+for entry in index.entries(pdf_only=True):
+    print(entry["filename"], entry["size"], entry["sha256"])
+"""
@@ -1,19 +1,58 @@
+from collections import deque
 from pathlib import Path
-from typing import List, Optional
-from langchain.document_loaders import PyPDFLoader
-from langchain.schema import Document
-import magic
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from tf2.components.page import Page
 from fastapi import HTTPException
+from tf2.components.extraction_cache import ExtractionCache
+from tf2.components.resume_index import ResumeIndex
 
 class ResumeManager:
-    def __init__(self, base_folder: Optional[str] = None):
+    def __init__(
+        self,
+        base_folder: Optional[str] = None,
+        max_workers: int = 1,
+        extraction_timeout: Optional[float] = None,
+        cache: Optional[ExtractionCache] = None,
+        index_dir: Optional[str] = None,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ):
         """
         初始化简历管理器
         Args:
             base_folder: 简历文件夹的基础路径
+            max_workers: read_all_resumes 使用的进程数，1 表示串行解析
+            extraction_timeout: 并行解析时单个文件的超时时间（秒），None 表示不限
+            cache: 提取结果缓存，命中时跳过 libmagic 检测和 PDF 解析
+            index_dir: 文件夹索引目录；设置后列表和元数据由增量索引提供
+            max_pages: 每份简历最多读取的页数，None 表示不限
+            max_chars: 每份简历最多读取的字符数，超出部分被截断，None 表示不限
         """
         self.base_folder = Path(base_folder) if base_folder else None
-        self._mime = magic.Magic(mime=True)
+        self.max_workers = max_workers
+        self.extraction_timeout = extraction_timeout
+        self.cache = cache
+        self.index_dir = index_dir
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.index: Optional[ResumeIndex] = None
+        if self.base_folder and index_dir:
+            self.index = ResumeIndex(self.base_folder, index_dir)
+        self._magic = None
+    
+    @property
+    def _mime(self):
+        """libmagic 在第一次检测文件类型时才加载，只处理评估标准的进程不需要它"""
+        if self._magic is None:
+            import magic
+            self._magic = magic.Magic(mime=True)
+        return self._magic
     
     def set_base_folder(self, folder_path: str) -> None:
         """设置基础文件夹路径"""
@@ -29,19 +68,121 @@ class ResumeManager:
                 detail=f"Path {folder_path} is not a directory"
             )
         self.base_folder = path
+        if self.index_dir:
+            self.index = ResumeIndex(path, self.index_dir)
+    
+    def _index_entry(self, path: Path) -> Optional[dict]:
+        """文件自索引后未变化时返回索引条目"""
+        if self.index is None:
+            return None
+        return self.index.lookup(path)
     
-    def _is_pdf(self, file_path: Path) -> bool:
-        """检查文件是否为 PDF"""
+    def _is_pdf(self, file_path: Path, entry: Optional[dict] = None) -> bool:
+        """检查文件是否为 PDF，有有效的索引条目时直接使用其中的 MIME 类型"""
+        if entry is not None:
+            return entry["mime"] == 'application/pdf'
         mime_type = self._mime.from_file(str(file_path))
         return mime_type == 'application/pdf'
     
-    def read_resume(self, file_path: str) -> List[Document]:
+    def _content_hash(self, path: Path, entry: Optional[dict] = None) -> Optional[str]:
+        """计算用于缓存的内容哈希，未启用缓存或读取失败时返回 None"""
+        if self.cache is None:
+            return None
+        if entry is not None:
+            return entry["sha256"]
+        try:
+            return self.cache.hash_file(path)
+        except OSError:
+            return None
+    
+    def content_hash(self, file_path: str) -> Optional[str]:
+        """
+        文件内容的 SHA-256，文件未变化时直接使用索引中的哈希
+        Returns:
+            文件不可读时返回 None
+        """
+        path = Path(file_path)
+        entry = self._index_entry(path)
+        if entry is not None:
+            return entry["sha256"]
+        try:
+            return ExtractionCache.hash_file(path)
+        except OSError:
+            return None
+    
+    def extraction_key(
+        self,
+        content_hash: Optional[str],
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        提取缓存键：有页数或字符数限制时附加在内容哈希之后，不同限制下的结果分别缓存
+        max_pages、max_chars 默认使用管理器的设置
+        """
+        if max_pages is None:
+            max_pages = self.max_pages
+        if max_chars is None:
+            max_chars = self.max_chars
+        if content_hash is None or (max_pages is None and max_chars is None):
+            return content_hash
+        return f"{content_hash}:pages={max_pages}:chars={max_chars}"
+    
+    def _read_cached(self, path: Path, key: Optional[str]) -> Optional[List[Page]]:
+        """从缓存读取页面，source 元数据指向当前路径"""
+        if key is None:
+            return None
+        pages = self.cache.get(key)
+        if pages is None:
+            return None
+        return [
+            Page(
+                page_content=text,
+                metadata={**metadata, "source": str(path)} if "source" in metadata else metadata
+            )
+            for text, metadata in pages
+        ]
+    
+    def _store_cached(self, key: Optional[str], documents: List[Page]) -> None:
+        if key is None:
+            return
+        self.cache.put(
+            key,
+            [(doc.page_content, doc.metadata) for doc in documents]
+        )
+    
+    def read_resume(
+        self,
+        file_path: str,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> List[Page]:
         """
         读取单个简历文件
         Args:
             file_path: PDF 文件路径
+            max_pages: 最多读取的页数，默认使用 self.max_pages
+            max_chars: 最多读取的字符数，默认使用 self.max_chars
         Returns:
-            Document 列表，每个页面一个 Document
+            Page 列表，每个页面一个 Page
+        """
+        return list(self.iter_pages(file_path, max_pages, max_chars))
+    
+    def iter_pages(
+        self,
+        file_path: str,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> Iterator[Page]:
+        """
+        逐页读取简历，只在需要下一页时才解析；调用方可以随时停止迭代
+        文件不存在或不是 PDF 时立即抛出异常，而不是在第一次迭代时
+        Args:
+            file_path: PDF 文件路径
+            max_pages: 最多读取的页数，默认使用 self.max_pages
+            max_chars: 最多读取的字符数，超出的页面被截断并标记 truncated，默认使用 self.max_chars
+        Returns:
+            Page 的迭代器，每个页面一个 Page
         """
         path = Path(file_path)
         if not path.exists():
@@ -49,47 +190,230 @@ class ResumeManager:
                 status_code=404,
                 detail=f"File {file_path} not found"
             )
+        if max_pages is None:
+            max_pages = self.max_pages
+        if max_chars is None:
+            max_chars = self.max_chars
+        
+        entry = self._index_entry(path)
+        key = self.extraction_key(self._content_hash(path, entry), max_pages, max_chars)
+        cached = self._read_cached(path, key)
+        if cached is not None:
+            return iter(cached)
         
-        if not self._is_pdf(path):
+        if not self._is_pdf(path, entry):
             raise HTTPException(
                 status_code=400,
                 detail=f"File {file_path} is not a PDF"
             )
-        
+        return self._extract_pages(file_path, key, max_pages, max_chars)
+    
+    def _extract_pages(
+        self,
+        file_path: str,
+        key: Optional[str],
+        max_pages: Optional[int],
+        max_chars: Optional[int]
+    ) -> Iterator[Page]:
+        """解析页面；读到末尾或达到限制时写入缓存，调用方中途停止时不写入"""
+        pages = _limit_pages(_pdf_pages(file_path), max_pages, max_chars)
+        documents = []
         try:
-            loader = PyPDFLoader(str(path))
-            return loader.load()
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error reading PDF {file_path}: {str(e)}"
-            )
+            while True:
+                try:
+                    doc = next(pages, None)
+                except Exception as e:
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Error reading PDF {file_path}: {str(e)}"
+                    )
+                if doc is None:
+                    break
+                documents.append(doc)
+                yield doc
+        finally:
+            pages.close()
+        
+        self._store_cached(key, documents)
     
-    def read_all_resumes(self) -> dict[str, List[Document]]:
+    def read_all_resumes(
+        self,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> dict[str, List[Page]]:
         """
         读取文件夹中的所有简历
+        Args:
+            max_workers: 解析进程数，默认使用 self.max_workers；大于 1 时使用进程池
+            timeout: 并行解析时单个文件的超时时间（秒），默认使用 self.extraction_timeout
+        Returns:
+            字典，键为文件名，值为 Page 列表
+        """
+        return self.read_resumes(
+            self.list_resume_paths(), max_workers=max_workers, timeout=timeout
+        )
+    
+    def read_resumes(
+        self,
+        paths: List[Path],
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> dict[str, List[Page]]:
+        """
+        读取指定的简历文件，失败的文件返回错误 Page
+        Args:
+            paths: 简历路径列表
+            max_workers: 解析进程数，默认使用 self.max_workers
+            timeout: 并行解析时单个文件的超时时间（秒），默认使用 self.extraction_timeout
         Returns:
-            字典，键为文件名，值为 Document 列表
+            字典，键为文件名，值为 Page 列表
+        """
+        workers = max_workers if max_workers is not None else self.max_workers
+        if timeout is None:
+            timeout = self.extraction_timeout
+        if workers > 1 and len(paths) > 1:
+            return self._read_resumes_parallel(paths, min(workers, len(paths)), timeout)
+        
+        return dict(self._iter_paths(paths))
+    
+    def iter_resumes(
+        self,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> Iterator[Tuple[str, List[Page]]]:
         """
+        逐个读取文件夹中的简历，读完一份立即返回一份
+        文件夹未设置时立即抛出异常，而不是在第一次迭代时
+        Args:
+            max_pages: 每份简历最多读取的页数，默认使用 self.max_pages
+            max_chars: 每份简历最多读取的字符数，默认使用 self.max_chars
+        Returns:
+            (文件名, Page 列表) 的迭代器，读取失败的文件返回错误 Page
+        """
+        return self._iter_paths(self.list_resume_paths(), max_pages, max_chars)
+    
+    def list_resume_paths(self) -> List[Path]:
+        """文件夹中所有 .pdf 文件；启用索引时从索引读取"""
         if not self.base_folder:
             raise HTTPException(
                 status_code=400,
                 detail="Base folder not set"
             )
-        
-        results = {}
-        for file_path in self.base_folder.glob("*.pdf"):
+        if self.index is not None:
+            self.index.refresh()
+            return [Path(entry["path"]) for entry in self.index.entries()]
+        return list(self.base_folder.glob("*.pdf"))
+    
+    def _iter_paths(
+        self,
+        paths: List[Path],
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> Iterator[Tuple[str, List[Page]]]:
+        for file_path in paths:
             try:
-                results[file_path.name] = self.read_resume(str(file_path))
+                yield file_path.name, self.read_resume(str(file_path), max_pages, max_chars)
             except HTTPException as e:
                 # 记录错误但继续处理其他文件
-                results[file_path.name] = [
-                    Document(
-                        page_content=f"Error reading file: {str(e.detail)}",
-                        metadata={"error": True, "file_path": str(file_path)}
-                    )
-                ]
-        return results
+                yield file_path.name, _error_documents(file_path, e.detail)
+    
+    def _read_resumes_parallel(
+        self,
+        paths: List[Path],
+        workers: int,
+        timeout: Optional[float]
+    ) -> dict[str, List[Page]]:
+        """
+        使用有界进程池并行解析，结果与串行路径一致
+        同时提交的任务数不超过进程数，因此超时从任务实际开始执行时计算；
+        超时的文件记为错误 Page，卡住的进程在结束时被终止
+        """
+        results: Dict[Path, List[Page]] = {}
+        done: "queue.Queue[Tuple[int, Path, Tuple[bool, Any]]]" = queue.Queue()
+        pending = deque()
+        hashes: Dict[Path, Optional[str]] = {}
+        # 先在主进程中查缓存，只把未命中的文件交给进程池
+        for path in paths:
+            key = self.extraction_key(self._content_hash(path, self._index_entry(path)))
+            cached = self._read_cached(path, key)
+            if cached is not None:
+                results[path] = cached
+            else:
+                hashes[path] = key
+                pending.append(path)
+        running: Dict[Path, float] = {}
+        timed_out = set()
+        free = workers
+        # 进程池每重建一次加一，旧进程池的回调会被忽略
+        generation = 0
+        if not pending:
+            return {path.name: results[path] for path in paths}
+        workers = min(workers, len(pending))
+        # spawn 避免在多线程的服务进程中 fork（线程池、事件循环持有的锁会被复制到子进程）
+        context = multiprocessing.get_context("spawn")
+        pool = context.Pool(processes=workers)
+        
+        def submit(path: Path) -> None:
+            current = generation
+            pool.apply_async(
+                _extract_worker,
+                (str(path), self.max_pages, self.max_chars),
+                callback=lambda result: done.put((current, path, result)),
+                error_callback=lambda error: done.put((current, path, (False, str(error))))
+            )
+        
+        try:
+            while pending or running:
+                if free == 0 and not running:
+                    # 所有进程都卡在超时任务上：换一个新的进程池
+                    pool.terminate()
+                    pool = context.Pool(processes=workers)
+                    generation += 1
+                    timed_out.clear()
+                    free = workers
+                
+                while pending and free > 0:
+                    path = pending.popleft()
+                    submit(path)
+                    running[path] = time.monotonic() + timeout if timeout else float("inf")
+                    free -= 1
+                
+                next_deadline = min(running.values(), default=float("inf"))
+                wait = None if next_deadline == float("inf") else max(0.0, next_deadline - time.monotonic())
+                try:
+                    task_generation, path, (ok, payload) = done.get(timeout=wait)
+                except queue.Empty:
+                    now = time.monotonic()
+                    for path, deadline in list(running.items()):
+                        if deadline <= now:
+                            del running[path]
+                            timed_out.add(path)
+                            results[path] = _error_documents(
+                                path, f"Timed out after {timeout} seconds"
+                            )
+                    continue
+                
+                if task_generation != generation:
+                    continue
+                # 进程已空闲；超时后才返回的结果直接丢弃
+                free += 1
+                if path in timed_out:
+                    timed_out.discard(path)
+                    continue
+                del running[path]
+                if ok:
+                    self._store_cached(hashes[path], payload)
+                    results[path] = payload
+                else:
+                    results[path] = _error_documents(path, payload)
+        finally:
+            if timed_out:
+                pool.terminate()
+            else:
+                pool.close()
+                pool.join()
+        
+        return {path.name: results[path] for path in paths}
     
     def get_resume_metadata(self) -> List[dict]:
         """
@@ -103,6 +427,18 @@ class ResumeManager:
                 detail="Base folder not set"
             )
         
+        if self.index is not None:
+            self.index.refresh()
+            return [
+                {
+                    "filename": entry["filename"],
+                    "size": entry["size"],
+                    "last_modified": entry["mtime"],
+                    "path": entry["path"]
+                }
+                for entry in self.index.entries(pdf_only=True)
+            ]
+        
         metadata = []
         for file_path in self.base_folder.glob("*.pdf"):
             if self._is_pdf(file_path):
@@ -114,6 +450,103 @@ class ResumeManager:
                 })
         return metadata
 
+def _pdf_pages(file_path: str) -> Iterator[Page]:
+    """
+    逐页解析 PDF，只在取下一页时才提取该页的文本
+    页面内容和元数据（source、page）与 PyPDFLoader 相同，已有的提取缓存仍然有效
+    """
+    # pypdf 在第一次解析 PDF 时才导入
+    from pypdf import PdfReader
+    with open(file_path, "rb") as f:
+        reader = PdfReader(f)
+        for page_number, page in enumerate(reader.pages):
+            yield Page(
+                page_content=page.extract_text(),
+                metadata={"source": file_path, "page": page_number}
+            )
+
+def _limit_pages(
+    pages: Iterator[Page],
+    max_pages: Optional[int],
+    max_chars: Optional[int]
+) -> Iterator[Page]:
+    """截取前 max_pages 页、共 max_chars 个字符，达到限制后不再读取下一页"""
+    if max_pages is not None:
+        pages = itertools.islice(pages, max_pages)
+    remaining = max_chars
+    for doc in pages:
+        if remaining is None:
+            yield doc
+            continue
+        if len(doc.page_content) >= remaining:
+            if len(doc.page_content) > remaining:
+                doc = Page(
+                    page_content=doc.page_content[:remaining],
+                    metadata={**doc.metadata, "truncated": True}
+                )
+            yield doc
+            return
+        remaining -= len(doc.page_content)
+        yield doc
+
+def _error_documents(file_path: Path, detail: Any) -> List[Page]:
+    """读取失败时返回的占位 Page"""
+    return [
+        Page(
+            page_content=f"Error reading file: {str(detail)}",
+            metadata={"error": True, "file_path": str(file_path)}
+        )
+    ]
+
+_worker_manager: Optional[ResumeManager] = None
+
+def _extract_worker(
+    file_path: str,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None
+) -> Tuple[bool, Any]:
+    """
+    进程池中执行的解析任务
+    Returns:
+        (是否成功, Page 列表或错误信息)
+    """
+    global _worker_manager
+    if _worker_manager is None:
+        _worker_manager = ResumeManager()
+    try:
+        return True, _worker_manager.read_resume(file_path, max_pages, max_chars)
+    except HTTPException as e:
+        return False, e.detail
+    except Exception as e:
+        return False, str(e)
+
+_default_manager: Optional[ResumeManager] = None
+_default_manager_lock = threading.Lock()
+
+def _env_limit(name: str) -> Optional[int]:
+    """从环境变量读取读取限制，未设置或为 0 表示不限"""
+    value = int(os.environ.get(name, 0))
+    return value if value > 0 else None
+
+def get_default_resume_manager() -> ResumeManager:
+    """
+    获取进程内共享的简历管理器
+    设置的简历文件夹在请求之间保持，并使用默认的提取缓存和文件夹索引；
+    默认完整读取每份简历，不会静默丢弃内容；可以用 TF2_RESUME_MAX_PAGES、TF2_RESUME_MAX_CHARS
+    限制每份简历读取的页数和字符数
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = ResumeManager(
+                    cache=ExtractionCache(),
+                    index_dir="./.cache/index",
+                    max_pages=_env_limit("TF2_RESUME_MAX_PAGES"),
+                    max_chars=_env_limit("TF2_RESUME_MAX_CHARS")
+                )
+    return _default_manager
+
 # FastAPI 路由示例：
 """
 @router.post("/resumes/folder")
@@ -146,8 +579,16 @@ if __name__ == "__main__":
     # 读取所有简历
     all_resumes = manager.read_all_resumes()
 
+    # 使用 8 个进程并行读取，单个文件最多解析 30 秒
+    all_resumes = manager.read_all_resumes(max_workers=8, timeout=30)
+
     # 获取元数据
     metadata = manager.get_resume_metadata()
 
     # 读取单个简历
     documents = manager.read_resume("/path/to/resumes/example.pdf")
+
+    # 逐页读取，最多 10 页；找到需要的内容后可以提前停止，剩余页面不会被解析
+    for page in manager.iter_pages("/path/to/resumes/portfolio.pdf", max_pages=10):
+        if "Python" in page.page_content:
+            break
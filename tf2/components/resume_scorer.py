@@ -1,80 +1,165 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+import hashlib
 import random
+import numpy as np
 from tf2.db.schemas import Criterion
-from langchain.schema import Document
+from tf2.components.compiled_criterion import BatchScores, CompiledCriterion, ScoredCriterion
+from tf2.components.leaf_cache import LeafScoreCache, leaf_hash, text_hash
+from tf2.components.page import Page
 
 class ResumeScorer:
-    def __init__(self, seed: Optional[int] = None):
+    def __init__(self, seed: Optional[int] = None, cache: Optional[LeafScoreCache] = None):
         """
         初始化简历评分器
         Args:
-            seed: 随机数种子，用于生成可重复的随机分数
+            seed: 随机数种子，用于生成可重复的随机分数；每个节点的分数只由
+                (种子, 节点内容哈希, 简历文本哈希) 决定，文本相同的简历分数相同，
+                结果与简历标识、评分顺序、并行方式和缓存状态无关，也不会影响全局的 random 模块
+            cache: 可选的叶子评估缓存，矩阵评分时已缓存的叶子直接使用缓存的分数
         """
-        if seed is not None:
-            random.seed(seed)
+        self.seed = seed
+        self.cache = cache
+    
+    @property
+    def scorer_id(self) -> str:
+        """评分器标识与版本，作为评分结果缓存键的一部分"""
+        return f"random-v4:seed={self.seed}"
     
     def _generate_random_score(self) -> float:
-        """生成0到1之间的随机分数"""
-        return round(random.uniform(0.0, 1.0), 2)
+        """生成0到1之间的随机分数，不可重复"""
+        return round(random.Random().uniform(0.0, 1.0), 2)
     
-    def _fill_criterion_scores(self, criterion: Criterion) -> Criterion:
-        """递归地为标准及其子标准填充随机分数"""
-        # 为当前标准生成随机分数
-        criterion.score = self._generate_random_score()
-        
-        # 递归处理所有子标准
-        scored_children = []
-        for weight, child in criterion.children:
-            scored_child = self._fill_criterion_scores(child)
-            scored_children.append((weight, scored_child))
-        
-        criterion.children = scored_children
-        return criterion
+    def _node_score(self, node: str, resume_text: str) -> float:
+        """
+        节点的分数：与叶子缓存键相同，只取决于节点内容和简历文本
+        缓存命中与否、哪个线程先写入缓存，得到的分数都相同
+        """
+        if self.seed is None:
+            return self._generate_random_score()
+        digest = hashlib.sha256(
+            f"{self.seed}\0{node}\0{resume_text}".encode("utf-8")
+        ).digest()
+        return round(int.from_bytes(digest[:7], "big") / (1 << 56), 2)
     
     def score_resume(
         self, 
         criterion: Criterion,
-        documents: list[Document]
+        documents: list[Page],
+        resume_id: Optional[str] = None
     ) -> Criterion:
         """
-        为简历生成评分（模拟版本）
+        为简历生成评分（模拟版本），传入的评估标准不会被修改
         
         Args:
             criterion: 评估标准对象
             documents: 简历文档（这里不会实际使用，但保持接口一致性）
+            resume_id: 简历标识（通常为文件名），不影响分数；默认使用简历文本哈希
         
         Returns:
-            填充了分数的评估标准对象
+            新构建的带分数的评估标准对象
         """
-        return self._fill_criterion_scores(criterion)
+        return self.score_resume_overlay(criterion, documents, resume_id).to_criterion()
+    
+    def score_resume_overlay(
+        self,
+        criterion: Criterion,
+        documents: list[Page],
+        resume_id: Optional[str] = None
+    ) -> ScoredCriterion:
+        """为单份简历评分，返回共享模板 + 分数数组，不构建 Criterion 树"""
+        if resume_id is None:
+            resume_id = text_hash(documents)
+        compiled = CompiledCriterion.intern(criterion)
+        return self.score_resume_matrix(compiled, {resume_id: documents}).overlay(resume_id)
     
     def score_resume_batch(
         self,
         criterion: Criterion,
-        documents_batch: dict[str, list[Document]]
+        documents_batch: dict[str, list[Page]],
+        max_workers: Optional[int] = None
     ) -> dict[str, Criterion]:
         """
         批量为多份简历生成评分
         
         Args:
-            criterion: 评估标准对象
+            criterion: 评估标准对象（所有简历共享同一个编译模板，不会被修改）
             documents_batch: 简历文档批次，键为文件名
+            max_workers: 并行评分的线程数；结果与串行评分逐位相同
         
         Returns:
             文件名到评分结果的映射
         """
-        results = {}
-        for filename, docs in documents_batch.items():
-            # 为每个简历创建标准的深拷贝，避免共享状态
-            criterion_copy = Criterion(
-                name=criterion.name,
-                content=criterion.content,
-                scale=criterion.scale,
-                children=criterion.children.copy(),
-                metadata=criterion.metadata.copy()
-            )
-            results[filename] = self.score_resume(criterion_copy, docs)
-        return results
+        compiled = CompiledCriterion.intern(criterion)
+        
+        def score(item: tuple[str, list[Page]]) -> Criterion:
+            filename, docs = item
+            return self.score_resume_matrix(compiled, {filename: docs}).to_criterion(filename)
+        
+        items = list(documents_batch.items())
+        if max_workers is not None and max_workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                scored = list(executor.map(score, items))
+        else:
+            scored = [score(item) for item in items]
+        return {filename: result for (filename, _), result in zip(items, scored)}
+    
+    def score_resume_matrix(
+        self,
+        compiled: CompiledCriterion,
+        documents_batch: dict[str, list[Page]]
+    ) -> BatchScores:
+        """
+        批量评分，结果保存在一个 (简历数, 节点数) 的分数矩阵中
+        
+        Args:
+            compiled: 编译后的评估标准
+            documents_batch: 简历文档批次，键为文件名
+        
+        Returns:
+            分数矩阵，按需构建每份简历的 Criterion 树
+        """
+        resume_ids = list(documents_batch)
+        scores = np.empty((len(resume_ids), len(compiled)))
+        nodes = [
+            leaf_hash(compiled.contents[column], compiled.scales[column])
+            for column in range(len(compiled))
+        ]
+        leaves = set(compiled.leaf_index)
+        keys = {}
+        for row, resume_id in enumerate(resume_ids):
+            resume_text = text_hash(documents_batch[resume_id])
+            for column, node in enumerate(nodes):
+                if column in leaves:
+                    keys[(row, column)] = (node, resume_text, self.scorer_id)
+                else:
+                    scores[row, column] = self._node_score(node, resume_text)
+        self._score_leaves(keys, scores)
+        return BatchScores(compiled, resume_ids, scores)
+    
+    def _score_leaves(
+        self,
+        keys: dict[tuple[int, int], tuple[str, str, str]],
+        scores: np.ndarray
+    ) -> None:
+        """
+        为叶子评分：先批量查询缓存，只评估未命中的叶子并写入缓存
+        Args:
+            keys: (行, 列) 到叶子缓存键的映射
+            scores: 分数矩阵，原地更新
+        """
+        cached = self.cache.get_many(keys.values()) if self.cache is not None else {}
+        fresh = {}
+        for (row, column), key in keys.items():
+            if key in cached:
+                scores[row, column] = cached[key]
+            else:
+                if key not in fresh:
+                    leaf, resume_text, _ = key
+                    fresh[key] = self._node_score(leaf, resume_text)
+                scores[row, column] = fresh[key]
+        if self.cache is not None:
+            self.cache.put_many(fresh)
 
 # 使用示例：
 """
@@ -103,6 +188,8 @@ criterion = Criterion(
 )
 
 # 为单份简历评分
+scored_criterion = scorer.score_resume(criterion, [], resume_id="resume1.pdf")
+# 不传 resume_id 时使用简历文本哈希作为标识，分数相同
 scored_criterion = scorer.score_resume(criterion, [])
 print(f"总分：{scored_criterion.calculate_overall_score()}")
 
@@ -112,6 +199,13 @@ documents_batch = {
     "resume2.pdf": []
 }
 results = scorer.score_resume_batch(criterion, documents_batch)
+# 并行评分，结果与串行逐位相同
+results = scorer.score_resume_batch(criterion, documents_batch, max_workers=4)
 for filename, scored in results.items():
     print(f"{filename}: {scored.calculate_overall_score()}")
+
+# 矩阵批量评分，只在需要时构建评分树
+batch = scorer.score_resume_matrix(CompiledCriterion(criterion), documents_batch)
+for filename, overall in batch.items():
+    print(f"{filename}: {overall}")
 """
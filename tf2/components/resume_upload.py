@@ -0,0 +1,287 @@
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional
+import hashlib
+import os
+import uuid
+from fastapi import HTTPException
+from tf2.components.resume_manager import ResumeManager
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13 的模块名为 multipart
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# PDF 文件以这个文件头开始
+_PDF_MAGIC = b"%PDF-"
+
+# 保留文件开头用于 MIME 检测（与 ResumeIndex 相同）
+_HEAD_BYTES = 8192
+
+class _FilePart:
+    """一个正在写入的文件部分"""
+
+    def __init__(self, folder: Path, filename: str):
+        self.filename = filename
+        # 以 . 开头且不以 .pdf 结尾，写入过程中不会被列表、索引和监视器看到
+        self.tmp_path = folder / f".upload-{uuid.uuid4().hex}.tmp"
+        self.file: Optional[BinaryIO] = open(self.tmp_path, "wb")
+        self.digest = hashlib.sha256()
+        self.head = b""
+        self.size = 0
+        self.error: Optional[str] = None
+
+    def write(self, data: bytes, max_size: int) -> None:
+        if self.error is not None:
+            return
+        self.size += len(data)
+        if len(self.head) < _HEAD_BYTES:
+            self.head += data[:_HEAD_BYTES - len(self.head)]
+        if len(self.head) >= len(_PDF_MAGIC) and not self.head.startswith(_PDF_MAGIC):
+            self.reject("File is not a PDF")
+            return
+        if self.size > max_size:
+            self.reject(f"File exceeds {max_size} bytes")
+            return
+        self.digest.update(data)
+        self.file.write(data)
+
+    def reject(self, error: str) -> None:
+        """停止写入并删除临时文件，之后的数据直接丢弃"""
+        self.error = error
+        self.discard()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def discard(self) -> None:
+        self.close()
+        try:
+            self.tmp_path.unlink()
+        except OSError:
+            pass
+
+class ResumeUpload:
+    """
+    把 multipart/form-data 请求体流式写入简历文件夹
+
+    请求体按块送入 feed()，每个文件部分直接写入文件夹中的临时文件，
+    同时计算 SHA-256 并检查 PDF 文件头，内存中只保留文件开头的几 KB。
+    finish() 时与文件夹中已有简历内容相同的上传被丢弃，返回已有的文件名，
+    这样同一份简历重复上传时既不会重复保存，也不会重复提取文本。
+    """
+
+    def __init__(
+        self,
+        manager: ResumeManager,
+        content_type: str,
+        max_file_size: int = 20 * 1024 * 1024
+    ):
+        """
+        初始化上传
+        Args:
+            manager: 简历管理器，必须已设置文件夹
+            content_type: 请求的 Content-Type 头
+            max_file_size: 单个文件的最大字节数
+        Raises:
+            HTTPException: 文件夹未设置或不是 multipart 请求时返回 400
+        """
+        if manager.base_folder is None:
+            raise HTTPException(status_code=400, detail="Base folder not set")
+        media_type, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise HTTPException(
+                status_code=400,
+                detail="Expected a multipart/form-data request with a boundary"
+            )
+        self.manager = manager
+        self.folder = manager.base_folder
+        self.max_file_size = max_file_size
+        self._parts: List[_FilePart] = []
+        self._current: Optional[_FilePart] = None
+        self._header_field = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._finished = False
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_end": self._on_end
+        })
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        # 没有 filename 的普通表单字段被忽略
+        _, options = parse_options_header(self._disposition)
+        filename = options.get(b"filename")
+        if filename is None:
+            self._current = None
+            return
+        self._current = _FilePart(self.folder, filename.decode("utf-8", "replace"))
+        self._parts.append(self._current)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._current is not None:
+            self._current.write(data[start:end], self.max_file_size)
+
+    def _on_part_end(self) -> None:
+        if self._current is not None:
+            self._current.close()
+            if self._current.error is None and self._current.size < len(_PDF_MAGIC):
+                self._current.reject("File is not a PDF")
+            self._current = None
+
+    def _on_end(self) -> None:
+        self._finished = True
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        写入一块请求体
+        Raises:
+            HTTPException: 请求体格式错误时返回 400
+        """
+        try:
+            self._parser.write(chunk)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Malformed multipart body: {str(e)}")
+
+    def _destination(self, filename: str, sha256: str) -> str:
+        """清理上传的文件名：去掉目录和开头的点，保证以 .pdf 结尾"""
+        name = Path(filename.replace("\\", "/")).name.lstrip(".")
+        if not name:
+            name = sha256[:16]
+        if name.lower().endswith(".pdf"):
+            # 列表和索引只匹配小写的 .pdf 后缀
+            name = name[:-len(".pdf")]
+        return name + ".pdf"
+
+    def _find_duplicate(self, sha256: str, size: int) -> Optional[str]:
+        """文件夹中内容相同的简历的文件名"""
+        if self.manager.index is not None:
+            entry = self.manager.index.find_by_hash(sha256)
+            # 只信任自索引后未变化的文件
+            if entry is not None and self.manager.index.lookup(Path(entry["path"])) is not None:
+                return entry["filename"]
+            return None
+        # 没有索引时只需要比较大小相同的文件
+        for path in self.folder.glob("*.pdf"):
+            try:
+                if path.stat().st_size == size and self.manager.content_hash(str(path)) == sha256:
+                    return path.name
+            except OSError:
+                continue
+        return None
+
+    def _store(self, part: _FilePart, sha256: str) -> str:
+        """
+        把临时文件放到文件夹中，重名时加上序号
+        用硬链接发布：目标已存在时失败而不会覆盖已有的文件，
+        且文件出现时内容已经完整，监视器和索引不会看到空文件
+        """
+        name = self._destination(part.filename, sha256)
+        stem, suffix = name[:-len(".pdf")], name[-len(".pdf"):]
+        for attempt in range(1000):
+            candidate = name if attempt == 0 else f"{stem}-{attempt}{suffix}"
+            try:
+                os.link(part.tmp_path, self.folder / candidate)
+            except FileExistsError:
+                continue
+            part.discard()
+            return candidate
+        raise HTTPException(status_code=409, detail=f"Too many files named {name}")
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        结束上传，保存新的简历并丢弃重复的
+        Returns:
+            每个文件部分的结果：status 为 stored、duplicate 或 rejected
+        Raises:
+            HTTPException: 请求体不完整时返回 400
+        """
+        try:
+            self._parser.finalize()
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Malformed multipart body: {str(e)}")
+        if not self._finished:
+            raise HTTPException(status_code=400, detail="Incomplete multipart body")
+
+        if self.manager.index is not None:
+            self.manager.index.refresh()
+        results = []
+        # 同一个请求中重复的文件只保存第一份
+        stored: Dict[str, str] = {}
+        for part in self._parts:
+            if part.error is not None:
+                results.append({"filename": part.filename, "status": "rejected", "error": part.error})
+                continue
+            sha256 = part.digest.hexdigest()
+            existing = stored.get(sha256) or self._find_duplicate(sha256, part.size)
+            if existing is not None:
+                part.discard()
+                results.append({
+                    "filename": part.filename,
+                    "status": "duplicate",
+                    "stored_as": existing,
+                    "sha256": sha256,
+                    "size": part.size
+                })
+                continue
+            name = self._store(part, sha256)
+            if self.manager.index is not None:
+                # 已经知道哈希，直接登记，索引不必重新读取文件
+                self.manager.index.record(self.folder / name, sha256, part.head)
+            stored[sha256] = name
+            results.append({
+                "filename": part.filename,
+                "status": "stored",
+                "stored_as": name,
+                "sha256": sha256,
+                "size": part.size
+            })
+        return results
+
+    def abort(self) -> None:
+        """请求中断时删除所有临时文件"""
+        for part in self._parts:
+            part.discard()
+
+# 使用示例：
+"""
+@router.post("/upload")
+async def upload_resumes(request: Request, manager: ResumeManager = Depends(get_resume_manager)):
+    upload = ResumeUpload(manager, request.headers.get("content-type", ""))
+    try:
+        async for chunk in request.stream():
+            upload.feed(chunk)
+        return upload.finish()
+    except BaseException:
+        upload.abort()
+        raise
+
+# curl -F "files=@a.pdf" -F "files=@b.pdf" "http://localhost:8000/resumes/upload"
+# [{"filename": "a.pdf", "status": "stored", "stored_as": "a.pdf", ...},
+#  {"filename": "b.pdf", "status": "duplicate", "stored_as": "a.pdf", ...}]
+"""
@@ -0,0 +1,247 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+import multiprocessing
+import os
+import threading
+from tf2.components.resume_manager import (
+    ResumeManager,
+    _extract_worker,
+    get_default_resume_manager
+)
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # 非 Linux 或未安装时退回轮询
+    INotify = None
+    inotify_flags = None
+
+class ResumeWatcher:
+    """
+    监视简历文件夹，在后台预先提取新增或修改的 PDF
+
+    有 inotify_simple 时使用 inotify，否则定期轮询文件的 (大小, mtime)。
+    提取在有界进程池中进行，结果写入 ResumeManager 的提取缓存，
+    之后的评分请求读取简历时直接命中缓存。
+    """
+
+    def __init__(
+        self,
+        manager: ResumeManager,
+        max_workers: int = 2,
+        poll_interval: float = 2.0,
+        use_inotify: bool = True,
+        warm_start: bool = False
+    ):
+        """
+        初始化文件夹监视器
+        Args:
+            manager: 简历管理器，必须设置了文件夹并启用了提取缓存
+            max_workers: 同时提取的文件数
+            poll_interval: 轮询间隔（秒）
+            use_inotify: 可用时是否使用 inotify
+            warm_start: 启动时是否提取文件夹中已有但未缓存的文件
+        """
+        self.manager = manager
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and INotify is not None
+        self.warm_start = warm_start
+        self.folder: Optional[Path] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight: Set[str] = set()
+        self._extracted = 0
+        self._failed = 0
+        self._skipped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self.use_inotify else "polling"
+
+    def start(self) -> None:
+        """启动后台监视线程"""
+        if self.manager.base_folder is None:
+            raise ValueError("Base folder not set")
+        if self.manager.cache is None:
+            raise ValueError("Resume manager has no extraction cache")
+        if self.running:
+            return
+        self.folder = self.manager.base_folder
+        self._stop.clear()
+        # spawn 避免在多线程的服务进程中 fork
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        target = self._inotify_loop if self.use_inotify else self._poll_loop
+        self._thread = threading.Thread(target=target, name="resume-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止监视并取消尚未开始的提取"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def follow_folder(self) -> None:
+        """
+        简历文件夹变更后调用：监视器正在运行且监视的是旧文件夹时，
+        停止旧的监视线程和进程池，在新文件夹上重新启动；未运行时不做任何事
+        """
+        if self.running and self.folder != self.manager.base_folder:
+            self.stop()
+            self.start()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self.running,
+                "mode": self.mode,
+                "folder": str(self.manager.base_folder) if self.manager.base_folder else None,
+                "in_flight": len(self._in_flight),
+                "extracted": self._extracted,
+                "failed": self._failed,
+                "skipped": self._skipped
+            }
+
+    def _schedule(self, path: Path) -> None:
+        """提交提取任务；已在缓存中或正在提取的文件会被跳过"""
+        key = str(path)
+        with self._lock:
+            if key in self._in_flight or self._executor is None:
+                return
+        # 与 read_resume 使用同一个缓存键（包含管理器的页数和字符数限制）
+        cache_key = self.manager.extraction_key(self.manager.content_hash(key))
+        if cache_key is None or self.manager.cache.contains(cache_key):
+            with self._lock:
+                self._skipped += 1
+            return
+        with self._lock:
+            if key in self._in_flight or self._executor is None:
+                return
+            self._in_flight.add(key)
+            try:
+                future = self._executor.submit(
+                    _extract_worker, key, self.manager.max_pages, self.manager.max_chars
+                )
+            except RuntimeError:
+                # 进程池已关闭
+                self._in_flight.discard(key)
+                return
+        future.add_done_callback(
+            lambda f: self._on_extracted(key, cache_key, f)
+        )
+
+    def _on_extracted(self, key: str, cache_key: str, future: Future) -> None:
+        ok = False
+        try:
+            if not future.cancelled():
+                ok, payload = future.result()
+                if ok:
+                    self.manager.cache.put(
+                        cache_key,
+                        [(doc.page_content, doc.metadata) for doc in payload]
+                    )
+        except Exception:
+            ok = False
+        with self._lock:
+            self._in_flight.discard(key)
+            if ok:
+                self._extracted += 1
+            elif not future.cancelled():
+                self._failed += 1
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """文件夹中 .pdf 文件的 (大小, mtime_ns)"""
+        signatures = {}
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not entry.name.endswith(".pdf"):
+                        continue
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            signatures[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return signatures
+
+    def _poll_loop(self) -> None:
+        known = self._snapshot()
+        if self.warm_start:
+            for path in known:
+                self._schedule(Path(path))
+        # 两次轮询之间签名不变才提取，避免读到尚未写完的文件
+        changed: Dict[str, Tuple[int, int]] = {}
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            for path, signature in current.items():
+                if changed.get(path) == signature:
+                    del changed[path]
+                    self._schedule(Path(path))
+                elif known.get(path) != signature:
+                    changed[path] = signature
+            for path in list(changed):
+                if path not in current:
+                    del changed[path]
+            known = current
+
+    def _inotify_loop(self) -> None:
+        if self.warm_start:
+            for path in self._snapshot():
+                self._schedule(Path(path))
+        inotify = INotify()
+        try:
+            inotify.add_watch(
+                str(self.folder),
+                inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+            )
+            while not self._stop.is_set():
+                for event in inotify.read(timeout=int(self.poll_interval * 1000)):
+                    if event.name.startswith(".") or not event.name.endswith(".pdf"):
+                        continue
+                    self._schedule(self.folder / event.name)
+        finally:
+            inotify.close()
+
+_default_watcher: Optional[ResumeWatcher] = None
+_default_watcher_lock = threading.Lock()
+
+def get_default_resume_watcher() -> ResumeWatcher:
+    """获取绑定在共享简历管理器上的监视器（默认不启动）"""
+    global _default_watcher
+    if _default_watcher is None:
+        with _default_watcher_lock:
+            if _default_watcher is None:
+                _default_watcher = ResumeWatcher(get_default_resume_manager())
+    return _default_watcher
+
+# 使用示例：
+"""
+manager = ResumeManager("/path/to/resumes", cache=ExtractionCache())
+watcher = ResumeWatcher(manager, max_workers=4)
+watcher.start()
+
+# 新放入文件夹的简历会在后台被提取，之后 read_resume 直接命中缓存
+print(watcher.status())
+
+# 更换文件夹后在新文件夹上继续监视
+manager.set_base_folder("/path/to/other")
+watcher.follow_folder()
+
+watcher.stop()
+"""
@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+import math
+import threading
+import numpy as np
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import Response
+from tf2.components.compiled_criterion import CompiledCriterion
+
+# 与 Criterion.model_dump() 的键顺序相同
+TREE_FIELDS: Tuple[str, ...] = ("name", "content", "scale", "score", "children", "metadata")
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    解析 fields 查询参数（逗号分隔的节点字段），None 或空字符串表示全部字段
+    children 总是保留，投影后的结果仍然是一棵树
+    Raises:
+        HTTPException: 包含未知字段时返回 400
+    """
+    if not fields:
+        return TREE_FIELDS
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(TREE_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}; "
+                   f"valid fields are {', '.join(TREE_FIELDS)}"
+        )
+    requested.add("children")
+    return tuple(field for field in TREE_FIELDS if field in requested)
+
+def _float_json(value: float) -> bytes:
+    """与标准库 json 相同的浮点数写法，NaN（缺失）与 ±inf 等非有限值写为 null，与 orjson 一致"""
+    return repr(value).encode("ascii") if math.isfinite(value) else b"null"
+
+class TreeTemplate:
+    """
+    一个编译后评估标准的 JSON 模板
+
+    名称、内容、量表、权重、元数据等静态部分只序列化一次，按前序在每个分数的位置切开；
+    每份简历只需把分数填进片段之间，不构建 Criterion 树，也不重复编码 content。
+    """
+
+    def __init__(self, compiled: CompiledCriterion, fields: Tuple[str, ...] = TREE_FIELDS):
+        """
+        生成模板
+        Args:
+            compiled: 编译后的评估标准
+            fields: 每个节点输出的字段（parse_fields 的结果）
+        """
+        self.content_hash = compiled.content_hash
+        self.fields = fields
+        self._segments: List[bytes] = []
+        static = {"name": compiled.names, "content": compiled.contents, "scale": compiled.scales}
+        # 每个分数位置对应的前序节点下标
+        slots: List[int] = []
+        buffer = bytearray()
+
+        def emit(i: int) -> None:
+            buffer.extend(b"{")
+            for position, field in enumerate(fields):
+                if position:
+                    buffer.extend(b",")
+                buffer.extend(b'"' + field.encode("ascii") + b'":')
+                if field == "score":
+                    self._segments.append(bytes(buffer))
+                    buffer.clear()
+                    slots.append(i)
+                elif field == "children":
+                    buffer.extend(b"[")
+                    for j, child in enumerate(compiled.children_index[i]):
+                        if j:
+                            buffer.extend(b",")
+                        buffer.extend(b"[" + _float_json(float(compiled.weight[child])) + b",")
+                        emit(child)
+                        buffer.extend(b"]")
+                    buffer.extend(b"]")
+                elif field == "metadata":
+                    buffer.extend(orjson.dumps(compiled.metadata[i]))
+                else:
+                    buffer.extend(orjson.dumps(static[field][i]))
+            buffer.extend(b"}")
+
+        emit(0)
+        self._segments.append(bytes(buffer))
+        self._slots = np.asarray(slots, dtype=np.intp)
+
+    @property
+    def static_bytes(self) -> int:
+        """模板中静态部分的字节数"""
+        return sum(len(segment) for segment in self._segments)
+
+    def render(self, node_scores: np.ndarray) -> bytes:
+        """
+        填入一份简历的分数
+        Args:
+            node_scores: 形状为 (节点数,) 的直接分数，NaN 表示缺失
+        Returns:
+            与 build_criterion(node_scores).model_dump() 投影后相同的 JSON
+        """
+        values = node_scores[self._slots].tolist()
+        parts = [self._segments[0]]
+        for value, segment in zip(values, self._segments[1:]):
+            parts.append(_float_json(value))
+            parts.append(segment)
+        return b"".join(parts)
+
+    def fragment(self, node_scores: np.ndarray) -> orjson.Fragment:
+        """填入分数，返回可以直接嵌入 orjson.dumps 结果中的片段"""
+        return orjson.Fragment(self.render(node_scores))
+
+_templates: "OrderedDict[Tuple[str, Tuple[str, ...]], TreeTemplate]" = OrderedDict()
+_templates_lock = threading.Lock()
+_TEMPLATE_CACHE_SIZE = 256
+
+def get_tree_template(
+    compiled: CompiledCriterion,
+    fields: Tuple[str, ...] = TREE_FIELDS
+) -> TreeTemplate:
+    """
+    获取评估标准版本（内容哈希）和字段组合对应的模板，最近使用的模板保留在内存中
+    """
+    key = (compiled.content_hash, fields)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            return template
+    template = TreeTemplate(compiled, fields)
+    with _templates_lock:
+        _templates[key] = template
+        _templates.move_to_end(key)
+        while len(_templates) > _TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+    return template
+
+def dumps(payload: Any) -> bytes:
+    """用 orjson 序列化响应，numpy 数组和 TreeTemplate.fragment 的片段可以直接放在其中"""
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def json_response(payload: Any, status_code: int = 200) -> Response:
+    """跳过 FastAPI 默认编码器的 JSON 响应"""
+    return Response(content=dumps(payload), status_code=status_code, media_type="application/json")
+
+# 使用示例：
+"""
+compiled = await criteria_manager.get_compiled_criteria("數據科學家評估標準")
+batch = scorer.score_resume_matrix(compiled, documents_batch)
+
+# 完整的评分树，与 batch.to_criterion(...).model_dump() 相同
+template = get_tree_template(compiled)
+tree = template.render(batch.scores[0])
+
+# 只要名称和分数（以及树结构）
+template = get_tree_template(compiled, parse_fields("name,score"))
+return json_response({
+    resume_id: {"scored_criterion": template.fragment(batch.scores[row])}
+    for row, resume_id in enumerate(batch.resume_ids)
+})
+"""
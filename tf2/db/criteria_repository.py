@@ -0,0 +1,296 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+from sqlalchemy import (
+    Engine,
+    Float,
+    Integer,
+    String,
+    create_engine,
+    delete,
+    inspect,
+    literal,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection
+from tf2.db.schemas import Base, Criterion, CriterionORM, criteria_association
+
+criteria_table = CriterionORM.__table__
+
+# 递归查询的最大深度，防止关联表中出现环时无限递归
+MAX_DEPTH = 64
+
+class CriteriaRepository:
+    """
+    基于 SQL 的评估标准仓库
+
+    整棵树（含权重和子标准顺序）通过一条递归 CTE 查询加载，
+    写入时在一个事务内批量插入所有节点和关联。
+    节点由 (根标准名称, 节点名称) 标识：不同的树可以有同名的子标准，互不影响；
+    同一棵树中同名的节点是同一个共享子标准。
+    """
+
+    def __init__(self, engine: Engine):
+        """
+        初始化仓库并创建缺失的表，旧版本（节点名称全局唯一）的表会被迁移
+        Args:
+            engine: SQLAlchemy 引擎
+        """
+        self.engine = engine
+        with self.engine.begin() as conn:
+            legacy = self._load_legacy_trees(conn)
+        Base.metadata.create_all(engine)
+        if legacy:
+            with self.engine.begin() as conn:
+                for criterion in legacy:
+                    self._write_tree(conn, criterion)
+
+    @classmethod
+    def from_url(cls, url: str) -> "CriteriaRepository":
+        """由数据库 URL 创建，SQLite 文件所在目录不存在时自动创建"""
+        if url.startswith("sqlite:///") and url != "sqlite:///:memory:":
+            Path(url[len("sqlite:///"):]).parent.mkdir(parents=True, exist_ok=True)
+        return cls(create_engine(url))
+
+    @staticmethod
+    def _load_legacy_trees(conn: Connection) -> List[Criterion]:
+        """
+        读出旧版本表中的所有树并删除旧表
+        旧版本中节点名称是全局主键，criteria 表没有 root 列
+        """
+        inspector = inspect(conn)
+        if not inspector.has_table("criteria"):
+            return []
+        if "root" in {column["name"] for column in inspector.get_columns("criteria")}:
+            return []
+
+        nodes = {row.name: row for row in conn.execute(text("SELECT * FROM criteria"))}
+        children: Dict[str, List[Tuple[int, float, str]]] = {}
+        child_names = set()
+        if inspector.has_table("criteria_association"):
+            for row in conn.execute(text("SELECT * FROM criteria_association")):
+                children.setdefault(row.parent_id, []).append(
+                    (row.position, row.weight, row.child_id)
+                )
+                child_names.add(row.child_id)
+
+        def build(name: str, depth: int) -> Criterion:
+            row = nodes[name]
+            return Criterion(
+                name=name,
+                content=row.content,
+                scale=row.scale,
+                score=row.score,
+                children=[
+                    (weight, build(child, depth + 1))
+                    for _, weight, child in sorted(children.get(name, []))
+                    if child in nodes and depth < MAX_DEPTH
+                ],
+                metadata=json.loads(row.metadata) if isinstance(row.metadata, str) else row.metadata or {}
+            )
+
+        trees = [build(name, 0) for name in sorted(nodes) if name not in child_names]
+        conn.execute(text("DROP TABLE IF EXISTS criteria_association"))
+        conn.execute(text("DROP TABLE criteria"))
+        return trees
+
+    @staticmethod
+    def _tree_query(root_names: Optional[Iterable[str]]):
+        """以 root_names（为 None 时为所有根节点）为起点的递归 CTE 查询"""
+        seed = select(
+            criteria_table.c.root,
+            criteria_table.c.name.label("node"),
+            literal(None, String).label("parent"),
+            literal(None, Float).label("weight"),
+            literal(0, Integer).label("position"),
+            literal(0, Integer).label("depth"),
+        ).where(criteria_table.c.name == criteria_table.c.root)
+        if root_names is not None:
+            seed = seed.where(criteria_table.c.root.in_(list(root_names)))
+
+        tree = seed.cte("tree", recursive=True)
+        step = (
+            select(
+                tree.c.root,
+                criteria_association.c.child_id,
+                criteria_association.c.parent_id,
+                criteria_association.c.weight,
+                criteria_association.c.position,
+                tree.c.depth + 1,
+            )
+            .join(
+                tree,
+                (criteria_association.c.root == tree.c.root)
+                & (criteria_association.c.parent_id == tree.c.node)
+            )
+            .where(tree.c.depth < MAX_DEPTH)
+        )
+        tree = tree.union_all(step)
+
+        return (
+            select(
+                tree.c.root,
+                tree.c.node,
+                tree.c.parent,
+                tree.c.weight,
+                tree.c.position,
+                tree.c.depth,
+                criteria_table.c.content,
+                criteria_table.c.scale,
+                criteria_table.c.score,
+                criteria_table.c.metadata,
+            )
+            .join(
+                criteria_table,
+                (criteria_table.c.root == tree.c.root) & (criteria_table.c.name == tree.c.node)
+            )
+            .order_by(tree.c.root, tree.c.depth, tree.c.parent, tree.c.position)
+        )
+
+    @staticmethod
+    def _assemble(rows: List[Any]) -> Dict[str, Criterion]:
+        """把 CTE 查询结果组装成 Criterion 树，按根节点名称返回"""
+        by_root: Dict[str, List[Any]] = {}
+        for row in rows:
+            by_root.setdefault(row.root, []).append(row)
+
+        trees: Dict[str, Criterion] = {}
+        for root, root_rows in by_root.items():
+            nodes: Dict[str, Any] = {}
+            depth: Dict[str, int] = {}
+            children: Dict[str, List[Tuple[int, float, str]]] = {}
+            seen_edges = set()
+            for row in root_rows:
+                nodes[row.node] = row
+                depth[row.node] = max(depth.get(row.node, 0), row.depth)
+                # 共享子标准会在多条路径上出现，每条父子关系只记录一次
+                if row.parent is not None and (row.parent, row.node) not in seen_edges:
+                    seen_edges.add((row.parent, row.node))
+                    children.setdefault(row.parent, []).append(
+                        (row.position, row.weight, row.node)
+                    )
+
+            # 从最深的节点开始构建，保证子节点先于父节点
+            built: Dict[str, Criterion] = {}
+            for name in sorted(nodes, key=lambda n: depth[n], reverse=True):
+                row = nodes[name]
+                built[name] = Criterion(
+                    name=name,
+                    content=row.content,
+                    scale=row.scale,
+                    score=row.score,
+                    children=[
+                        (weight, built[child])
+                        for _, weight, child in sorted(children.get(name, []))
+                    ],
+                    metadata=row.metadata or {}
+                )
+            trees[root] = built[root]
+        return trees
+
+    def load_tree(self, name: str) -> Optional[Criterion]:
+        """加载以 name 为根的整棵树，一次查询"""
+        return self.load_trees([name]).get(name)
+
+    def load_trees(self, names: Optional[Iterable[str]] = None) -> Dict[str, Criterion]:
+        """
+        加载多棵树，一次查询
+        Args:
+            names: 根节点名称；为 None 时加载所有树
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(self._tree_query(names)).all()
+        return self._assemble(rows)
+
+    @staticmethod
+    def _flatten(criterion: Criterion) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """展开为节点行和关联行"""
+        nodes: Dict[str, Dict[str, Any]] = {}
+        edges: List[Dict[str, Any]] = []
+        stack = [criterion]
+        while stack:
+            node = stack.pop()
+            row = {
+                "root": criterion.name,
+                "name": node.name,
+                "content": node.content,
+                "scale": node.scale,
+                "score": node.score,
+                "metadata": node.metadata,
+            }
+            if node.name in nodes:
+                if nodes[node.name] != row:
+                    raise ValueError(
+                        f"Criterion name {node.name} is used by different sub-criteria"
+                    )
+                continue
+            nodes[node.name] = row
+            for position, (weight, child) in enumerate(node.children):
+                edges.append({
+                    "root": criterion.name,
+                    "parent_id": node.name,
+                    "child_id": child.name,
+                    "weight": weight,
+                    "position": position,
+                })
+                stack.append(child)
+        return list(nodes.values()), edges
+
+    def _write_tree(self, conn: Connection, criterion: Criterion) -> None:
+        nodes, edges = self._flatten(criterion)
+        conn.execute(criteria_table.insert(), nodes)
+        if edges:
+            conn.execute(criteria_association.insert(), edges)
+
+    @staticmethod
+    def _delete_trees(conn: Connection, roots: Iterable[str]) -> None:
+        roots = list(roots)
+        conn.execute(delete(criteria_association).where(criteria_association.c.root.in_(roots)))
+        conn.execute(delete(criteria_table).where(criteria_table.c.root.in_(roots)))
+
+    def save_tree(self, criterion: Criterion, replace: Optional[str] = None) -> None:
+        """
+        在一个事务内写入整棵树，替换同名的旧树
+        Args:
+            criterion: 评估标准树
+            replace: 同时删除的旧树名称（重命名时使用），写入失败时旧树保留
+        """
+        # 先检查结构，不合法时不打开事务
+        self._flatten(criterion)
+        roots = {criterion.name}
+        if replace is not None:
+            roots.add(replace)
+        with self.engine.begin() as conn:
+            self._delete_trees(conn, roots)
+            self._write_tree(conn, criterion)
+
+    def delete_tree(self, name: str) -> None:
+        """删除整棵树"""
+        with self.engine.begin() as conn:
+            self._delete_trees(conn, [name])
+
+    def list_root_names(self) -> List[str]:
+        """列出所有根节点名称"""
+        with self.engine.connect() as conn:
+            return list(conn.execute(
+                select(criteria_table.c.root).distinct().order_by(criteria_table.c.root)
+            ).scalars())
+
+# 使用示例：
+"""
+repository = CriteriaRepository.from_url("sqlite:///./.cache/criteria.sqlite")
+repository.save_tree(criterion)
+
+# 一次递归查询加载整棵树（含权重）
+loaded = repository.load_tree("數據科學家評估標準")
+
+# 不同的树可以共用子标准名称（例如 Python基礎），各自保存、互不影响
+repository.save_tree(variant)
+
+# 重命名：在一个事务中删除旧树并写入新树
+repository.save_tree(renamed, replace="數據科學家評估標準")
+
+# 与 CriteriaManager 一起使用，通过 API 创建的标准会被持久化
+manager = CriteriaManager(repository=repository)
+"""
@@ -1,84 +1,102 @@
 from pydantic import BaseModel
 from typing_extensions import Self
-from typing import Any, Dict
-from sqlalchemy import Column, String, Float, JSON, ForeignKey, Table
-from sqlalchemy.orm import relationship, DeclarativeBase
+from typing import Any, Dict, Optional
+import hashlib
+import json
+from sqlalchemy import Column, String, Float, Integer, JSON, ForeignKeyConstraint, Table, and_
+from sqlalchemy.orm import relationship, DeclarativeBase, object_session
 from sqlalchemy.ext.declarative import declared_attr
 
 class Base(DeclarativeBase):
     pass
 
 # 关联表用于处理 criteria 之间的父子关系
+# 节点属于一棵树（root 为根标准名称），不同的树可以有同名的子标准
 criteria_association = Table(
     'criteria_association',
     Base.metadata,
-    Column('parent_id', String, ForeignKey('criteria.name'), primary_key=True),
-    Column('child_id', String, ForeignKey('criteria.name'), primary_key=True),
-    Column('weight', Float, nullable=False)
+    Column('root', String, primary_key=True),
+    Column('parent_id', String, primary_key=True),
+    Column('child_id', String, primary_key=True),
+    Column('weight', Float, nullable=False),
+    # 子标准在父标准中的顺序
+    Column('position', Integer, nullable=False, default=0),
+    ForeignKeyConstraint(['root', 'parent_id'], ['criteria.root', 'criteria.name']),
+    ForeignKeyConstraint(['root', 'child_id'], ['criteria.root', 'criteria.name'])
 )
 
 class CriterionORM(Base):
-    """SQLAlchemy 的 Criterion 模型"""
+    """SQLAlchemy 的 Criterion 模型，节点由 (根标准名称, 节点名称) 标识"""
     __tablename__ = 'criteria'
 
+    root = Column(String, primary_key=True)
     name = Column(String, primary_key=True)
     content = Column(String, nullable=False)
     scale = Column(String, nullable=False)
     score = Column(Float, nullable=True)
-    metadata = Column(JSON, nullable=False, default=dict)
+    # "metadata" 是 DeclarativeBase 的保留属性名，列名保持不变
+    metadata_ = Column('metadata', JSON, nullable=False, default=dict)
 
-    # 自引用关系
+    # 自引用关系（同一棵树内）
     children = relationship(
         'CriterionORM',
         secondary=criteria_association,
-        primaryjoin=name == criteria_association.c.parent_id,
-        secondaryjoin=name == criteria_association.c.child_id,
+        primaryjoin=and_(
+            root == criteria_association.c.root,
+            name == criteria_association.c.parent_id
+        ),
+        secondaryjoin=and_(
+            root == criteria_association.c.root,
+            name == criteria_association.c.child_id
+        ),
+        foreign_keys=[
+            criteria_association.c.root,
+            criteria_association.c.parent_id,
+            criteria_association.c.child_id
+        ],
         backref='parents'
     )
 
     def to_pydantic(self) -> "Criterion":
-        """转换为 Pydantic 模���"""
-        children_with_weights = []
-        for child in self.children:
-            # 获取权重
-            weight = next(
-                row.weight for row in criteria_association.select()
-                .where(criteria_association.c.parent_id == self.name)
-                .where(criteria_association.c.child_id == child.name)
-                .execute()
-            )
-            children_with_weights.append((weight, child.to_pydantic()))
-        
-        return Criterion(
-            name=self.name,
-            content=self.content,
-            scale=self.scale,
-            score=self.score,
-            children=children_with_weights,
-            metadata=self.metadata
-        )
+        """转换为 Pydantic 模型，整棵树（含权重）通过一次递归查询加载"""
+        from tf2.db.criteria_repository import CriteriaRepository
+
+        session = object_session(self)
+        if session is None:
+            raise ValueError(f"Criterion {self.name} is not attached to a session")
+        tree = CriteriaRepository(session.get_bind()).load_tree(self.root)
+        if tree is None:
+            raise ValueError(f"Criteria tree {self.root} not found")
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if node.name == self.name:
+                return node
+            stack.extend(child for _, child in node.children)
+        raise ValueError(f"Criterion {self.name} not found in {self.root}")
 
     @classmethod
-    def from_pydantic(cls, criterion: "Criterion") -> "CriterionORM":
-        """从 Pydantic 模型创建"""
+    def from_pydantic(cls, criterion: "Criterion", root: Optional[str] = None) -> "CriterionORM":
+        """
+        从 Pydantic 模型创建（不含权重）
+        关联表上的权重和顺序无法通过 relationship 设置，需要持久化时使用 CriteriaRepository.save_tree
+        Args:
+            criterion: 评估标准
+            root: 所在树的根标准名称，默认为 criterion 本身
+        """
+        root = root if root is not None else criterion.name
         orm_criterion = cls(
+            root=root,
             name=criterion.name,
             content=criterion.content,
             scale=criterion.scale,
             score=criterion.score,
-            metadata=criterion.metadata
+            metadata_=criterion.metadata
         )
         
         # 递归处理子标准
-        for weight, child in criterion.children:
-            child_orm = cls.from_pydantic(child)
-            orm_criterion.children.append(child_orm)
-            # 需要单独设置权重
-            criteria_association.insert().values(
-                parent_id=orm_criterion.name,
-                child_id=child_orm.name,
-                weight=weight
-            )
+        for _, child in criterion.children:
+            orm_criterion.children.append(cls.from_pydantic(child, root))
         
         return orm_criterion
 
@@ -128,6 +146,33 @@ class Criterion(BaseModel):
         # 返回加权平均分
         return weighted_sum / total_weight
 
+    def content_hash(self) -> str:
+        """计算评估标准内容（不含分数）的哈希，可作为标准的版本号
+
+        Returns:
+            str: 名称、内容、量表、元数据、权重和树结构的 SHA-256
+        """
+        def strip_scores(data: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "name": data["name"],
+                "content": data["content"],
+                "scale": data["scale"],
+                "metadata": data["metadata"],
+                "children": [
+                    {"weight": child["weight"], "criterion": strip_scores(child["criterion"])}
+                    for child in data["children"]
+                ]
+            }
+
+        canonical = json.dumps(
+            strip_scores(self.to_json()),
+            ensure_ascii=False,
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
     @classmethod
     def from_json(cls, json_data: dict) -> "Criterion":
         """从 JSON 数据创建 Criterion 对象"""
@@ -163,4 +208,12 @@ class Criterion(BaseModel):
             "metadata": self.metadata
         }
 
-    
\ No newline at end of file
+    
+class CriterionSummary(BaseModel):
+    """评估标准的摘要投影：只包含名称和元数据，不含子标准树"""
+    name: str
+    metadata: dict[str, Any] = {}
+
+    @classmethod
+    def from_criterion(cls, criterion: Criterion) -> "CriterionSummary":
+        return cls(name=criterion.name, metadata=criterion.metadata)
@@ -0,0 +1,100 @@
+from typing import Dict, List, Sequence, Tuple
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# 启动时不应该导入的重型依赖，只在第一次解析 PDF 或检测文件类型时才导入
+DEFERRED_MODULES = ("langchain", "langchain_core", "pypdf", "magic")
+
+# tf2.main 的默认导入时间预算（毫秒，多次冷启动的中位数）
+DEFAULT_BUDGET_MS = 1200.0
+
+_PROBE = """
+import sys
+import {module}
+print(__import__("json").dumps(sorted(
+    name for name in sys.modules if name.split(".")[0] in {deferred!r}
+)))
+"""
+
+def measure_import(module: str = "tf2.main") -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    在新的解释器中导入 module 一次
+    Returns:
+        (累计导入时间毫秒, 每个模块自身的导入时间毫秒, 已导入的延迟模块)
+    """
+    code = _PROBE.format(module=module, deferred=set(DEFERRED_MODULES))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    total = 0.0
+    self_times: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # 表头
+            continue
+        name = fields[2].strip()
+        self_times[name] = self_us / 1000
+        if name == module:
+            total = cumulative_us / 1000
+    return total, self_times, json.loads(result.stdout.strip().splitlines()[-1])
+
+def check_budget(
+    budget_ms: float = DEFAULT_BUDGET_MS,
+    runs: int = 5,
+    module: str = "tf2.main",
+    top: int = 10
+) -> bool:
+    """
+    多次冷启动测量导入时间，检查中位数是否在预算内、且没有提前导入重型依赖
+    Returns:
+        是否通过
+    """
+    totals: List[float] = []
+    slowest: Dict[str, float] = {}
+    loaded: Sequence[str] = ()
+    for _ in range(runs):
+        total, self_times, loaded = measure_import(module)
+        totals.append(total)
+        for name, ms in self_times.items():
+            slowest[name] = max(slowest.get(name, 0.0), ms)
+
+    median = statistics.median(totals)
+    print(f"import {module}: median {median:.0f} ms over {runs} runs "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}), budget {budget_ms:.0f} ms")
+    print("slowest modules (self time):")
+    for name, ms in sorted(slowest.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    ok = median <= budget_ms
+    if not ok:
+        print(f"FAIL: import time exceeds budget by {median - budget_ms:.0f} ms")
+    if loaded:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(loaded)}")
+        ok = False
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="检查 tf2 服务的冷启动导入时间预算")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="tf2.main")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    sys.exit(0 if check_budget(args.budget_ms, args.runs, args.module, args.top) else 1)
+
+# 使用示例：
+"""
+# 在 CI 中运行，超出预算或启动时导入了 langchain / pypdf / magic 时返回非零
+python -m tf2.import_budget --budget-ms 1200 --runs 5
+"""
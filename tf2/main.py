@@ -1,13 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from tf2.api.criteria import router as criteria_router
 from tf2.api.resumes import router as resumes_router
 from tf2.api.scorers import router as scorers_router
+from tf2.api.jobs import router as jobs_router
+from tf2.components.job_manager import get_default_job_manager
+from tf2.components.resume_watcher import get_default_resume_watcher
+from tf2.components.blocking_executor import limiter_stats, shutdown_blocking_executor
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动时创建任务管理器，继续执行上次未完成的后台任务
+    job_manager = get_default_job_manager()
+    yield
+    get_default_resume_watcher().stop()
+    job_manager.shutdown()
+    shutdown_blocking_executor()
 
 app = FastAPI(
     title="TalentFlow 2",
     description="简历评估系统",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # 添加 CORS 中间件
@@ -22,6 +37,7 @@ app.add_middleware(
 app.include_router(criteria_router)
 app.include_router(resumes_router)
 app.include_router(scorers_router)
+app.include_router(jobs_router)
 
 @app.get("/")
 async def root():
@@ -31,6 +47,11 @@ async def root():
         "redoc_url": "/redoc"
     }
 
+@app.get("/limits")
+async def get_limits():
+    """各端点的并发与排队状态"""
+    return limiter_stats()
+
 """
 # 对单份简历评分
 curl -X POST "http://localhost:8000/scorers/技术评估/example.pdf"
@@ -38,6 +59,16 @@ curl -X POST "http://localhost:8000/scorers/技术评估/example.pdf"
 # 批量评分
 curl -X POST "http://localhost:8000/scorers/batch/技术评估"
 
+# 流式批量评分（NDJSON，每份简历一行）
+curl -N -X POST "http://localhost:8000/scorers/batch/技术评估/stream"
+
+# 查看各端点的并发与排队状态（饱和时端点返回 503 和 Retry-After）
+curl "http://localhost:8000/limits"
+
+# 后台批量评分任务
+curl -X POST "http://localhost:8000/jobs/batch/技术评估"
+curl "http://localhost:8000/jobs/<job_id>"
+
 # 获取详细评分结果
 curl "http://localhost:8000/scorers/results/技术评估/example.pdf"
 